@@ -1,23 +1,52 @@
+import logging
+import sys
+
+from services.startup import startup_profile
+
+# Must come before the other imports so that they are timed too
+if '--profile-startup' in sys.argv:
+    startup_profile.enable()
+
+
 from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from pathlib import Path
 
 
-from config import FLASK_CONFIG, MEDIA_UPLOAD_FOLDER, PORT
+from config import FLASK_CONFIG, MEDIA_UPLOAD_FOLDER, PORT, RECORD_TRAFFIC, RATE_LIMIT
 
 
-from services.database import db, Team, Formation
+from services.log import configure_logging, packet_loggers, stop_logging
+from services.database import db, upgrade_schema, seed_defaults
+from services.assets import init_assets
+from services.match_state import MatchState
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+from services.wire import register_wire_socketio
+from services.lifecycle import register_lifecycle_socketio
+from services.recorder import recorder
+from services.roster_cache import roster_cache
+from services.backpressure import backpressure
+from services.rate_limit import rate_limiter
+from services.bootstrap import state_bootstrap
 
 
 from blueprints.pages import pages_bp
-from blueprints.timer import timer_bp, set_timer_timer_state, register_timer_events_socketio
-from blueprints.game_events import game_events_bp, set_game_events_score_state, register_game_events_socketio
+from blueprints.timer import timer_bp, set_timer_match_state, register_timer_events_socketio
+from blueprints.game_events import game_events_bp, set_game_events_match_state, register_game_events_socketio
 from blueprints.teams import teams_bp, register_teams_socketio
 from blueprints.ads import ads_bp, register_ads_socketio
 from blueprints.obs_commands import obs_commands_bp, register_obs_commands_socketio
 from blueprints.backup import backup_bp
+from blueprints.metrics import metrics_bp
+from blueprints.cues import cues_bp, init_cues, register_cues_socketio
+from blueprints.stats import stats_bp, set_stats_match_state, register_stats_socketio
+from blueprints.archive import archive_bp, set_archive_match_state, register_archive_socketio
+
 
+configure_logging()
+logger = logging.getLogger(__name__)
 
 Path(MEDIA_UPLOAD_FOLDER).mkdir(parents= True, exist_ok= True)
 
@@ -26,28 +55,28 @@ app = Flask(__name__)
 app.config.update(FLASK_CONFIG)
 
 db.init_app(app)
+with startup_profile.step('services.assets'):
+    init_assets(app)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", engineio_logger= True)
+with startup_profile.step('socketio'):
+    # Packet logs go through services/log.py (off unless LOG_PACKET_SAMPLE is set)
+    socketio_logger, engineio_logger = packet_loggers()
+    socketio = SocketIO(app, cors_allowed_origins="*", logger= socketio_logger, engineio_logger= engineio_logger)
+broadcaster.init_app(socketio)
+write_behind.init_app(app, socketio)
+roster_cache.init_app()
+backpressure.init_app(socketio)
 
 with app.app_context():
 
-    db.create_all()
+    with startup_profile.step('db.create_all'):
+        db.create_all()
+    with startup_profile.step('upgrade_schema'):
+        upgrade_schema()
 
-    # Create 2 Teams if they don't exist already
-    for team_id in (1, 2):
-        team = Team.query.get(team_id)
-        if not team:
-            new_team = Team(id = team_id)
-            db.session.add(new_team)
-            db.session.commit()
-
-    # Create Formation for each team if not yet created
-    for team_id in (1, 2):
-        formation = Formation.query.filter_by(team_id=team_id).first()
-        if not formation:
-            new_formation = Formation(team_id=team_id, goalkeeper=None, lines=[])
-            db.session.add(new_formation)
-            db.session.commit()
+    # Both teams and their formations, in one transaction (no writes once they exist)
+    with startup_profile.step('seed_defaults'):
+        seed_defaults()
 
 
 
@@ -68,8 +97,16 @@ score_state = {
 
 
 
-set_timer_timer_state(timer_state)
-set_game_events_score_state(score_state)
+match_state = MatchState(timer_state, score_state)
+
+
+set_timer_match_state(match_state)
+set_game_events_match_state(match_state)
+set_stats_match_state(match_state)
+set_archive_match_state(match_state)
+state_bootstrap.init_app(socketio, match_state)
+with startup_profile.step('blueprints.cues'):
+    init_cues(app, socketio, match_state)
 
 
 app.register_blueprint(pages_bp)
@@ -79,6 +116,10 @@ app.register_blueprint(teams_bp)
 app.register_blueprint(ads_bp)
 app.register_blueprint(obs_commands_bp)
 app.register_blueprint(backup_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(cues_bp)
+app.register_blueprint(stats_bp)
+app.register_blueprint(archive_bp)
 
 
 register_timer_events_socketio(socketio)
@@ -86,13 +127,31 @@ register_game_events_socketio(socketio)
 register_teams_socketio(socketio)
 register_ads_socketio(socketio)
 register_obs_commands_socketio(socketio)
+register_cues_socketio(socketio)
+register_stats_socketio(socketio)
+register_archive_socketio(socketio)
+register_wire_socketio(socketio)
+register_lifecycle_socketio(socketio)
+
+# Both wrap the handlers registered above, so they go last; calls rejected
+# by the rate limiter never reach the recorder
+recorder.init_app(app, socketio, match_state, RECORD_TRAFFIC)
+rate_limiter.init_app(socketio, RATE_LIMIT)
 
 
 
 
 if __name__ == '__main__':
 
+    if startup_profile.enabled:
+        print(startup_profile.report())
+        sys.exit()
+
     try:
         socketio.run(app, debug=True, use_reloader=False, host='0.0.0.0', port=PORT)
     except KeyboardInterrupt:
-        print("\nServer stopped by user.")
\ No newline at end of file
+        logger.info("Server stopped by user")
+    finally:
+        write_behind.flush()
+        recorder.stop(app)
+        stop_logging()
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Season archive query latency.
+
+Seeds a throw-away SQLite database with synthetic archived matches (a league
+of teams with 22-player squads, goals, cards and substitutions) and reports
+the median and worst latency of the archive endpoints over the HTTP test
+client.
+
+    python benchmarks/bench_archive.py [--matches 500] [--teams 20] [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def seed(matches, teams):
+    from services.database import db, ArchivedMatch, ArchivedLineup, ArchivedEvent
+
+    rng = random.Random(1)
+    names = [f"Team {i}" for i in range(teams)]
+    squads = {name: [(number, f"{name} Player {number}") for number in range(1, 23)] for name in names}
+    kickoff = datetime(2025, 8, 1)
+
+    for index in range(matches):
+        home, away = rng.sample(names, 2)
+        match = ArchivedMatch(
+            played_at= kickoff + timedelta(days= index),
+            team1_name= home,
+            team2_name= away,
+            team1_score= 0,
+            team2_score= 0,
+            duration= 5400
+        )
+        for key, name in (('team1', home), ('team2', away)):
+            for number, player in squads[name]:
+                match.lineups.append(ArchivedLineup(team= key, team_name= name, number= number, player_name= player, starter= number <= 11))
+
+            goals = rng.randint(0, 4)
+            setattr(match, f'{key}_score', goals)
+            events = [('goal', rng.randint(2, 11)) for _ in range(goals)]
+            events += [('yellow_card', rng.randint(1, 11)) for _ in range(rng.randint(0, 3))]
+            for _ in range(rng.randint(1, 5)):
+                events += [('sub_out', rng.randint(2, 11)), ('sub_in', rng.randint(12, 22))]
+            for kind, number in events:
+                match.events.append(ArchivedEvent(
+                    kind= kind, team= key, team_name= name, number= number,
+                    player_name= squads[name][number - 1][1], match_time= rng.uniform(0, 5400)
+                ))
+        db.session.add(match)
+
+    db.session.commit()
+    return names
+
+
+def run(matches, teams, repeat):
+    from app import app
+
+    with app.app_context():
+        names = seed(matches, teams)
+
+    client = app.test_client()
+    queries = {
+        'top scorers': '/archive/leaders?kind=goal&limit=10',
+        'team top scorers': f'/archive/leaders?kind=goal&team={names[0]}',
+        'head-to-head': f'/archive/head-to-head?team_a={names[0]}&team_b={names[1]}',
+        'player career': f'/archive/players/{names[0]} Player 9?team={names[0]}',
+        'recent matches': '/archive/matches?limit=20',
+    }
+
+    results = {}
+    for label, url in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.get_data(as_text= True)
+        results[label] = (statistics.median(timings), max(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description= __doc__.strip().splitlines()[0])
+    parser.add_argument('--matches', type= int, default= 500)
+    parser.add_argument('--teams', type= int, default= 20)
+    parser.add_argument('--repeat', type= int, default= 50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        os.chdir(ROOT)
+        sys.path.insert(0, str(ROOT))
+
+        results = run(args.matches, args.teams, args.repeat)
+
+    print(f"{args.matches} archived matches")
+    for label, (median, worst) in results.items():
+        print(f"{label:>16}: {median:8.2f} ms median  {worst:8.2f} ms max")
+
+
+if __name__ == '__main__':
+    main()
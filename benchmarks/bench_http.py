@@ -0,0 +1,254 @@
+"""
+HTTP endpoint latency and throughput at several dataset scales.
+
+Seeds a throw-away SQLite database with synthetic players, ads, OBS
+commands and formations (the whole squad in the formation lines, so the
+formation JSON grows with it) at each scale, then times the read endpoints
+and a full /export + /import round trip through the Flask test client.
+Results are written as JSON, and --compare prints the change against an
+earlier run and exits non-zero on a p50 regression, so versions can be
+compared.
+
+    python benchmarks/bench_http.py [--scales small,medium,large] [--repeat 30]
+                                    [--output results.json] [--compare previous.json]
+
+Scales (players / ads / OBS commands):
+    small   50 / 10 / 10
+    medium  5,000 / 1,000 / 200
+    large   100,000 / 10,000 / 2,000
+
+It runs in a temporary directory, so the import's media cleanup never
+touches static/media_assets and obs_football.db is left alone.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCALES = {
+    'small': {'players': 50, 'ads': 10, 'obs_commands': 10},
+    'medium': {'players': 5000, 'ads': 1000, 'obs_commands': 200},
+    'large': {'players': 100000, 'ads': 10000, 'obs_commands': 2000},
+}
+
+READ_ENDPOINTS = ('/teams', '/players', '/formations', '/ads', '/obs-commands')
+
+AD_TYPES = ('Goal', 'Yellow Card', 'Red Card', 'Substitution', 'Generic')
+
+# --compare flags a p50 that grew by more than this share and this many ms
+REGRESSION_THRESHOLD = 0.10
+REGRESSION_MIN_MS = 0.5
+
+
+def seed(scale):
+    """Replace the database contents with the synthetic dataset of scale. Needs an app context."""
+    from services.database import db, Team, Player, Formation, Advertisement, OBSCommand, MatchCue
+
+    rng = random.Random(1)
+    size = SCALES[scale]
+
+    for model in (MatchCue, OBSCommand, Advertisement, Player, Formation):
+        model.query.delete()
+    db.session.commit()
+
+    players = []
+    for index in range(size['players']):
+        team_id = 1 + index % 2
+        number = 1 + index // 2
+        players.append({'team_id': team_id, 'number': number, 'name': f"Player {team_id}-{number}"})
+    db.session.bulk_insert_mappings(Player, players)
+
+    squad = size['players'] // 2
+    for team in Team.query.all():
+        numbers = list(range(2, squad + 1))
+        quarter = max(1, len(numbers) // 4)
+        lines = [numbers[i * quarter:(i + 1) * quarter] for i in range(4)]
+        db.session.add(Formation(team_id= team.id, goalkeeper= 1, lines= lines))
+
+    db.session.bulk_insert_mappings(Advertisement, [
+        {
+            'name': f"Ad {index}",
+            'sponsor': f"Sponsor {index % 50}",
+            'type': rng.choice(AD_TYPES),
+            'duration': rng.randint(5, 30),
+            'image_path': None,
+        }
+        for index in range(size['ads'])
+    ])
+
+    db.session.bulk_insert_mappings(OBSCommand, [
+        {
+            'name': f"Command {index}",
+            'color': '#3b82f6',
+            'shortcut': f"ctrl+shift+{index % 10}",
+            'obs_requests': [{'requestType': 'SetCurrentProgramScene', 'requestData': {'sceneName': f"Scene {index % 12}"}}],
+            'targets': [],
+            'steps': [],
+        }
+        for index in range(size['obs_commands'])
+    ])
+    db.session.commit()
+    return size
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': at(0.50),
+        'p90': at(0.90),
+        'p99': at(0.99),
+        'max': ordered[-1],
+    }
+
+
+def measure(call, repeat):
+    """Latency percentiles (ms), throughput and response size of repeat calls."""
+    timings = []
+    size = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = call()
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text= True)[:200]
+        size = len(response.get_data())
+    elapsed = time.perf_counter() - started
+    return {**percentiles(timings), 'rps': repeat / elapsed, 'bytes': size}
+
+
+def run(scales, repeat, repeat_heavy):
+    from app import app
+
+    client = app.test_client()
+    results = {}
+
+    for scale in scales:
+        started = time.perf_counter()
+        with app.app_context():
+            size = seed(scale)
+        seed_s = time.perf_counter() - started
+
+        endpoints = {}
+        for url in READ_ENDPOINTS:
+            client.get(url)  # warm up
+            endpoints[url] = measure(lambda: client.get(url), repeat)
+
+        endpoints['/export'] = measure(lambda: client.get('/export'), repeat_heavy)
+        backup = client.get('/export').get_data()
+        endpoints['/import'] = measure(
+            lambda: client.post('/import', data= {'file': (io.BytesIO(backup), 'bench.zip')}, content_type= 'multipart/form-data'),
+            repeat_heavy
+        )
+
+        results[scale] = {'dataset': size, 'seed_s': seed_s, 'endpoints': endpoints}
+        print_scale(scale, results[scale])
+
+    return results
+
+
+def print_scale(scale, result):
+    size = result['dataset']
+    print(f"\n{scale}: {size['players']} players, {size['ads']} ads, {size['obs_commands']} OBS commands (seeded in {result['seed_s']:.2f} s)")
+    print(f"{'':>14} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>9} {'KB':>9}")
+    for url, stats in result['endpoints'].items():
+        print(f"{url:>14} {stats['p50']:>9.2f} {stats['p90']:>9.2f} {stats['p99']:>9.2f} {stats['max']:>9.2f} {stats['rps']:>9.1f} {stats['bytes'] / 1024:>9.1f}")
+
+
+def compare(previous, current):
+    """Print the p50 change of every endpoint measured in both runs. Returns the regressions."""
+    regressions = []
+    print(f"\nCompared with {previous.get('version')} ({previous.get('commit') or 'unknown commit'}, {previous.get('timestamp')}):")
+    for scale, result in current['scales'].items():
+        before = previous.get('scales', {}).get(scale)
+        if not before:
+            continue
+        for url, stats in result['endpoints'].items():
+            old = before['endpoints'].get(url)
+            if not old:
+                continue
+            change = (stats['p50'] - old['p50']) / old['p50'] if old['p50'] else 0.0
+            flag = ''
+            if change > REGRESSION_THRESHOLD and stats['p50'] - old['p50'] > REGRESSION_MIN_MS:
+                flag = '  REGRESSION'
+                regressions.append((scale, url, change))
+            print(f"  {scale:>6} {url:>14} {old['p50']:>9.2f} -> {stats['p50']:>9.2f} ms  {change:>+7.1%}{flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd= ROOT, capture_output= True, text= True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description= __doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default= 'small,medium,large', help= f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument('--repeat', type= int, default= 30, help= 'requests per read endpoint')
+    parser.add_argument('--repeat-heavy', type= int, default= 3, help= 'requests for /export and /import')
+    parser.add_argument('--output', help= 'results file (default: benchmarks/results/http-<commit>-<time>.json)')
+    parser.add_argument('--compare', help= 'earlier results file to compare against')
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        sys.exit(f"Unknown scale(s): {', '.join(unknown)}")
+
+    previous = json.loads(Path(args.compare).read_text(encoding= 'utf-8')) if args.compare else None
+    output = Path(args.output).resolve() if args.output else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        os.environ.setdefault('RECORD_TRAFFIC', '')
+        os.chdir(tmp)
+        sys.path.insert(0, str(ROOT))
+
+        scale_results = run(scales, args.repeat, args.repeat_heavy)
+
+    from config import APP_VERSION
+
+    commit = git_commit()
+    timestamp = datetime.now()
+    results = {
+        'version': APP_VERSION,
+        'commit': commit,
+        'timestamp': timestamp.isoformat(timespec= 'seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'repeat_heavy': args.repeat_heavy,
+        'scales': scale_results,
+    }
+
+    if output is None:
+        output = ROOT / 'benchmarks' / 'results' / f"http-{commit or 'unknown'}-{timestamp:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents= True, exist_ok= True)
+    output.write_text(json.dumps(results, indent= 2), encoding= 'utf-8')
+    print(f"\nResults written to {output}")
+
+    if previous and compare(previous, results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Setup-page edit throughput.
+
+Replays a burst of `modify-player` edits through the Socket.IO test client,
+once with synchronous per-edit commits (write-behind disabled) and once with
+group commits, and reports edits per second for each. Runs against a
+throw-away SQLite database.
+
+    python benchmarks/bench_setup_edits.py [--edits 1000] [--players 25]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(edits, players):
+    from app import app, socketio
+    from config import WRITE_BEHIND_INTERVAL
+    from services.write_behind import write_behind
+
+    client = socketio.test_client(app)
+    player_ids = []
+    for _ in range(players):
+        client.emit('create-player', {'team': 1})
+        created = [m for m in client.get_received() if m['name'] == 'player-created']
+        player_ids.append(created[-1]['args'][0]['player']['id'])
+
+    results = {}
+    for label, interval in (('per-edit commit', 0), ('group commit', WRITE_BEHIND_INTERVAL)):
+        write_behind.interval = interval
+
+        start = time.perf_counter()
+        for i in range(edits):
+            client.emit('modify-player', {'id': player_ids[i % players], 'name': f"Player {i}"})
+        write_behind.flush()
+        elapsed = time.perf_counter() - start
+
+        client.get_received()
+        results[label] = edits / elapsed
+
+    client.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description= __doc__.strip().splitlines()[0])
+    parser.add_argument('--edits', type= int, default= 1000)
+    parser.add_argument('--players', type= int, default= 25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        os.chdir(ROOT)
+        sys.path.insert(0, str(ROOT))
+
+        results = run(args.edits, args.players)
+
+    for label, rate in results.items():
+        print(f"{label:>16}: {rate:10.1f} edits/s")
+
+
+if __name__ == '__main__':
+    main()
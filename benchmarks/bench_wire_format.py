@@ -0,0 +1,82 @@
+"""
+Wire-format cost per broadcast.
+
+Encodes representative broadcast payloads the way python-socketio puts them
+on the wire - a JSON text packet, or a text placeholder plus one binary
+MessagePack attachment - and reports encoded bytes and encode time for each.
+Payloads that pack to less than WIRE_MSGPACK_MIN_SIZE bytes are sent as
+JSON to every client, so their MessagePack row is marked as unused.
+
+    python benchmarks/bench_wire_format.py [--iterations 20000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from socketio import packet
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services import wire
+
+
+def sample_payloads():
+    roster = [{'id': i, 'team_id': 1, 'number': i, 'name': f"Player Name {i}"} for i in range(1, 26)]
+    return {
+        'add-to-score': {'team1_score': 2, 'team2_score': 1, 'version': 57},
+        'update-timer': {
+            'timer_anchor': 81234.56789, 'timer_offset': 2712.3456, 'timer_running': True,
+            'extra_time': 3, 'server_time': 81240.1234, 'version': 58
+        },
+        'display-event': {'type': 'substitution', 'team': 'team1', 'player_id_out': 7, 'player_id_in': 18},
+        'display-event (formation)': {
+            'type': 'formation', 'team': 'team1', 'team_name': 'Brigantia FC', 'manager': 'Manager Name',
+            'formation': {'goalkeeper': 1, 'lines': [[2, 3, 4, 5], [6, 7, 8], [9, 10, 11], []]},
+            'roster': roster
+        },
+    }
+
+
+def encoded_size(encoded):
+    if isinstance(encoded, list):
+        return sum(len(part) for part in encoded)
+    return len(encoded)
+
+
+def measure(payload, iterations):
+    results = {}
+    encoders = {
+        'json': lambda: packet.Packet(packet.EVENT, data= ['event', payload]).encode(),
+        'msgpack': lambda: packet.Packet(packet.EVENT, data= ['event', wire.pack(payload)]).encode(),
+    }
+    for name, encode in encoders.items():
+        size = encoded_size(encode())
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encode()
+        elapsed = time.perf_counter() - start
+        results[name] = (size, elapsed / iterations * 1e6)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description= __doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type= int, default= 20000)
+    args = parser.parse_args()
+
+    if not wire.msgpack_available():
+        sys.exit("msgpack is not installed")
+
+    print(f"{'payload':<28}{'format':<10}{'bytes':>8}{'encode us':>12}")
+    for label, payload in sample_payloads().items():
+        packed = wire.packed(payload) is not None
+        for name, (size, micros) in measure(payload, args.iterations).items():
+            note = '  (not used)' if name == 'msgpack' and not packed else ''
+            print(f"{label:<28}{name:<10}{size:>8}{micros:>12.2f}{note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Replay a recorded match against a fresh server.
+
+Takes a recording made with RECORD_TRAFFIC (see services/recorder.py),
+restores the database snapshot it starts with into a throw-away SQLite
+database, then replays every Socket.IO event and HTTP request through the
+test clients at the recorded pace (1x), faster (e.g. 10x) or as fast as
+possible (max). Reports handler latency percentiles next to the ones
+measured on the live server, and checks that the replay ends in the
+recorded final state (score, timer, statistics and database).
+
+    python benchmarks/replay_match.py match.jsonl.gz [--speed 1|10|max] [--top 15]
+
+Traffic that depends on the live environment cannot be reproduced: file
+uploads are skipped, and shortcut-client acknowledgements refer to
+executions that do not exist on the replay server. The match clock is only
+compared at 1x, since replaying faster shortens every timer interval.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds the replayed match clock may differ from the recording at 1x
+CLOCK_TOLERANCE = 1.0
+
+
+def load_recording(path):
+    """Header, time-ordered entries and final state (None if the recording was cut short)."""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    records = []
+    try:
+        with opener(path, 'rt', encoding= 'utf-8') as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    except (EOFError, json.JSONDecodeError):
+        pass  # server killed mid-write: keep what was complete
+
+    header = records[0] if records and 'start' in records[0] else {}
+    end = next((r['end'] for r in records if 'end' in r), None)
+    entries = sorted((r for r in records if 't' in r and 'end' not in r), key= lambda r: r['t'])
+    return header, entries, end
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {'count': len(ordered), 'p50': at(0.50), 'p90': at(0.90), 'p99': at(0.99), 'max': ordered[-1]}
+
+
+def compare(expected, actual, speed):
+    """List the parts of the final state that differ."""
+    mismatches = []
+    for key in ('score', 'stats'):
+        if expected[key] != actual[key]:
+            mismatches.append(f"{key}: expected {expected[key]}, got {actual[key]}")
+
+    for key in ('timer_running', 'extra_time'):
+        if expected['timer'][key] != actual['timer'][key]:
+            mismatches.append(f"timer.{key}: expected {expected['timer'][key]}, got {actual['timer'][key]}")
+    if speed == 1 and abs(expected['timer']['elapsed'] - actual['timer']['elapsed']) > CLOCK_TOLERANCE:
+        mismatches.append(f"timer.elapsed: expected {expected['timer']['elapsed']}, got {actual['timer']['elapsed']}")
+
+    for table, rows in expected['database'].items():
+        if actual['database'].get(table) != rows:
+            mismatches.append(f"database.{table} differs")
+    return mismatches
+
+
+def restore_snapshot(http, header):
+    backup = io.BytesIO()
+    with zipfile.ZipFile(backup, 'w') as zip_file:
+        zip_file.writestr('backup.json', json.dumps({**header['snapshot'], 'version': header.get('version')}))
+    backup.seek(0)
+
+    response = http.post('/import', data= {'file': (backup, 'replay.zip')}, content_type= 'multipart/form-data')
+    if response.status_code != 200:
+        raise RuntimeError(f"Could not restore the recorded snapshot: {response.get_json()}")
+
+
+def replay(header, entries, speed):
+    from app import app, socketio, match_state
+    from config import BROADCAST_COALESCE_WINDOW
+    from services.recorder import state_digest
+    from services.write_behind import write_behind
+
+    http = app.test_client()
+    if header.get('snapshot'):
+        restore_snapshot(http, header)
+
+    clients = {}
+
+    def client(number):
+        if number not in clients:
+            clients[number] = socketio.test_client(app)
+        return clients[number]
+
+    latency = {}
+    lag = []
+    skipped = 0
+    started = time.perf_counter()
+
+    for index, entry in enumerate(entries):
+        if speed:
+            delay = entry['t'] / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lag.append(-delay * 1000)
+
+        event = entry.get('e')
+        if event == 'connect':
+            client(entry['c'])
+            continue
+        if event == 'disconnect':
+            if entry['c'] in clients:
+                clients.pop(entry['c']).disconnect()
+            continue
+        if entry.get('upload'):
+            skipped += 1
+            continue
+
+        call_started = time.perf_counter()
+        if event:
+            label = event
+            client(entry['c']).emit(event, *entry.get('a', []))
+        else:
+            label = f"{entry['m']} {entry['p'].split('?')[0]}"
+            http.open(entry['p'], method= entry['m'], json= entry.get('b'))
+        latency.setdefault(label, []).append((time.perf_counter() - call_started) * 1000)
+
+        if index % 200 == 0:
+            for test_client in clients.values():
+                test_client.get_received()
+
+    write_behind.flush()
+    time.sleep(BROADCAST_COALESCE_WINDOW * 2)
+    with app.app_context():
+        final = state_digest(match_state)
+
+    for test_client in clients.values():
+        test_client.disconnect()
+
+    return {
+        'duration': time.perf_counter() - started,
+        'latency': latency,
+        'lag': lag,
+        'skipped': skipped,
+        'final': final,
+    }
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"{'':>34} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for label, stats in rows:
+        if stats:
+            print(f"{label[:34]:>34} {stats['count']:>7} {stats['p50']:>8.2f} {stats['p90']:>8.2f} {stats['p99']:>8.2f} {stats['max']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description= __doc__.strip().splitlines()[0])
+    parser.add_argument('recording')
+    parser.add_argument('--speed', default= '1', help= "1, 10, ... or 'max'")
+    parser.add_argument('--top', type= int, default= 15, help= 'events shown in the latency table')
+    args = parser.parse_args()
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    recording = Path(args.recording).resolve()
+    header, entries, end = load_recording(recording)
+    if not entries:
+        sys.exit(f"No traffic in {recording}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = f"sqlite:///{Path(tmp) / 'replay.db'}"
+        os.environ['RECORD_TRAFFIC'] = ''
+        # Recorded traffic only holds calls the live limiter let through
+        os.environ['RATE_LIMIT'] = '0'
+        os.chdir(ROOT)
+        sys.path.insert(0, str(ROOT))
+
+        result = replay(header, entries, speed)
+
+    recorded = {}
+    for entry in entries:
+        if 'ms' in entry:
+            label = entry['e'] if 'e' in entry else f"{entry['m']} {entry['p'].split('?')[0]}"
+            recorded.setdefault(label, []).append(entry['ms'])
+
+    pace = 'max speed' if speed is None else f"{args.speed}x"
+    print(f"Replayed {len(entries)} records ({entries[-1]['t']:.1f} s recorded) in {result['duration']:.2f} s at {pace}"
+          + (f", {result['skipped']} uploads skipped" if result['skipped'] else ''))
+
+    busiest = sorted(result['latency'], key= lambda label: -len(result['latency'][label]))[:args.top]
+    all_replayed = [ms for samples in result['latency'].values() for ms in samples]
+    all_recorded = [ms for samples in recorded.values() for ms in samples]
+
+    print_table('Replay latency (ms)', [('all', percentiles(all_replayed))] + [(label, percentiles(result['latency'][label])) for label in busiest])
+    print_table('Recorded live latency (ms)', [('all', percentiles(all_recorded))] + [(label, percentiles(recorded.get(label, []))) for label in busiest])
+    if speed and result['lag']:
+        print_table('Replay behind schedule (ms)', [('lag', percentiles(result['lag']))])
+
+    if end is None:
+        print('\nNo final state in the recording (server stopped without shutdown); state not checked')
+        return
+
+    mismatches = compare(end, result['final'], speed)
+    if mismatches:
+        print('\nFinal state MISMATCH:')
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        sys.exit(1)
+    print('\nFinal state matches the recording')
+
+
+if __name__ == '__main__':
+    main()
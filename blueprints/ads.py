@@ -1,3 +1,4 @@
+import logging
 import uuid
 import os
 from flask import Blueprint, jsonify, send_from_directory, request
@@ -7,15 +8,24 @@ from flask_socketio import emit
 from config import ALLOWED_MEDIA_EXTENSIONS, MEDIA_UPLOAD_FOLDER
 from services.helper import allowed_file
 from services.database import db, Advertisement
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+
+
+logger = logging.getLogger(__name__)
 
 
 ads_bp = Blueprint('ads', __name__)
 
 
+AD_FIELDS = ('name', 'sponsor', 'type', 'duration', 'image_path')
+
+
 
 
 @ads_bp.route('/ads', methods= ['GET'])
 def get_ads():
+    write_behind.flush()
     ads = Advertisement.query.all()
     return jsonify({'ads': [a.to_dict() for a in ads]})
 
@@ -29,6 +39,9 @@ def serve_advertisement(filename):
 @ads_bp.route('/ads/upload-image', methods= ['POST'])
 def upload_ad_image():
     try:
+        # A pending image_path edit must not overwrite the uploaded file's path
+        write_behind.flush()
+
         if 'id' not in request.form:
             return jsonify({'success': False, 'error': 'Missing ad ID'}), 400
         if 'image' not in request.files:
@@ -63,7 +76,7 @@ def upload_ad_image():
             try: 
                 os.remove(old_image_path)
             except Exception as e:
-                print(f"Error deleting old image: {str(e)}")
+                logger.warning(f"Error deleting old image: {e}")
 
         relative_path = filepath.replace('\\', '/')
 
@@ -75,7 +88,7 @@ def upload_ad_image():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error uploading image: {e}")
+        logger.error(f"Error uploading image: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -96,11 +109,11 @@ def register_ads_socketio(socketio):
                 'success': True, 
                 'ad': new_ad.to_dict()
             }, room=request.sid)
-            emit('update-ads', broadcast=True)
+            broadcaster.broadcast('update-ads')
 
         except Exception as e:
             db.session.rollback()
-            print(f"Error creating ad: {e}")  # Add logging
+            logger.error(f"Error creating ad: {e}")
             emit('ad-created', {
                 'success': False, 
                 'error': str(e)
@@ -111,32 +124,18 @@ def register_ads_socketio(socketio):
     def handle_ad_modification(data):
         try:
 
-            ad = Advertisement.query.get(data.get('id'))
+            object_id = int(data['id']) if data.get('id') is not None else None
 
-            if not ad:
+            if object_id is None or db.session.get(Advertisement, object_id) is None:
                 emit('ad-modified', {'success': False, 'error': 'Ad not found'}, room= request.sid)
                 return
 
-            if 'name' in data:
-                ad.name = data.get('name')
-            if 'sponsor' in data:
-                ad.sponsor = data.get('sponsor')
-            if 'type' in data:
-                ad.type = data.get('type')
-            if 'duration' in data:
-                ad.duration = data.get('duration')
-            if 'image_path' in data:
-                ad.image_path = data.get('image_path')
-
-
-            db.session.commit()
-            db.session.refresh(ad)
+            fields = {field: data.get(field) for field in AD_FIELDS if field in data}
+            write_behind.submit(Advertisement, object_id, fields, topic= 'update-ads')
 
             emit('ad-modified', {'success': True}, room= request.sid)
-            emit('update-ads', broadcast= True)
 
         except Exception as e:
-            db.session.rollback()
             emit('ad-modified', {'success': False, 'error': str(e)}, room= request.sid)
 
 
@@ -146,18 +145,20 @@ def register_ads_socketio(socketio):
             ad = Advertisement.query.get(data.get('id'))
 
             if ad:
+                write_behind.discard(Advertisement, ad.id)
+
                 # Delete associated image file from disk
                 if ad.image_path and os.path.exists(ad.image_path):
                     try:
                         os.remove(ad.image_path)
                     except Exception as e:
-                        print(f"Error deleting image file: {e}")
+                        logger.warning(f"Error deleting image file: {e}")
 
                 db.session.delete(ad)
                 db.session.commit()
 
                 emit('ad-deleted', {'success': True}, room=request.sid)
-                emit('update-ads', broadcast=True)
+                broadcaster.broadcast('update-ads')
             else:
                 emit('ad-deleted', {
                     'success': False,
@@ -175,8 +176,8 @@ def register_ads_socketio(socketio):
     @socketio.on('trigger-ad')
     def trigger_ad(data):
         try:
-            emit('display-ad', {'id': data.get('id')}, broadcast= True)
+            broadcaster.broadcast('display-ad', {'id': data.get('id')})
 
         except Exception as e:
-            print(f"Error triggering event: {e}")
+            logger.error(f"Error triggering ad: {e}")
             emit('ad-display-error', {'error': str(e)}, room=request.sid)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from flask import Blueprint, jsonify, request
+
+from services.database import db
+from services.broadcast import broadcaster
+from services.match_stats import match_stats
+from services.season_archive import archive_match, list_matches, match_detail, leaders, head_to_head, player_career
+
+
+archive_bp = Blueprint('archive', __name__)
+
+# Will be set by app.py
+match_state = None
+
+def set_archive_match_state(state):
+    """Set the shared MatchState engine"""
+    global match_state
+    match_state = state
+
+
+
+
+@archive_bp.route('/archive/matches', methods= ['GET'])
+def get_archived_matches():
+    return jsonify({'matches': list_matches(
+        limit= request.args.get('limit', 50, type= int),
+        offset= request.args.get('offset', 0, type= int),
+        team_name= request.args.get('team')
+    )})
+
+
+@archive_bp.route('/archive/matches/<int:match_id>', methods= ['GET'])
+def get_archived_match(match_id):
+    match = match_detail(match_id)
+    if match is None:
+        return jsonify({'error': 'Match not found'}), 404
+    return jsonify(match)
+
+
+@archive_bp.route('/archive/leaders', methods= ['GET'])
+def get_leaders():
+    """Top scorers by default; ?kind=yellow_card|red_card|sub_in|sub_out for other tables."""
+    try:
+        return jsonify({'leaders': leaders(
+            kind= request.args.get('kind', 'goal'),
+            limit= request.args.get('limit', 10, type= int),
+            team_name= request.args.get('team')
+        )})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@archive_bp.route('/archive/head-to-head', methods= ['GET'])
+def get_head_to_head():
+    team_a = request.args.get('team_a')
+    team_b = request.args.get('team_b')
+    if not team_a or not team_b or team_a == team_b:
+        return jsonify({'error': 'team_a and team_b must be two different team names'}), 400
+    return jsonify(head_to_head(team_a, team_b, limit= request.args.get('limit', 10, type= int)))
+
+
+@archive_bp.route('/archive/players/<path:player_name>', methods= ['GET'])
+def get_player_career(player_name):
+    return jsonify(player_career(player_name, team_name= request.args.get('team')))
+
+
+
+
+def register_archive_socketio(socketio):
+
+    @socketio.on('archive-match')
+    def handle_archive_match(data= None):
+        """Archive the current match: { reset_stats? } clears the match statistics afterwards."""
+        try:
+            match = archive_match(match_state)
+
+            if (data or {}).get('reset_stats'):
+                match_stats.reset()
+                broadcaster.broadcast('update-stats')
+
+            broadcaster.broadcast('update-archive')
+            return {'success': True, 'match': match.to_dict()}
+
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'error': str(e)}
@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request, send_file
-from services.database import db, Team, Player, Formation, Advertisement, OBSCommand
+from services.database import db, Team, Player, Formation, Advertisement, OBSCommand, MatchCue
+from services.write_behind import write_behind
+from blueprints.cues import reload_cues
+from services.roster_cache import roster_cache
 from datetime import datetime
 import json
 import io
@@ -11,6 +14,7 @@ backup_bp = Blueprint('backup', __name__)
 
 def serialize_database():
     """Export all persistent data to JSON-serializable format"""
+    write_behind.flush()
     return {
         'version': '0.8.4',
         'exported_at': datetime.now().isoformat(),
@@ -23,7 +27,8 @@ def serialize_database():
             } for formation in Formation.query.all()
         ],
         'advertisements': [ad.to_dict() for ad in Advertisement.query.all()],
-        'obs_commands': [cmd.to_dict() for cmd in OBSCommand.query.all()]
+        'obs_commands': [cmd.to_dict() for cmd in OBSCommand.query.all()],
+        'match_cues': [cue.to_dict() for cue in MatchCue.query.all()]
     }
 
 @backup_bp.route('/export', methods=['GET'])
@@ -92,6 +97,8 @@ def import_database():
             
             # Import data with images
             _import_data(data, zip_file)
+            reload_cues()
+            roster_cache.invalidate()
         
         return jsonify({
             'success': True, 
@@ -108,6 +115,7 @@ def import_database():
 
 def _import_data(data, zip_file):
     """Import database and restore images from ZIP"""
+    write_behind.flush()
     
     # Create media directory if it doesn't exist
     media_dir = Path('static/media_assets')
@@ -119,6 +127,7 @@ def _import_data(data, zip_file):
     Formation.query.delete()
     Advertisement.query.delete()
     OBSCommand.query.delete()
+    MatchCue.query.delete()
     
     # Delete old images
     for img_file in media_dir.glob('ad_*'):
@@ -178,5 +187,10 @@ def _import_data(data, zip_file):
     for cmd_data in data.get('obs_commands', []):
         cmd = OBSCommand(**cmd_data)
         db.session.add(cmd)
+
+    # Import match cues
+    for cue_data in data.get('match_cues', []):
+        cue = MatchCue(**cue_data)
+        db.session.add(cue)
     
     db.session.commit()
\ No newline at end of file
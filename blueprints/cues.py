@@ -0,0 +1,167 @@
+import logging
+
+from flask import Blueprint, jsonify, request
+from flask_socketio import emit
+
+
+from config import CUE_ACTIONS
+from services.database import db, MatchCue, OBSCommand
+from services.broadcast import broadcaster
+from services.cue_scheduler import cue_scheduler
+from services.roster_cache import roster_cache
+from blueprints.obs_commands import run_obs_command, validate_targets
+
+
+logger = logging.getLogger(__name__)
+
+
+cues_bp = Blueprint('cues', __name__)
+
+CUE_FIELDS = ('name', 'match_time', 'add_extra_time', 'action', 'payload', 'enabled')
+
+
+def validate_cue(data):
+    """Check the cue fields present in data."""
+    if 'match_time' in data:
+        match_time = data['match_time']
+        if not isinstance(match_time, int) or isinstance(match_time, bool) or match_time < 0:
+            raise ValueError('match_time must be a non-negative number of seconds')
+
+    action = data.get('action')
+    if 'action' in data and action not in CUE_ACTIONS:
+        raise ValueError(f"Unknown cue action: {action}")
+
+    payload = data.get('payload')
+    if 'payload' in data and payload is not None and not isinstance(payload, dict):
+        raise ValueError('payload must be an object')
+
+    payload = payload or {}
+    if action == 'event' and not isinstance(payload.get('event'), dict):
+        raise ValueError('event cues need payload.event')
+    if action == 'ad' and not isinstance(payload.get('ad_id'), int):
+        raise ValueError('ad cues need payload.ad_id')
+    if action == 'obs-command':
+        if not isinstance(payload.get('command_id'), int):
+            raise ValueError('obs-command cues need payload.command_id')
+        validate_targets(payload.get('targets'))
+
+
+def reload_cues():
+    """Hand the current cues to the scheduler."""
+    cue_scheduler.load_cues([cue.to_dict() for cue in MatchCue.query.all()])
+
+
+def fire_cue(cue):
+    """Run a cue's action. Called by the scheduler inside an app context."""
+    payload = cue.get('payload') or {}
+    action = cue['action']
+
+    if action == 'event':
+        broadcaster.broadcast('display-event', roster_cache.enrich(payload['event']))
+    elif action == 'ad':
+        broadcaster.broadcast('display-ad', {'id': payload['ad_id']})
+    elif action == 'obs-command':
+        command = db.session.get(OBSCommand, payload['command_id'])
+        if command is None:
+            logger.warning(f"Cue {cue['id']}: OBS command {payload['command_id']} not found")
+        else:
+            run_obs_command(command, targets= payload.get('targets'))
+
+    broadcaster.broadcast('cue-fired', {
+        'id': cue['id'],
+        'name': cue.get('name'),
+        'action': action,
+        'message': payload.get('message'),
+        'match_time': cue_scheduler.match_time(),
+    })
+
+
+def init_cues(app, socketio, match_state):
+    """Load the cues and start the scheduler on match_state's clock."""
+
+    def on_fire(cue):
+        with app.app_context():
+            fire_cue(cue)
+
+    with app.app_context():
+        reload_cues()
+    cue_scheduler.init_app(socketio, match_state, on_fire)
+
+
+
+
+@cues_bp.route('/cues', methods= ['GET'])
+def get_cues():
+    cues = MatchCue.query.order_by(MatchCue.match_time).all()
+    return jsonify({
+        'cues': [cue.to_dict() for cue in cues],
+        'upcoming': cue_scheduler.upcoming(),
+        'match_time': cue_scheduler.match_time(),
+    })
+
+
+
+def register_cues_socketio(socketio):
+
+    @socketio.on('create-cue')
+    def handle_cue_creation(data):
+        try:
+            data = data or {}
+            fields = {field: data[field] for field in CUE_FIELDS if field in data}
+            validate_cue({'action': 'alert', **fields})
+
+            new_cue = MatchCue(**fields)
+            db.session.add(new_cue)
+            db.session.commit()
+            reload_cues()
+
+            emit('cue-created', {'success': True, 'cue': new_cue.to_dict()}, room= request.sid)
+            broadcaster.broadcast('update-cues')
+
+        except Exception as e:
+            db.session.rollback()
+            emit('cue-created', {'success': False, 'error': str(e)}, room= request.sid)
+
+
+    @socketio.on('modify-cue')
+    def handle_cue_modification(data):
+        try:
+            cue = db.session.get(MatchCue, int(data.get('id')))
+            if not cue:
+                emit('cue-modified', {'success': False, 'error': 'Cue not found'}, room= request.sid)
+                return
+
+            fields = {field: data[field] for field in CUE_FIELDS if field in data}
+            validate_cue({**cue.to_dict(), **fields})
+
+            for field, value in fields.items():
+                setattr(cue, field, value)
+            db.session.commit()
+            reload_cues()
+
+            emit('cue-modified', {'success': True}, room= request.sid)
+            broadcaster.broadcast('update-cues')
+
+        except Exception as e:
+            db.session.rollback()
+            emit('cue-modified', {'success': False, 'error': str(e)}, room= request.sid)
+
+
+    @socketio.on('delete-cue')
+    def handle_cue_deletion(data):
+        try:
+            cue = db.session.get(MatchCue, int(data.get('id')))
+            if not cue:
+                emit('cue-deleted', {'success': False, 'error': 'Cue not found'}, room= request.sid)
+                return
+
+            db.session.delete(cue)
+            db.session.commit()
+            reload_cues()
+
+            emit('cue-deleted', {'success': True}, room= request.sid)
+            broadcaster.broadcast('update-cues')
+
+        except Exception as e:
+            db.session.rollback()
+            emit('cue-deleted', {'success': False, 'error': str(e)}, room= request.sid)
@@ -1,18 +1,27 @@
+import logging
+
 from flask import Blueprint, jsonify, request
 from flask_socketio import emit
 
 from services.database import db, Advertisement
+from services.match_state import command_options
+from services.broadcast import broadcaster
+from services.match_stats import match_stats, parse_event
+from services.roster_cache import roster_cache
+
+
+logger = logging.getLogger(__name__)
 
 
 game_events_bp = Blueprint('game_state', __name__)
 
 # Will be set by app.py
-score_state = {}
+match_state = None
 
-def set_game_events_score_state(states):
-    """Set the shared score_state"""
-    global score_state
-    score_state = states
+def set_game_events_match_state(state):
+    """Set the shared MatchState engine"""
+    global match_state
+    match_state = state
 
 
 def _get_ad_type_for_event(data):
@@ -36,7 +45,7 @@ def _get_ad_type_for_event(data):
 
 @game_events_bp.route('/game_state', methods=['GET'])
 def get_game_state():
-    return jsonify(score_state)
+    return jsonify(match_state.score_snapshot())
 
 
 
@@ -45,37 +54,38 @@ def get_game_state():
 def register_game_events_socketio(socketio):
     """Register SocketIO events for game events."""
     
-    @socketio.on('trigger-goal')
-    def handle_goal_trigger(data):
-        
-        team = data.get('team')
+    def run_score_command(command, broadcast_event, data, delta):
 
-        if team == 'team1':
-            score_state['team1_score'] += 1
-        elif team == 'team2':
-            score_state['team2_score'] += 1
+        def on_commit(result):
+            broadcaster.broadcast(broadcast_event, match_state.score_snapshot())
+            match_stats.record_score(data.get('team'), delta, match_state.match_time())
+            broadcaster.broadcast('update-stats')
 
-        emit('add-to-score', score_state, broadcast= True)
+        result = match_state.execute(command, data, **command_options(data), on_commit= on_commit)
+        return result.to_dict()
 
 
-    @socketio.on('cancel-goal')
+    @socketio.on('trigger-goal')
     def handle_goal_trigger(data):
-        
-        team = data.get('team')
+        return run_score_command('goal', 'add-to-score', data, 1)
 
-        if team == 'team1':
-            score_state['team1_score'] -= 1
-        elif team == 'team2':
-            score_state['team2_score'] -= 1
 
-        emit('decrease-to-score', score_state, broadcast= True)
+    @socketio.on('cancel-goal')
+    def handle_goal_cancel(data):
+        return run_score_command('cancel-goal', 'decrease-to-score', data, -1)
         
 
     @socketio.on('trigger-event')
     def handle_event_trigger(data):
         try:
-            # Broadcast the event to overlays as before
-            emit('display-event', data, broadcast=True)
+            # Reject bad player ids before the overlays show anything
+            parse_event(data or {})
+
+            # Overlays get names, numbers and colours with the event, no lookups needed
+            broadcaster.broadcast('display-event', roster_cache.enrich(data))
+
+            if match_stats.record_event(data, match_state.match_time()):
+                broadcaster.broadcast('update-stats')
 
             # Check if there's an ad that should auto-trigger
             #ad_type = _get_ad_type_for_event(data)
@@ -87,5 +97,5 @@ def register_game_events_socketio(socketio):
             #        emit('display-ad', {'id': ad.id}, broadcast=True)
 
         except Exception as e:
-            print(f"Error triggering event: {e}")
+            logger.error(f"Error triggering event: {e}")
             emit('event-error', {'error': str(e)}, room=request.sid)
\ No newline at end of file
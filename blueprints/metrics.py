@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify
+
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+from services.cue_scheduler import cue_scheduler
+from services.backpressure import backpressure
+from services.rate_limit import rate_limiter
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+
+
+@metrics_bp.route('/metrics', methods= ['GET'])
+def get_metrics():
+    """Runtime counters of the server's broadcast path."""
+    return jsonify({
+        'broadcast': broadcaster.stats(),
+        'write_behind': write_behind.stats(),
+        'cues': cue_scheduler.stats(),
+        'backpressure': backpressure.stats(),
+        'rate_limit': rate_limiter.stats()
+    })
@@ -3,22 +3,170 @@ from flask_socketio import emit
 
 
 from services.database import db, OBSCommand
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+from services.shortcut_clients import shortcut_clients
+from services.roster_cache import roster_cache
+from services.lifecycle import on_disconnect
 
 
 obs_commands_bp = Blueprint('obs_commands', __name__)
 
 
+def validate_obs_requests(obs_requests):
+    """Check that obs_requests is null or a list of {requestType, requestData?} objects."""
+    if obs_requests is None:
+        return
+    if not isinstance(obs_requests, list):
+        raise ValueError('obs_requests must be a list')
+    for obs_request in obs_requests:
+        if not isinstance(obs_request, dict) or not isinstance(obs_request.get('requestType'), str):
+            raise ValueError('Each OBS request needs a requestType')
+        if not isinstance(obs_request.get('requestData', {}), dict):
+            raise ValueError('requestData must be an object')
+
+
+def validate_targets(targets):
+    """Check that targets is null or a list of client IDs / "group:<name>" strings."""
+    if targets is None:
+        return
+    if not isinstance(targets, list) or not all(isinstance(t, str) and t for t in targets):
+        raise ValueError('targets must be a list of client IDs or group:<name> entries')
+
+
+# Macro steps run by shortcut clients / by overlays
+CLIENT_STEP_TYPES = ('shortcut', 'obs')
+OVERLAY_STEP_TYPES = ('event', 'ad')
+
+
+def validate_steps(steps):
+    """Check that steps is null or a list of macro steps."""
+    if steps is None:
+        return
+    if not isinstance(steps, list):
+        raise ValueError('steps must be a list')
+
+    for index, step in enumerate(steps, start= 1):
+        if not isinstance(step, dict):
+            raise ValueError(f"Step {index} must be an object")
+
+        step_type = step.get('type')
+        delay = step.get('delay_ms', 0)
+        if not isinstance(delay, (int, float)) or isinstance(delay, bool) or delay < 0:
+            raise ValueError(f"Step {index}: delay_ms must be a non-negative number")
+
+        if step_type == 'shortcut':
+            if not isinstance(step.get('shortcut'), str) or not step['shortcut']:
+                raise ValueError(f"Step {index}: shortcut step needs a shortcut")
+        elif step_type == 'obs':
+            if not step.get('obs_requests'):
+                raise ValueError(f"Step {index}: obs step needs obs_requests")
+            validate_obs_requests(step['obs_requests'])
+        elif step_type == 'event':
+            if not isinstance(step.get('event'), dict) or not step['event'].get('type'):
+                raise ValueError(f"Step {index}: event step needs an event with a type")
+        elif step_type == 'ad':
+            if not isinstance(step.get('ad_id'), int):
+                raise ValueError(f"Step {index}: ad step needs an ad_id")
+        else:
+            raise ValueError(f"Step {index}: unknown step type '{step_type}'")
+
+
+def build_macro(steps):
+    """Turn relative delays into offsets from the macro start and split steps by who runs them.
+
+    Returns (client_steps, overlay_steps, duration_ms).
+    """
+    client_steps = []
+    overlay_steps = []
+    at_ms = 0
+
+    for index, step in enumerate(steps):
+        at_ms += step.get('delay_ms', 0)
+        timed = {'index': index, 'at_ms': at_ms, 'type': step['type']}
+
+        if step['type'] == 'shortcut':
+            client_steps.append({**timed, 'shortcut': step['shortcut']})
+        elif step['type'] == 'obs':
+            client_steps.append({**timed, 'obs_requests': step['obs_requests']})
+        elif step['type'] == 'event':
+            overlay_steps.append({**timed, 'event': step['event']})
+        elif step['type'] == 'ad':
+            overlay_steps.append({**timed, 'ad_id': step['ad_id']})
+
+    return client_steps, overlay_steps, at_ms
+
+
+def run_obs_command(command, sender_sid= None, targets= None):
+    """Send an OBS command (or macro) to its shortcut clients and overlays.
+
+    Returns the obs-command-execution result when it is known right away, or
+    None when it will be emitted to sender_sid once the clients acknowledge.
+    """
+    if not command.shortcut and not command.obs_requests and not command.steps:
+        return {'success': False,
+            'command_id': command.id,
+            'error': 'No shortcut, OBS requests or steps configured'}
+
+    if targets is None:
+        targets = command.targets or []
+
+    payload = {'id': command.id,
+        'name': command.name,
+        'shortcut': command.shortcut,
+        'obs_requests': command.obs_requests}
+
+    duration = 0.0
+    if command.steps:
+        # Each side gets the whole macro in one message and runs it on its own clock
+        client_steps, overlay_steps, duration_ms = build_macro(command.steps)
+        duration = duration_ms / 1000
+
+        if overlay_steps:
+            for step in overlay_steps:
+                if step['type'] == 'event':
+                    step['event'] = roster_cache.enrich(step['event'])
+            broadcaster.broadcast('run-macro',
+                {'id': command.id,
+                'name': command.name,
+                'steps': overlay_steps})
+
+        if not client_steps:
+            return {'success': True, 'acknowledged': False, 'command_id': command.id}
+
+        payload = {'id': command.id, 'name': command.name, 'steps': client_steps}
+
+    # Clients that never registered still get the old broadcast
+    if not targets and not shortcut_clients.has_clients():
+        broadcaster.broadcast('execute-obs-command', payload)
+        return {'success': True, 'acknowledged': False, 'command_id': command.id}
+
+    execution_id = shortcut_clients.dispatch(payload, sender_sid, targets, duration)
+    if execution_id is None:
+        return {'success': False,
+            'command_id': command.id,
+            'error': 'No targeted shortcut client is connected'}
+    return None
 
 
 @obs_commands_bp.route('/obs-commands', methods= ['GET'])
 def get_obs_commands():
+    write_behind.flush()
     obs_commands = OBSCommand.query.all()
     return jsonify({'obs_commands': [o.to_dict() for o in obs_commands]})
 
 
+@obs_commands_bp.route('/shortcut-clients', methods= ['GET'])
+def get_shortcut_clients():
+    return jsonify({'shortcut_clients': shortcut_clients.clients()})
+
+
 
 def register_obs_commands_socketio(socketio):
 
+    shortcut_clients.init_app(socketio)
+    on_disconnect(shortcut_clients.unregister)
+
     @socketio.on('create-obs-command')
     def handle_obs_command_creation(data):
         try:
@@ -29,7 +177,7 @@ def register_obs_commands_socketio(socketio):
             db.session.commit()
 
             emit('obs-command-created', {'success': True, 'obs-command': new_command.to_dict()})
-            emit('update-obs-commands', broadcast= True)
+            broadcaster.broadcast('update-obs-commands')
 
         except Exception as e:
             db.session.rollback()
@@ -40,29 +188,25 @@ def register_obs_commands_socketio(socketio):
     def handle_obs_command_modification(data):
         try:
 
-            command = OBSCommand.query.get(data.get('id'))
+            object_id = int(data['id']) if data.get('id') is not None else None
 
-            if not command:
+            if object_id is None or db.session.get(OBSCommand, object_id) is None:
                 emit('obs-command-modified', {'success': False, 'error': 'OBS Command not found'}, room= request.sid)
                 return
 
+            if 'obs_requests' in data:
+                validate_obs_requests(data.get('obs_requests'))
+            if 'targets' in data:
+                validate_targets(data.get('targets'))
+            if 'steps' in data:
+                validate_steps(data.get('steps'))
 
-            if 'name' in data:
-                command.name = data.get('name')
-            if 'color' in data:
-                command.color = data.get('color')
-            if 'shortcut' in data:
-                command.shortcut = data.get('shortcut')
-
-
-            db.session.commit()
-            db.session.refresh(command)
+            fields = {field: data.get(field) for field in ('name', 'color', 'shortcut', 'obs_requests', 'targets', 'steps') if field in data}
+            write_behind.submit(OBSCommand, object_id, fields, topic= 'update-obs-commands')
 
             emit('obs-command-modified', {'success': True}, room= request.sid)
-            emit('update-obs-commands', broadcast= True)
 
         except Exception as e:
-            db.session.rollback()
             emit('obs-command-modified', {'success': False, 'error': str(e)}, room= request.sid)
 
 
@@ -73,11 +217,12 @@ def register_obs_commands_socketio(socketio):
             command = OBSCommand.query.get(data.get('id'))
 
             if command:
+                write_behind.discard(OBSCommand, command.id)
                 db.session.delete(command)
                 db.session.commit()
                 
                 emit('obs-command-deleted', {'success': True}, room= request.sid)
-                emit('update-obs-commands', broadcast= True)
+                broadcaster.broadcast('update-obs-commands')
 
             else:
                 emit('obs-command-deleted', {'success': False, 'error': 'OBS Command not found'}, room= request.sid)
@@ -89,6 +234,8 @@ def register_obs_commands_socketio(socketio):
     @socketio.on('trigger-obs-command')
     def trigger_obs_command(data):
         try:
+            write_behind.flush()
+
             command = OBSCommand.query.get(data.get('id'))
             if not command:
                 emit('obs-command-execution',
@@ -97,25 +244,31 @@ def register_obs_commands_socketio(socketio):
                     room=request.sid)
                 return
 
-            if not command.shortcut:
-                emit('obs-command-execution',
-                    {'success': False,
-                    'error': 'No shortcut configured'},
-                    room=request.sid)
-                return
+            targets = data.get('targets', command.targets) or []
+            validate_targets(targets)
 
-            # Broadcast command execution to all connected shortcut clients
-            emit('execute-obs-command',
-                {'id': command.id,
-                'name': command.name,
-                'shortcut': command.shortcut},
-                broadcast=True)
-
-            emit('obs-command-execution',
-                {'success': True},
-                room=request.sid)
+            # When the shortcut clients acknowledge, the result is emitted to the sender later
+            result = run_obs_command(command, request.sid, targets)
+            if result is not None:
+                emit('obs-command-execution', result, room=request.sid)
 
         except Exception as e:
             emit('obs-command-execution',
                 {'success': False, 'error': str(e)},
-                room=request.sid)
\ No newline at end of file
+                room=request.sid)
+
+
+    @socketio.on('register-shortcut-client')
+    def handle_shortcut_client_registration(data= None):
+        data = data or {}
+        client_id = str(data.get('client_id') or request.sid)
+        groups = [str(g) for g in data.get('groups') or []]
+        capabilities = [str(c) for c in data.get('capabilities') or []]
+
+        client = shortcut_clients.register(request.sid, client_id, groups, capabilities)
+        return {'success': True, 'client': client}
+
+
+    @socketio.on('obs-command-executed')
+    def handle_obs_command_executed(data):
+        shortcut_clients.acknowledge(request.sid, data or {})
@@ -1,16 +1,75 @@
-from flask import Blueprint, render_template, render_template_string, send_file, redirect, url_for
-import qrcode
-import base64
+from flask import Blueprint, render_template, send_file, redirect, url_for
+from functools import lru_cache
+import hashlib
 import io
 
 from config import APP_VERSION, PORT
 from services.helper import get_local_ip
+from services.bootstrap import state_bootstrap
+from services.match_state import elapsed_seconds
 
 
 
 pages_bp = Blueprint('pages', __name__)
 
 
+QR_CACHE_MAX_AGE = 300
+
+# Scoreboard defaults, as in obs.js
+TEAM_DEFAULTS = {
+    1: {'name': 'TEAM ONE', 'bg_color': '#3b82f6', 'text_color': '#ffffff'},
+    2: {'name': 'TEAM TWO', 'bg_color': '#ef4444', 'text_color': '#ffffff'},
+}
+
+
+
+def _control_url():
+    return f"http://{get_local_ip()}:{PORT}/control"
+
+
+@lru_cache(maxsize= 8)
+def _qr_code_png(url):
+    """Render the QR code for url as PNG bytes. Cached per URL."""
+    import qrcode  # with Pillow, only loaded once /control is first opened
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=2)
+    qr.add_data(url)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+
+    img_buffer = io.BytesIO()
+    qr_img.save(img_buffer, format='PNG')
+    return img_buffer.getvalue()
+
+
+@lru_cache(maxsize= 8)
+def _qr_code_etag(url):
+    return hashlib.sha1(_qr_code_png(url)).hexdigest()
+
+
+def _extra_minutes(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _scoreboard(state):
+    """Values the scoreboard bar is rendered with, so the overlay's first frame is correct."""
+    teams = {team['id']: team for team in state['teams']}
+    elapsed = int(elapsed_seconds(state['timer']))
+
+    return {
+        'teams': {
+            team_id: {key: teams.get(team_id, {}).get(key) or default for key, default in defaults.items()}
+            for team_id, defaults in TEAM_DEFAULTS.items()
+        },
+        'score': state['score'],
+        'timer': f"{elapsed // 60:02d}:{elapsed % 60:02d}",
+        'extra_time': _extra_minutes(state['timer'].get('extra_time')),
+    }
+
+
 
 
 @pages_bp.route('/')
@@ -20,34 +79,32 @@ def index():
 
 @pages_bp.route('/obs')
 def scoreboard():
-    return render_template('obs.html')
+    state = state_bootstrap.snapshot()
+    return render_template('obs.html', bootstrap= state, scoreboard= _scoreboard(state))
 
 
 @pages_bp.route('/control')
 def control():
-    local_ip = get_local_ip()
-    port = PORT
-    url = f"http://{local_ip}:{port}/control"
+    url = _control_url()
+
+    return render_template(
+        'control_interface.html',
+        app_version=APP_VERSION,
+        local_ip=get_local_ip(),
+        port=PORT,
+        qr_code_url=url_for('pages.control_qr', v=_qr_code_etag(url)[:12])
+    )
 
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr.add_data(url)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
 
-    img_buffer = io.BytesIO()
-    qr_img.save(img_buffer, format='PNG')
-    img_buffer.seek(0)
-    qr_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-
-    with open('templates/control_interface.html', 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    return render_template_string(
-        html_content, 
-        app_version=APP_VERSION, 
-        local_ip=local_ip, 
-        port=port,
-        qr_code=qr_base64
+@pages_bp.route('/control/qr.png')
+def control_qr():
+    url = _control_url()
+
+    return send_file(
+        io.BytesIO(_qr_code_png(url)),
+        mimetype='image/png',
+        max_age=QR_CACHE_MAX_AGE,
+        etag=_qr_code_etag(url)
     )
 
 
@@ -68,4 +125,4 @@ def setup_obs_commands():
 
 @pages_bp.route('/Logo.svg')
 def BrigantiaLogo():
-    return send_file('static/Logo.svg', mimetype='image/svg+xml')
\ No newline at end of file
+    return send_file('static/Logo.svg', mimetype='image/svg+xml')
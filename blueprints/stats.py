@@ -0,0 +1,88 @@
+from flask import Blueprint, jsonify
+
+from services.broadcast import broadcaster
+from services.match_stats import match_stats, TEAMS
+from services.roster_cache import roster_cache
+
+
+stats_bp = Blueprint('stats', __name__)
+
+# Will be set by app.py
+match_state = None
+
+def set_stats_match_state(state):
+    """Set the shared MatchState engine"""
+    global match_state
+    match_state = state
+
+
+
+
+@stats_bp.route('/stats', methods= ['GET'])
+def get_stats():
+    return jsonify(match_stats.snapshot())
+
+
+@stats_bp.route('/stats/log', methods= ['GET'])
+def get_stats_log():
+    return jsonify({'log': match_stats.log()})
+
+
+@stats_bp.route('/stats/recompute', methods= ['GET'])
+def recompute_stats():
+    """Rebuild the aggregates from the event log and report whether they match."""
+    return jsonify(match_stats.recompute())
+
+
+
+
+def register_stats_socketio(socketio):
+
+    @socketio.on('update-stat-counter')
+    def handle_stat_counter(data):
+        """Operator counters such as corners, shots or fouls: { team, counter, delta? }"""
+        try:
+            match_stats.record_counter(
+                data.get('team'),
+                data.get('counter'),
+                data.get('delta', 1),
+                match_state.match_time()
+            )
+            broadcaster.broadcast('update-stats')
+            return {'success': True, 'team': match_stats.team(data.get('team'))}
+
+        except (TypeError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+
+    @socketio.on('show-stats')
+    def handle_show_stats(data):
+        """Show a stats lower-third: { scope: 'player', player_id } or { scope: 'team', team }"""
+        scope = (data or {}).get('scope')
+
+        if scope == 'player':
+            try:
+                player_id = int(data.get('player_id'))
+            except (TypeError, ValueError):
+                return {'success': False, 'error': 'Invalid player_id'}
+
+            stats = match_stats.player(player_id)
+            if stats is None:
+                return {'success': False, 'error': 'No stats recorded for this player'}
+            event = {'type': 'stats', 'scope': 'player', 'team': stats['team'], 'player_id': stats['player_id'], 'stats': stats}
+
+        elif scope == 'team' and data.get('team') in TEAMS:
+            event = {'type': 'stats', 'scope': 'team', 'team': data['team'], 'stats': match_stats.team(data['team'])}
+
+        else:
+            return {'success': False, 'error': 'scope must be player or team'}
+
+        broadcaster.broadcast('display-event', roster_cache.enrich(event))
+        return {'success': True}
+
+
+    @socketio.on('reset-stats')
+    def handle_reset_stats(data= None):
+        match_stats.reset()
+        broadcaster.broadcast('update-stats')
+        return {'success': True}
@@ -1,13 +1,160 @@
 from flask import Blueprint, jsonify, request
 from flask_socketio import emit
+import csv
+import io
+import json
 
 
 from services.database import db, Team, Player, Formation
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+from services.roster_cache import roster_cache
 
 
 teams_bp = Blueprint('teams', __name__)
 
 
+TEAM_FIELDS = ('name', 'manager', 'bg_color', 'text_color')
+FORMATION_LINE_COUNT = 4
+
+
+
+
+def _parse_number(value):
+    if value is None or str(value).strip() == '':
+        return None
+    return int(value)
+
+
+def _parse_roster_csv(content):
+    """Parse a CSV roster with a `number,name` header and an optional `line` column.
+
+    `line` is `GK` for the goalkeeper or 1-4 for a formation line; when any row
+    has one, the formation is rebuilt from the CSV as well.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames:
+        raise ValueError('CSV roster is empty')
+
+    columns = {name.strip().lower(): name for name in reader.fieldnames}
+    if 'number' not in columns or 'name' not in columns:
+        raise ValueError('CSV roster needs "number" and "name" columns')
+
+    players = []
+    goalkeeper = None
+    lines = [[] for _ in range(FORMATION_LINE_COUNT)]
+    has_formation = False
+
+    for row in reader:
+        number = _parse_number(row.get(columns['number']))
+        name = (row.get(columns['name']) or '').strip()
+        if number is None and not name:
+            continue
+        players.append({'number': number, 'name': name})
+
+        line = (row.get(columns['line']) or '').strip().upper() if 'line' in columns else ''
+        if not line:
+            continue
+        has_formation = True
+        if line == 'GK':
+            goalkeeper = number
+        elif line.isdigit() and 1 <= int(line) <= FORMATION_LINE_COUNT:
+            lines[int(line) - 1].append(number)
+        else:
+            raise ValueError(f"Invalid line '{line}' for player {number}")
+
+    roster = {'players': players}
+    if has_formation:
+        roster['formation'] = {'goalkeeper': goalkeeper, 'lines': lines}
+    return roster
+
+
+def _parse_roster_file(file):
+    """Turn an uploaded .csv or .json roster into a bulk-update payload."""
+    content = file.read().decode('utf-8-sig')
+    filename = file.filename.lower()
+
+    if filename.endswith('.csv'):
+        return _parse_roster_csv(content)
+    if filename.endswith('.json'):
+        data = json.loads(content)
+        # A bare list is a list of players
+        return data if isinstance(data, dict) else {'players': data}
+
+    raise ValueError('Roster file must be .csv or .json')
+
+
+def apply_roster(team_id, data):
+    """Replace a team's details, players and formation in a single transaction.
+
+    Only the keys present in data are touched. Existing players are matched by
+    `id`, then by shirt number, so their ids (referenced by game events) are
+    kept; players missing from the list are deleted.
+    """
+    # Pending single-field edits must not land on top of the new roster
+    write_behind.flush()
+
+    team = Team.query.get(team_id)
+    if not team:
+        raise LookupError('Team not found')
+
+    for field in TEAM_FIELDS:
+        if field in data:
+            setattr(team, field, data.get(field))
+
+    if 'players' in data:
+        existing_by_id = {p.id: p for p in team.players}
+        existing_by_number = {p.number: p for p in team.players if p.number is not None}
+        seen_numbers = set()
+        kept = set()
+
+        for entry in data.get('players') or []:
+            number = _parse_number(entry.get('number'))
+            if number is not None:
+                if number in seen_numbers:
+                    raise ValueError(f"Duplicate player number {number}")
+                seen_numbers.add(number)
+
+            player = existing_by_id.get(entry.get('id')) or existing_by_number.get(number)
+            if player is None or player.id in kept:
+                player = Player(team_id= team.id)
+                db.session.add(player)
+            else:
+                kept.add(player.id)
+
+            player.number = number
+            if 'name' in entry:
+                player.name = entry.get('name')
+
+        for player in existing_by_id.values():
+            if player.id not in kept:
+                db.session.delete(player)
+
+    if 'formation' in data:
+        formation_data = data.get('formation') or {}
+        formation = team.formation
+        if not formation:
+            formation = Formation(team_id= team.id, goalkeeper= None, lines= [])
+            db.session.add(formation)
+
+        if 'goalkeeper' in formation_data:
+            formation.goalkeeper = _parse_number(formation_data.get('goalkeeper'))
+        if 'lines' in formation_data:
+            formation.lines = [
+                [_parse_number(n) for n in line if _parse_number(n) is not None]
+                for line in (formation_data.get('lines') or [])
+            ]
+        formation.bump_version()
+
+    db.session.commit()
+
+    return {
+        'team': team.to_dict(),
+        'players': [p.to_dict() for p in team.players],
+        'formation': team.formation.to_dict() if team.formation else None
+    }
+
+
 
 
 @teams_bp.route('/teams', methods=['GET'])
@@ -18,6 +165,7 @@ def get_teams_data():
 
 @teams_bp.route('/players', methods= ['GET'])
 def get_players_data():
+    write_behind.flush()
     players = Player.query.all()
     return jsonify({"players": [p.to_dict() for p in players]})
 
@@ -28,6 +176,40 @@ def get_formations_data():
     return jsonify({"formations": [f.to_dict() for f in formations]})
 
 
+@teams_bp.route('/formations/<int:team_id>/layout', methods= ['GET'])
+def get_formation_layout(team_id):
+    """Pitch layout the overlays draw for the team's formation (cached per formation version)."""
+    if team_id not in (1, 2):
+        return jsonify({'error': 'Team not found'}), 404
+    return jsonify(roster_cache.layout(team_id))
+
+
+@teams_bp.route('/teams/<int:team_id>/roster', methods= ['POST'])
+def bulk_update_roster(team_id):
+    """REST equivalent of `bulk-update-roster`. Accepts a JSON body or a .csv/.json file upload."""
+    try:
+        if 'file' in request.files:
+            data = _parse_roster_file(request.files['file'])
+        else:
+            data = request.get_json(silent= True)
+            if not isinstance(data, dict):
+                return jsonify({'success': False, 'error': 'Expected a JSON object or a roster file'}), 400
+
+        result = apply_roster(team_id, data)
+
+        broadcaster.broadcast('update-roster')
+        return jsonify({'success': True, **result})
+
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except (ValueError, TypeError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 
 
 def register_teams_socketio(socketio):
@@ -56,7 +238,7 @@ def register_teams_socketio(socketio):
             db.session.refresh(team)
 
             emit('team-modified', {'success': True}, room= request.sid)
-            emit('update-teams', broadcast= True)
+            broadcaster.broadcast('update-teams')
 
         except Exception as e:
             db.session.rollback()
@@ -75,7 +257,7 @@ def register_teams_socketio(socketio):
             db.session.commit()
 
             emit('player-created', {'success': True, 'player': new_player.to_dict()})
-            emit('update-players', broadcast= True)
+            broadcaster.broadcast('update-players')
 
         except Exception as e:
             db.session.rollback()
@@ -86,25 +268,18 @@ def register_teams_socketio(socketio):
     def handle_player_modification(data):
         try:
 
-            player = Player.query.get(data.get('id'))
+            object_id = int(data['id']) if data.get('id') is not None else None
 
-            if not player:
+            if object_id is None or db.session.get(Player, object_id) is None:
                 emit('player-modified', {'success': False, 'error': 'Player not found in database'}, room= request.sid)
                 return
 
-            if 'name' in data:
-                player.name = data.get('name')
-            if 'number' in data:
-                player.number = data.get('number')
-
-            db.session.commit()
-            db.session.refresh(player)
+            fields = {field: data.get(field) for field in ('name', 'number') if field in data}
+            write_behind.submit(Player, object_id, fields, topic= 'update-players')
 
             emit('player-modified', {'success': True}, room= request.sid)
-            emit('update-players', broadcast= True)
 
         except Exception as e:
-            db.session.rollback()
             emit('player-modified', {'success': False, 'error': str(e)}, room= request.sid)
 
 
@@ -115,11 +290,12 @@ def register_teams_socketio(socketio):
             player = Player.query.get(data.get('id'))
 
             if player:
+                write_behind.discard(Player, player.id)
                 db.session.delete(player)
                 db.session.commit()
                 
                 emit('player-deleted', {'success': True}, room= request.sid)
-                emit('update-players', broadcast= True)
+                broadcaster.broadcast('update-players')
 
             else:
                 emit('player-deleted', {'success': False, 'error': 'Player not found'}, room= request.sid)
@@ -129,6 +305,20 @@ def register_teams_socketio(socketio):
             emit('player-deleted', {'success': False, 'error': str(e)}, room= request.sid)
 
 
+    @socketio.on('bulk-update-roster')
+    def handle_bulk_roster_update(data):
+        try:
+
+            result = apply_roster(int(data.get('team')), data)
+
+            emit('roster-updated', {'success': True, **result}, room= request.sid)
+            broadcaster.broadcast('update-roster')
+
+        except Exception as e:
+            db.session.rollback()
+            emit('roster-updated', {'success': False, 'error': str(e)}, room= request.sid)
+
+
     @socketio.on('modify-formation')
     def handle_formation_modification(data):
         try:
@@ -143,12 +333,13 @@ def register_teams_socketio(socketio):
                 formation.goalkeeper = data.get('goalkeeper')
             if 'lines' in data:
                 formation.lines = data.get('lines')
+            formation.bump_version()
 
             db.session.commit()
             db.session.refresh(formation)
 
             emit('formation-modified', {'success': True}, room= request.sid)
-            emit('update-formations', broadcast= True)
+            broadcaster.broadcast('update-formations')
 
         except Exception as e:
             db.session.rollback()
@@ -1,17 +1,24 @@
 from flask import Blueprint, jsonify, request
-from flask_socketio import emit
 import time
 
+from services.match_state import command_options
+from services.broadcast import broadcaster
+
 
 timer_bp = Blueprint('timer', __name__)
 
 # Will be set by app.py
-timer_state = {}
+match_state = None
+
+def set_timer_match_state(state):
+    """Set the shared MatchState engine"""
+    global match_state
+    match_state = state
+
 
-def set_timer_timer_state(state):
-    """Set the shared timer_state"""
-    global timer_state
-    timer_state = state
+def timer_snapshot():
+    """Full timer state plus the server's monotonic clock reading."""
+    return match_state.timer_snapshot()
 
 
 
@@ -19,7 +26,7 @@ def set_timer_timer_state(state):
 
 @timer_bp.route('/timer', methods=['GET'])
 def get_game_state():
-    return jsonify({**timer_state, 'server_time': time.time()})
+    return jsonify(timer_snapshot())
 
 
 
@@ -28,59 +35,57 @@ def get_game_state():
 def register_timer_events_socketio(socketio):
     """Register SocketIO events for timer events."""
 
-    @socketio.on('start-timer')
-    def handle_start_timer():
-
-        now = time.time()
+    def run_timer_command(command, broadcast_event, data):
+        result = match_state.execute(
+            command,
+            data,
+            **command_options(data),
+            on_commit= lambda r: broadcaster.broadcast(broadcast_event, timer_snapshot())
+        )
+        return result.to_dict()
 
-        timer_state['timer_running'] = True
-        timer_state['timer_anchor'] = now
 
-        emit('update-timer-start', broadcast= True)
+    @socketio.on('start-timer')
+    def handle_start_timer(data= None):
+        return run_timer_command('start-timer', 'update-timer-start', data)
 
 
     @socketio.on('stop-timer')
-    def handle_stop_timer():
-        
-        now = time.time()
-
-        elapsed = (now - timer_state['timer_anchor']) + timer_state['timer_offset']
-
-        timer_state['timer_running'] = False
-        timer_state['timer_anchor'] = now
-        timer_state['timer_offset'] = int(elapsed)
-
-        emit('update-timer-stop', broadcast= True)
+    def handle_stop_timer(data= None):
+        return run_timer_command('stop-timer', 'update-timer-stop', data)
 
 
     @socketio.on('reset-timer')
-    def handle_reset_timer():
-        now = time.time()
-        
-        timer_state['timer_running'] = False
-        timer_state['timer_anchor'] = now
-        timer_state['timer_offset'] = 0
-        
-        emit('update-timer', broadcast=True)
+    def handle_reset_timer(data= None):
+        return run_timer_command('reset-timer', 'update-timer', data)
 
 
     @socketio.on('set-timer')
     def handle_set_timer(data):
-        now = time.time()
-        desired_seconds = int(data.get('set'))
-        
-        timer_state['timer_running'] = False
-        timer_state['timer_anchor'] = now
-        timer_state['timer_offset'] = desired_seconds
-        
-        emit('update-timer', broadcast=True)
+        return run_timer_command('set-timer', 'update-timer', data)
 
 
     @socketio.on('set-extra-time')
     def handle_set_extra_time(data):
+        result = match_state.execute(
+            'set-extra-time',
+            data,
+            **command_options(data),
+            on_commit= lambda r: broadcaster.broadcast('show-extra-time', {**timer_snapshot(), 'extra-time': data.get('extra-time')})
+        )
+        return result.to_dict()
+
+
+    @socketio.on('get-timer')
+    def handle_get_timer():
+        return timer_snapshot()
+
 
-        timer_state['extra_time'] = data.get('extra-time')
-        emit('show-extra-time', {'extra-time': data.get('extra-time')}, broadcast= True)
+    @socketio.on('clock-sync')
+    def handle_clock_sync(data):
+        """One NTP-style sample: echo the client send time with server receive/send times."""
+        received = time.monotonic()
+        return {'t0': data.get('t0'), 't1': received, 't2': time.monotonic()}
 
 
 
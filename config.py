@@ -10,12 +10,110 @@ APP_VERSION = "1.1.0"
 PORT = int(os.getenv('PORT', 5000))
 
 
+# Seconds before the cached LAN IP (used for the /control QR code) is re-resolved
+LOCAL_IP_CACHE_TTL = 30
+
+
 ALLOWED_MEDIA_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'webm'}
 MEDIA_UPLOAD_FOLDER = 'static/media_assets'
 MAX_MEDIA_SIZE = 16 * 1024 * 1024
 
 
-DATABASE_URI = 'sqlite:///obs_football.db'
+ASSETS_SOURCE_FOLDER = 'static/js'
+ASSETS_DIST_FOLDER = 'static/dist'
+
+
+# Setup-page invalidations are coalesced for this many seconds (0 disables)
+BROADCAST_COALESCE_WINDOW = 0.04
+COALESCED_EVENTS = (
+    'update-teams', 'update-players', 'update-formations', 'update-roster',
+    'update-ads', 'update-obs-commands', 'update-cues', 'update-stats',
+    'update-archive'
+)
+
+
+# Broadcasts kept for replay to overlays that reconnect (older gaps are refetched instead)
+BROADCAST_REPLAY_BUFFER = 512
+
+# Payloads that pack to fewer bytes stay JSON for MessagePack clients too (the attachment would make them larger)
+WIRE_MSGPACK_MIN_SIZE = 256
+
+
+# Per-client backpressure: a client with this many packets in its send queue, or that
+# misses this many probes in a row, only gets the latest message per topic until it catches up
+BACKPRESSURE_CHECK_INTERVAL = 0.5
+BACKPRESSURE_PROBE_INTERVAL = 2.0
+SLOW_CLIENT_QUEUE_DEPTH = 64
+SLOW_CLIENT_MISSED_ACKS = 3
+# A slow client is disconnected at this queue depth (it reconnects and refetches)
+SLOW_CLIENT_MAX_DEPTH = 1024
+# Events that replace each other for a slow client; any other event is its own topic
+CONFLATION_TOPICS = {
+    'add-to-score': 'score', 'decrease-to-score': 'score',
+    'update-timer-start': 'timer', 'update-timer-stop': 'timer', 'update-timer': 'timer',
+}
+
+
+# modify-player / modify-ad / modify-obs-command edits are group-committed
+# every WRITE_BEHIND_INTERVAL seconds or once this many rows are pending (0 disables)
+WRITE_BEHIND_INTERVAL = 0.25
+WRITE_BEHIND_MAX_BATCH = 100
+
+
+# Number of idempotency keys remembered by the match-state engine
+MATCH_STATE_DEDUPE_SIZE = 512
+
+
+# Seconds to wait for shortcut clients to acknowledge an OBS command
+SHORTCUT_ACK_TIMEOUT = 3.0
+
+
+# Match-clock cue actions: display-event, display-ad, an OBS command, or an operator alert
+CUE_ACTIONS = ('event', 'ad', 'obs-command', 'alert')
+
+
+# Record every inbound Socket.IO event and HTTP request to this file (".gz" compresses) for replay
+RECORD_TRAFFIC = os.getenv('RECORD_TRAFFIC')
+
+
+# Token bucket per client and command: (tokens per second, burst), None for unlimited
+RATE_LIMIT = os.getenv('RATE_LIMIT', '1') != '0'
+RATE_LIMIT_DEFAULT = (10, 30)
+RATE_LIMITS = {
+    'trigger-goal': (1, 5),
+    'cancel-goal': (1, 5),
+    'trigger-event': (2, 10),
+    'trigger-ad': (2, 10),
+    'trigger-obs-command': (2, 10),
+    'show-stats': (2, 10),
+    'bulk-update-roster': (0.5, 3),
+    'archive-match': (0.5, 3),
+    'reset-stats': (0.5, 3),
+    # Clock-sync bursts, handshakes and shortcut-client acknowledgements
+    'clock-sync': None,
+    'set-wire-format': None,
+    'register-shortcut-client': None,
+    'obs-command-executed': None,
+}
+# Last-write-wins edits: the latest rejected call is run once a token frees up instead of dropped
+RATE_LIMIT_DEFERRED = ('modify-team', 'modify-player', 'modify-formation', 'modify-ad', 'modify-obs-command')
+
+
+# Logging (services/log.py): JSON lines on stderr ("text" for plain lines), also to LOG_FILE if set
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_FILE = os.getenv('LOG_FILE')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# Level per category (top-level logger name); LOG_LEVELS="services=DEBUG" overrides
+LOG_LEVELS = {
+    'engineio': 'WARNING',
+    'socketio': 'WARNING',
+    'werkzeug': 'INFO',
+}
+# Fraction of per-packet Socket.IO / engine.io logs kept: 0 is off, 1 logs every packet
+LOG_PACKET_SAMPLE = float(os.getenv('LOG_PACKET_SAMPLE', 0))
+
+
+DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///obs_football.db')
 
 
 FLASK_CONFIG = {
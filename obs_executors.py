@@ -0,0 +1,682 @@
+"""
+OBS command executors for the shortcut client.
+
+An executor turns an `execute-obs-command` payload into an action in OBS:
+
+- OBSWebSocketExecutor talks obs-websocket v5 over one persistent,
+  authenticated connection. A command's `obs_requests` are sent as a
+  single RequestBatch, and a plain `shortcut` is triggered with
+  TriggerHotkeyByKeySequence. It does not need admin rights or window
+  focus, and it works on every platform.
+- KeypressExecutor synthesizes a global key press with the `keyboard`
+  module (Windows only, needs admin rights).
+
+ExecutorChain tries its executors in order, so the keypress backend is the
+fallback when OBS is unreachable. CommandQueue runs commands on its own
+thread so the Socket.IO receive thread only has to enqueue them, and
+MacroRunner feeds it the steps of a macro at their offsets.
+"""
+
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+if sys.platform == 'win32':
+    try:
+        import keyboard
+    except ImportError:
+        keyboard = None
+else:
+    keyboard = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorError(Exception):
+    """Raised when an executor could not run a command."""
+
+
+class CommandExecutor:
+    """Base class for executor backends."""
+
+    name = 'base'
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def available(self):
+        return False
+
+    def can_execute(self, command):
+        return False
+
+    def execute(self, command):
+        raise NotImplementedError
+
+
+# ===========================
+# Keypress backend
+# ===========================
+
+class KeypressExecutor(CommandExecutor):
+    """Simulates the command's shortcut as a global key press."""
+
+    name = 'keypress'
+
+    def available(self):
+        return keyboard is not None
+
+    def can_execute(self, command):
+        return bool(command.get('shortcut'))
+
+    def execute(self, command):
+        shortcut = command.get('shortcut')
+        if not self.available():
+            raise ExecutorError(f"Keyboard simulation not available. Would press: {shortcut}")
+
+        keyboard.press_and_release(shortcut.lower())
+        logger.info(f"Simulated key press: {shortcut}")
+
+
+# ===========================
+# obs-websocket v5 backend
+# ===========================
+
+# obs-websocket v5 opcodes
+OP_HELLO = 0
+OP_IDENTIFY = 1
+OP_IDENTIFIED = 2
+OP_REQUEST = 6
+OP_REQUEST_RESPONSE = 7
+OP_REQUEST_BATCH = 8
+OP_REQUEST_BATCH_RESPONSE = 9
+
+RPC_VERSION = 1
+BATCH_EXECUTION_SERIAL_REALTIME = 0
+
+SHORTCUT_MODIFIERS = {
+    'shift': 'shift',
+    'ctrl': 'control',
+    'control': 'control',
+    'alt': 'alt',
+    'cmd': 'command',
+    'command': 'command',
+}
+
+
+def auth_response(password, salt, challenge):
+    """obs-websocket v5 authentication string."""
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode('utf-8')).digest()).decode('utf-8')
+    return base64.b64encode(hashlib.sha256((secret + challenge).encode('utf-8')).digest()).decode('utf-8')
+
+
+def shortcut_to_request(shortcut):
+    """Translate a shortcut such as `F13` or `ctrl+shift+F5` into a TriggerHotkeyByKeySequence request."""
+    parts = [p.strip() for p in shortcut.split('+') if p.strip()]
+    if not parts:
+        raise ExecutorError('Empty shortcut')
+
+    modifiers = {name: False for name in ('shift', 'control', 'alt', 'command')}
+    for part in parts[:-1]:
+        modifier = SHORTCUT_MODIFIERS.get(part.lower())
+        if modifier is None:
+            raise ExecutorError(f"Unknown modifier '{part}' in shortcut '{shortcut}'")
+        modifiers[modifier] = True
+
+    return {
+        'requestType': 'TriggerHotkeyByKeySequence',
+        'requestData': {
+            'keyId': f"OBS_KEY_{parts[-1].upper()}",
+            'keyModifiers': modifiers,
+        }
+    }
+
+
+def command_requests(command):
+    """The obs-websocket requests that run a command."""
+    requests = command.get('obs_requests') or []
+    if requests:
+        return [
+            {'requestType': r['requestType'], 'requestData': r.get('requestData') or {}}
+            for r in requests
+        ]
+    if command.get('shortcut'):
+        return [shortcut_to_request(command['shortcut'])]
+    return []
+
+
+class OBSWebSocketExecutor(CommandExecutor):
+    """Runs commands through a persistent obs-websocket v5 connection."""
+
+    name = 'obs-websocket'
+
+    def __init__(self, url= 'ws://localhost:4455', password= '', timeout= 5.0, reconnect_delay= 2.0,
+            keepalive= 5.0, missed_pongs= 2):
+        self.url = url
+        self.password = password or ''
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.keepalive = keepalive
+        self.missed_pongs = missed_pongs
+
+        self._ws = None
+        self._identified = threading.Event()
+        self._send_lock = threading.Lock()
+        self._waiters = {}  # requestId -> [Event, response]
+        self._waiters_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._last_seen = 0.0
+
+    # ---- lifecycle ----
+
+    def start(self):
+        if websocket is None:
+            logger.warning("websocket-client not installed, obs-websocket backend disabled")
+            return
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target= self._connection_loop, daemon= True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._identified.clear()
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def available(self):
+        return self._identified.is_set()
+
+    def wait_until_ready(self, timeout= None):
+        return self._identified.wait(timeout)
+
+    def can_execute(self, command):
+        return bool(command.get('obs_requests') or command.get('shortcut'))
+
+    # ---- requests ----
+
+    def execute(self, command):
+        requests = command_requests(command)
+        if not requests:
+            raise ExecutorError('Command has no OBS requests or shortcut')
+
+        if len(requests) == 1:
+            response = self.request(requests[0]['requestType'], requests[0]['requestData'])
+            results = [response]
+        else:
+            results = self.request_batch(requests)
+
+        failed = [r for r in results if not r.get('requestStatus', {}).get('result')]
+        if failed:
+            status = failed[0].get('requestStatus', {})
+            raise ExecutorError(
+                f"{failed[0].get('requestType')} failed: "
+                f"{status.get('comment') or status.get('code')}"
+            )
+        return results
+
+    def request(self, request_type, request_data= None):
+        """Send one request and wait for its RequestResponse payload."""
+        request_id = uuid.uuid4().hex
+        message = {
+            'op': OP_REQUEST,
+            'd': {'requestType': request_type, 'requestId': request_id, 'requestData': request_data or {}}
+        }
+        return self._send_and_wait(request_id, message)
+
+    def request_batch(self, requests, halt_on_failure= True):
+        """Send several requests as one RequestBatch and return their results in order."""
+        request_id = uuid.uuid4().hex
+        message = {
+            'op': OP_REQUEST_BATCH,
+            'd': {
+                'requestId': request_id,
+                'haltOnFailure': halt_on_failure,
+                'executionType': BATCH_EXECUTION_SERIAL_REALTIME,
+                'requests': requests,
+            }
+        }
+        return self._send_and_wait(request_id, message).get('results', [])
+
+    def _send_and_wait(self, request_id, message):
+        if not self._identified.wait(self.timeout):
+            raise ExecutorError(f"Not connected to OBS at {self.url}")
+
+        waiter = [threading.Event(), None]
+        with self._waiters_lock:
+            self._waiters[request_id] = waiter
+
+        try:
+            with self._send_lock:
+                self._ws.send(json.dumps(message))
+            if not waiter[0].wait(self.timeout):
+                # A connection that swallows requests is as good as dead
+                self._drop_connection('request timed out')
+                raise ExecutorError('Timed out waiting for OBS')
+            if waiter[1] is None:
+                raise ExecutorError('Connection to OBS lost')
+            return waiter[1]
+        except (OSError, websocket.WebSocketException) as e:
+            raise ExecutorError(f"Error talking to OBS: {e}")
+        finally:
+            with self._waiters_lock:
+                self._waiters.pop(request_id, None)
+
+    # ---- connection ----
+
+    def _connection_loop(self):
+        while self._running:
+            try:
+                self._connect()
+                self._receive_loop()
+            except Exception as e:
+                if self._running:
+                    logger.warning(f"obs-websocket connection error: {e}")
+            finally:
+                self._identified.clear()
+                self._fail_waiters()
+                if self._ws:
+                    self._ws.shutdown()
+
+            if self._running:
+                time.sleep(self.reconnect_delay)
+
+    def _connect(self):
+        self._ws = websocket.create_connection(self.url, timeout= self.timeout, subprotocols= ['obswebsocket.json'])
+
+        hello = json.loads(self._ws.recv())
+        if hello.get('op') != OP_HELLO:
+            raise ExecutorError(f"Expected Hello, got op {hello.get('op')}")
+
+        identify = {'rpcVersion': RPC_VERSION, 'eventSubscriptions': 0}
+        auth = hello['d'].get('authentication')
+        if auth:
+            identify['authentication'] = auth_response(self.password, auth['salt'], auth['challenge'])
+
+        self._ws.send(json.dumps({'op': OP_IDENTIFY, 'd': identify}))
+
+        reply = self._ws.recv()
+        identified = json.loads(reply) if reply else {}
+        if identified.get('op') != OP_IDENTIFIED:
+            raise ExecutorError('OBS refused identification (wrong password?)')
+
+        # recv() wakes up every `keepalive` seconds of silence to ping OBS
+        self._ws.settimeout(self.keepalive)
+        self._last_seen = time.monotonic()
+        self._identified.set()
+        logger.info(f"Connected to obs-websocket at {self.url}")
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                opcode, frame = self._ws.recv_data_frame(control_frame= True)
+            except websocket.WebSocketTimeoutException:
+                self._ping()
+                continue
+
+            self._last_seen = time.monotonic()
+            if opcode == websocket.ABNF.OPCODE_CLOSE:
+                raise ExecutorError('OBS closed the connection')
+            if opcode != websocket.ABNF.OPCODE_TEXT:
+                continue
+
+            message = json.loads(frame.data)
+            if message.get('op') not in (OP_REQUEST_RESPONSE, OP_REQUEST_BATCH_RESPONSE):
+                continue
+
+            data = message.get('d', {})
+            with self._waiters_lock:
+                waiter = self._waiters.get(data.get('requestId'))
+            if waiter:
+                waiter[1] = data
+                waiter[0].set()
+
+    def _ping(self):
+        """Ping after a silent keepalive period; give up on the connection after missed_pongs of them.
+
+        A sleeping OBS machine or a dropped network leaves the socket looking
+        open, so without this the executor would stay 'available' and never
+        reconnect.
+        """
+        if time.monotonic() - self._last_seen > self.keepalive * (self.missed_pongs + 1):
+            raise ExecutorError(f"No answer from OBS for {self.keepalive * (self.missed_pongs + 1):.0f}s")
+        with self._send_lock:
+            self._ws.ping()
+
+    def _drop_connection(self, reason):
+        """Close the socket so the connection loop reconnects."""
+        if not self._identified.is_set():
+            return
+        logger.warning(f"Dropping obs-websocket connection: {reason}")
+        self._identified.clear()
+        self._ws.abort()  # wakes the receive loop, which then reconnects
+
+    def _fail_waiters(self):
+        with self._waiters_lock:
+            for waiter in self._waiters.values():
+                waiter[0].set()
+
+
+# ===========================
+# Chain
+# ===========================
+
+class ExecutorChain(CommandExecutor):
+    """Tries each executor in order and uses the first one that can run the command."""
+
+    name = 'chain'
+
+    def __init__(self, executors):
+        self.executors = list(executors)
+
+    def start(self):
+        for executor in self.executors:
+            executor.start()
+
+    def stop(self):
+        for executor in self.executors:
+            executor.stop()
+
+    def available(self):
+        return any(e.available() for e in self.executors)
+
+    def can_execute(self, command):
+        return any(e.can_execute(command) for e in self.executors)
+
+    def execute(self, command):
+        errors = []
+        for executor in self.executors:
+            if not (executor.available() and executor.can_execute(command)):
+                continue
+            try:
+                executor.execute(command)
+                return executor.name
+            except ExecutorError as e:
+                logger.warning(f"{executor.name} executor failed: {e}")
+                errors.append(f"{executor.name}: {e}")
+
+        raise ExecutorError('; '.join(errors) or 'No executor available for this command')
+
+
+def build_executor(config):
+    """Create the executor selected by the client configuration.
+
+    `executor` is `auto` (obs-websocket, falling back to keypress),
+    `obs-websocket` or `keypress`.
+    """
+    choice = config.get('executor', 'auto')
+    keypress = KeypressExecutor()
+    obs_ws = OBSWebSocketExecutor(
+        url= config.get('obs_websocket_url', 'ws://localhost:4455'),
+        password= config.get('obs_websocket_password', '')
+    )
+
+    if choice == 'keypress':
+        return ExecutorChain([keypress])
+    if choice == 'obs-websocket':
+        return ExecutorChain([obs_ws])
+    return ExecutorChain([obs_ws, keypress])
+
+
+# ===========================
+# Execution queue
+# ===========================
+
+class CommandQueue:
+    """Ordered, bounded queue drained by a single executor thread.
+
+    - A command that waited longer than `deadline` seconds is dropped as stale.
+    - Triggering a command that is already waiting does not queue it twice.
+    - When the queue is full the oldest waiting command is dropped.
+
+    `on_done(command, result)` is called on the executor thread after each
+    command with a result dict (status, backend, error, wait_ms, exec_ms).
+    """
+
+    def __init__(self, executor, max_size= 32, deadline= 2.0, on_done= None):
+        self.executor = executor
+        self.max_size = max_size
+        self.deadline = deadline
+        self.on_done = on_done
+
+        self._queue = deque()  # (command, enqueued_at)
+        self._pending_ids = set()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self._stats = {
+            'enqueued': 0, 'executed': 0, 'failed': 0,
+            'stale': 0, 'coalesced': 0, 'overflow': 0,
+        }
+        self._wait_ms_total = 0.0
+        self._exec_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._exec_ms_max = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target= self._worker, daemon= True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def submit(self, command):
+        """Queue a command. Returns False if it was coalesced into one already waiting."""
+        key = self._key(command)
+        dropped = None
+
+        with self._cond:
+            if key is not None and key in self._pending_ids:
+                self._stats['coalesced'] += 1
+                return False
+
+            if len(self._queue) >= self.max_size:
+                dropped, _ = self._queue.popleft()
+                self._pending_ids.discard(self._key(dropped))
+                self._stats['overflow'] += 1
+
+            self._queue.append((command, time.monotonic()))
+            if key is not None:
+                self._pending_ids.add(key)
+            self._stats['enqueued'] += 1
+            self._cond.notify()
+
+        if dropped is not None:
+            self._finish(dropped, {'status': 'dropped', 'error': 'Execution queue full'})
+        return True
+
+    def stats(self):
+        with self._cond:
+            executed = self._stats['executed'] + self._stats['failed']
+            return {
+                **self._stats,
+                'queued': len(self._queue),
+                'avg_wait_ms': round(self._wait_ms_total / executed, 2) if executed else 0.0,
+                'max_wait_ms': round(self._wait_ms_max, 2),
+                'avg_exec_ms': round(self._exec_ms_total / executed, 2) if executed else 0.0,
+                'max_exec_ms': round(self._exec_ms_max, 2),
+            }
+
+    @staticmethod
+    def _key(command):
+        return command.get('id')
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                command, enqueued_at = self._queue.popleft()
+                self._pending_ids.discard(self._key(command))
+
+            wait_ms = (time.monotonic() - enqueued_at) * 1000
+            if self.deadline and wait_ms > self.deadline * 1000:
+                with self._cond:
+                    self._stats['stale'] += 1
+                self._finish(command, {'status': 'stale', 'error': 'Command expired before it could run', 'wait_ms': wait_ms})
+                continue
+
+            started = time.monotonic()
+            try:
+                backend = self.executor.execute(command)
+                result = {'status': 'executed', 'backend': backend}
+            except Exception as e:
+                result = {'status': 'failed', 'error': str(e)}
+            exec_ms = (time.monotonic() - started) * 1000
+
+            with self._cond:
+                self._stats['executed' if result['status'] == 'executed' else 'failed'] += 1
+                self._wait_ms_total += wait_ms
+                self._exec_ms_total += exec_ms
+                self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+                self._exec_ms_max = max(self._exec_ms_max, exec_ms)
+
+            self._finish(command, {**result, 'wait_ms': wait_ms, 'exec_ms': exec_ms})
+
+    def _finish(self, command, result):
+        if self.on_done is None:
+            return
+        try:
+            self.on_done(command, result)
+        except Exception as e:
+            logger.error(f"Error in command callback: {e}")
+
+
+# ===========================
+# Macros
+# ===========================
+
+class MacroRunner:
+    """Runs macro steps at their `at_ms` offsets on the local monotonic clock.
+
+    The whole macro arrives in one message, so network jitter only shifts its
+    start. Each step is handed to the CommandQueue when it is due; the queue's
+    on_done must pass step results back through step_done(). Once every step
+    has finished, `on_done(macro, result)` is called with the combined result.
+    """
+
+    def __init__(self, command_queue, on_done= None):
+        self.command_queue = command_queue
+        self.on_done = on_done
+
+        self._heap = []  # (due, seq, step command)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target= self._worker, daemon= True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    @staticmethod
+    def is_step(command):
+        return '_macro' in command
+
+    def run(self, macro):
+        """Schedule every step of macro, relative to now."""
+        started = time.monotonic()
+        steps = macro.get('steps') or []
+        tracker = {'macro': macro, 'started': started, 'remaining': len(steps), 'results': []}
+        name = macro.get('name') or 'Unknown'
+
+        if not steps:
+            self._finish(tracker)
+            return
+
+        with self._cond:
+            for number, step in enumerate(steps, start= 1):
+                command = {
+                    'id': f"{macro.get('id')}:{step.get('index', number - 1)}",
+                    'name': f"{name} [{number}/{len(steps)}]",
+                    'shortcut': step.get('shortcut'),
+                    'obs_requests': step.get('obs_requests'),
+                    '_macro': tracker,
+                }
+                heapq.heappush(self._heap, (started + step.get('at_ms', 0) / 1000, next(self._seq), command))
+            self._cond.notify()
+
+    def step_done(self, command, result):
+        """Record a step's result; reports the macro once its last step is done."""
+        tracker = command['_macro']
+        with self._cond:
+            tracker['results'].append(result)
+            tracker['remaining'] -= 1
+            done = tracker['remaining'] == 0
+        if done:
+            self._finish(tracker)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                _, _, command = heapq.heappop(self._heap)
+
+            if not self.command_queue.submit(command):
+                self.step_done(command, {'status': 'coalesced'})
+
+    def _finish(self, tracker):
+        results = tracker['results']
+        # A coalesced step was merged into the same command already queued, which runs it
+        failed = [r for r in results if r['status'] not in ('executed', 'coalesced')]
+        backends = sorted({r['backend'] for r in results if r.get('backend')})
+
+        result = {
+            'status': failed[0]['status'] if failed else 'executed',
+            'backend': ', '.join(backends) or None,
+            'wait_ms': max((r.get('wait_ms', 0.0) for r in results), default= 0.0),
+            'exec_ms': (time.monotonic() - tracker['started']) * 1000,
+        }
+        if failed:
+            result['error'] = '; '.join(r.get('error') or r['status'] for r in failed)
+
+        if self.on_done is None:
+            return
+        try:
+            self.on_done(tracker['macro'], result)
+        except Exception as e:
+            logger.error(f"Error in macro callback: {e}")
@@ -1,7 +1,8 @@
 """
 OBS Football Shortcut Client
 A system tray application that receives OBS commands from the server
-and simulates keyboard key presses for OBS hotkey integration.
+and runs them in OBS, through obs-websocket v5 when OBS is reachable and
+by simulating keyboard key presses for OBS hotkeys otherwise.
 """
 
 # REQUEST ADMIN PRIVILEGE FOR KEY EMULATION
@@ -48,21 +49,22 @@ import requests
 import threading
 import sys
 import os
+import platform
 import time
 import json
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 
-# Platform-specific imports
-if sys.platform == 'win32':
-    import keyboard
-    import ctypes
-else:
-    print("Warning: Keyboard simulation requires Windows")
-    keyboard = None
-
+# Optional: MessagePack wire format for server broadcasts
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from config import PORT
+from obs_executors import build_executor, CommandQueue, MacroRunner
 
 
 # ===========================
@@ -76,29 +78,68 @@ SERVER_URL = f"http://localhost:{SERVER_PORT}"
 
 DEFAULT_CONFIG = {
     "server_url": SERVER_URL,
+    # Identity used by the server to route commands to this machine
+    "client_id": platform.node() or "shortcut-client",
+    "groups": [],
+    # "auto" (obs-websocket, falling back to keypress), "obs-websocket" or "keypress"
+    "executor": "auto",
+    "obs_websocket_url": "ws://localhost:4455",
+    "obs_websocket_password": "",
+    # Commands waiting longer than this (seconds) are dropped instead of run late
+    "command_deadline": 2.0,
+    "command_queue_size": 32,
 }
 
 # ===========================
 # Logging Setup
 # ===========================
 
+# Records are written to the file and stdout by a listener thread, so
+# logging never blocks the Socket.IO or executor threads on I/O
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler(LOG_FILE), logging.StreamHandler(sys.stdout)]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+log_listener.start()
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 
+def load_config():
+    """Load configuration from file or create default."""
+    config_path = Path(CONFIG_FILE)
+    if config_path.exists():
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+                logger.info(f"Configuration loaded from {CONFIG_FILE}")
+                return {**DEFAULT_CONFIG, **config}
+        except Exception as e:
+            logger.error(f"Error loading config: {e}")
+    return DEFAULT_CONFIG.copy()
+
+
 class ShortcutClient:
     """System tray application for OBS command execution."""
 
     def __init__(self):
-        self.config = self.load_config()
+        self.config = load_config()
         self.server_url = self.config.get("server_url", SERVER_URL)
+        self.executor = build_executor(self.config)
+        self.command_queue = CommandQueue(
+            self.executor,
+            max_size=self.config.get("command_queue_size", 32),
+            deadline=self.config.get("command_deadline", 2.0),
+            on_done=self.on_command_done
+        )
+        self.macro_runner = MacroRunner(self.command_queue, on_done=self.on_command_done)
 
         self.connected = False
         self.obs_commands = []
@@ -127,23 +168,10 @@ class ShortcutClient:
     # Configuration Management
     # ===========================
 
-    def load_config(self):
-        """Load configuration from file or create default."""
-        config_path = Path(CONFIG_FILE)
-        if config_path.exists():
-            try:
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    logger.info(f"Configuration loaded from {CONFIG_FILE}")
-                    return {**DEFAULT_CONFIG, **config}
-            except Exception as e:
-                logger.error(f"Error loading config: {e}")
-        return DEFAULT_CONFIG.copy()
-
     def save_config(self):
         """Save configuration to file."""
         try:
-            config_data = {"server_url": self.server_url}
+            config_data = {**self.config, "server_url": self.server_url}
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(config_data, f, indent=2)
             logger.info("Configuration saved")
@@ -202,6 +230,8 @@ class ShortcutClient:
             self.connected = True
             logger.info(f"Connected to server")
             self.update_icon()
+            self.negotiate_wire_format()
+            self.register_client()
 
         @self.sio.event
         def disconnect():
@@ -217,19 +247,13 @@ class ShortcutClient:
 
         @self.sio.on('execute-obs-command')
         def on_execute_obs_command(data):
-            """Receive command execution request from server."""
-            start_time = time.time()
-            command_id = data.get('id')
-            shortcut = data.get('shortcut')
-            command_name = data.get('name', 'Unknown')
-
-            logger.info(
-                f"Received command: {command_name} "
-                f"(ID: {command_id}, Shortcut: {shortcut})"
-            )
-            self.simulate_keypress(shortcut)
-            elapsed = (time.time() - start_time) * 1000
-            logger.info(f"Command executed in {elapsed:.1f}ms")
+            """Receive command execution request from server; only enqueues."""
+            data = self.decode_payload(data)
+            if data.get('steps'):
+                self.macro_runner.run(data)
+            elif not self.command_queue.submit(data):
+                logger.info(f"Coalesced duplicate trigger: {data.get('name', 'Unknown')}")
+                self.acknowledge_command(data, {'status': 'coalesced'})
 
         @self.sio.on('update-obs-commands')
         def on_update_obs_commands():
@@ -259,6 +283,58 @@ class ShortcutClient:
             self.update_icon()
             return False
 
+    def negotiate_wire_format(self):
+        """Ask the server for MessagePack broadcasts if msgpack is installed."""
+        if msgpack is None:
+            return
+
+        def on_reply(result):
+            if result and result.get('success'):
+                logger.info("Using MessagePack wire format")
+            else:
+                logger.info(f"Using JSON wire format: {(result or {}).get('error')}")
+
+        self.sio.emit('set-wire-format', {'format': 'msgpack'}, callback=on_reply)
+
+    def register_client(self):
+        """Register this machine's ID, groups and executor backends with the server."""
+        registration = {
+            'client_id': self.config.get('client_id'),
+            'groups': self.config.get('groups', []),
+            'capabilities': [e.name for e in self.executor.executors],
+        }
+
+        def on_reply(result):
+            if result and result.get('success'):
+                logger.info(f"Registered as '{registration['client_id']}' (groups: {registration['groups']})")
+            else:
+                logger.error(f"Registration failed: {result}")
+
+        self.sio.emit('register-shortcut-client', registration, callback=on_reply)
+
+    def acknowledge_command(self, command, result):
+        """Report a command's outcome to the server."""
+        if not command.get('execution_id') or not self.sio.connected:
+            return
+        try:
+            self.sio.emit('obs-command-executed', {
+                'execution_id': command['execution_id'],
+                'status': result['status'],
+                'backend': result.get('backend'),
+                'error': result.get('error'),
+                'wait_ms': result.get('wait_ms'),
+                'exec_ms': result.get('exec_ms'),
+            })
+        except Exception as e:
+            logger.error(f"Error acknowledging command: {e}")
+
+    @staticmethod
+    def decode_payload(data):
+        """Decode a broadcast payload sent in either wire format."""
+        if isinstance(data, (bytes, bytearray)):
+            return msgpack.unpackb(data, raw=False)
+        return data
+
     def disconnect_from_server(self):
         """Disconnect from the server."""
         try:
@@ -290,27 +366,30 @@ class ShortcutClient:
             return False
 
     # ===========================
-    # Keyboard Simulation
+    # Command Execution
     # ===========================
 
-    def simulate_keypress(self, shortcut):
-        """Simulate a key press for the given shortcut."""
-        if not shortcut:
-            logger.warning("No shortcut provided")
-            return
+    def on_command_done(self, command, result):
+        """Acknowledge and log the outcome of a queued command (runs on the executor thread)."""
+        if MacroRunner.is_step(command):
+            self.macro_runner.step_done(command, result)
+        else:
+            self.acknowledge_command(command, result)
+
+        name = command.get('name', 'Unknown')
+        wait_ms = result.get('wait_ms', 0.0)
 
-        if sys.platform != 'win32' or keyboard is None:
-            logger.warning(
-                f"Keyboard simulation not available. Would press: {shortcut}"
+        if result['status'] == 'executed':
+            logger.info(
+                f"Executed '{name}' via {result['backend']} in "
+                f"{result['exec_ms']:.1f}ms (queued {wait_ms:.1f}ms)"
             )
-            return
+        else:
+            logger.warning(f"Command '{name}' {result['status']}: {result.get('error')}")
 
-        try:
-            key = shortcut.lower()
-            keyboard.press_and_release(key)
-            logger.info(f"Simulated key press: {shortcut}")
-        except Exception as e:
-            logger.error(f"Error simulating key press '{shortcut}': {e}")
+    def on_show_stats(self, icon=None, item=None):
+        """Log execution queue statistics."""
+        logger.info(f"Execution stats: {self.command_queue.stats()}")
 
     # ===========================
     # System Tray Icon
@@ -382,6 +461,9 @@ class ShortcutClient:
 
         menu_items.append(pystray.Menu.SEPARATOR)
 
+        # Execution statistics
+        menu_items.append(pystray.MenuItem("Log Execution Stats", self.on_show_stats))
+
         # Console toggle
         console_text = (
             "Hide Console" if self.console_visible else "Show Console"
@@ -427,6 +509,10 @@ class ShortcutClient:
         logger.info("Shutting down...")
         self.running = False
         self.disconnect_from_server()
+        self.macro_runner.stop()
+        self.command_queue.stop()
+        self.executor.stop()
+        logger.info(f"Execution stats: {self.command_queue.stats()}")
         if self.icon:
             self.icon.stop()
 
@@ -455,6 +541,11 @@ class ShortcutClient:
         """Run the application."""
         logger.info("Starting OBS Football Shortcut Client...")
         logger.info(f"Server URL: {self.server_url}")
+        logger.info(f"Executor: {self.config.get('executor')}")
+
+        self.executor.start()
+        self.command_queue.start()
+        self.macro_runner.start()
 
         # Create the system tray icon
         try:
@@ -489,12 +580,15 @@ class ShortcutClient:
                 self.on_quit()
 
         logger.info("OBS Football Client stopped")
+        log_listener.stop()
 
 
 def main():
     """Main entry point."""
 
-    if not request_admin_privileges():
+    # Key emulation needs admin rights; obs-websocket does not
+    needs_admin = load_config().get('executor') != 'obs-websocket'
+    if needs_admin and not request_admin_privileges():
         print("ERROR: This application requires administrator privileges")
         print("Please run as Administrator or grant privileges when prompted")
         sys.exit(1)
@@ -506,6 +600,11 @@ def main():
             print("\nOptions:")
             print("  -h, --help     Show this help message")
             print("\nConfiguration is stored in shortcut_client_config.json")
+            print("  client_id                name the server routes commands to")
+            print("  groups                   e.g. [\"replay\", \"program\"]")
+            print("  executor                 auto | obs-websocket | keypress")
+            print("  obs_websocket_url        default ws://localhost:4455")
+            print("  obs_websocket_password   obs-websocket server password")
             return
 
     try:
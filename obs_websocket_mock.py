@@ -0,0 +1,254 @@
+"""
+Mock obs-websocket v5 server.
+
+Speaks enough of the obs-websocket v5 protocol (Hello / Identify with
+optional authentication, Request, RequestBatch) to exercise the
+shortcut client's obs-websocket backend on any platform, without OBS.
+Every request is recorded and answered successfully. A few requests also
+change a tiny fake scene state.
+
+    python obs_websocket_mock.py [--port 4455] [--password secret]
+
+It is also importable: MockOBSServer(port=0).start() runs it on a
+background thread and `.requests` lists what it received.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import socketserver
+import struct
+import threading
+
+from obs_executors import (
+    auth_response, OP_HELLO, OP_IDENTIFY, OP_IDENTIFIED, OP_REQUEST, OP_REQUEST_RESPONSE,
+    OP_REQUEST_BATCH, OP_REQUEST_BATCH_RESPONSE, RPC_VERSION
+)
+
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+AUTH_FAILED_CLOSE_CODE = 4009
+
+
+class _Connection(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server.mock
+        self.request.settimeout(None)
+
+        if not self._handshake():
+            return
+
+        salt = base64.b64encode(os.urandom(16)).decode('utf-8')
+        challenge = base64.b64encode(os.urandom(16)).decode('utf-8')
+        hello = {'obsWebSocketVersion': '5.0.0-mock', 'rpcVersion': RPC_VERSION}
+        if server.password:
+            hello['authentication'] = {'challenge': challenge, 'salt': salt}
+        self._send_json({'op': OP_HELLO, 'd': hello})
+
+        identified = False
+        while True:
+            message = self._receive_text()
+            if message is None:
+                return
+            data = json.loads(message)
+            op = data.get('op')
+            d = data.get('d', {})
+
+            if op == OP_IDENTIFY:
+                if server.password and d.get('authentication') != auth_response(server.password, salt, challenge):
+                    self._send_close(AUTH_FAILED_CLOSE_CODE, 'Authentication failed.')
+                    return
+                identified = True
+                self._send_json({'op': OP_IDENTIFIED, 'd': {'negotiatedRpcVersion': RPC_VERSION}})
+
+            elif not identified:
+                self._send_close(4007, 'Not identified.')
+                return
+
+            elif op == OP_REQUEST:
+                result = server.handle_request(d['requestType'], d.get('requestData') or {})
+                self._send_json({'op': OP_REQUEST_RESPONSE, 'd': {**result, 'requestId': d.get('requestId')}})
+
+            elif op == OP_REQUEST_BATCH:
+                with server.lock:
+                    server.batches += 1
+                results = []
+                for request in d.get('requests', []):
+                    result = server.handle_request(request['requestType'], request.get('requestData') or {})
+                    results.append(result)
+                    if d.get('haltOnFailure') and not result['requestStatus']['result']:
+                        break
+                self._send_json({'op': OP_REQUEST_BATCH_RESPONSE, 'd': {'requestId': d.get('requestId'), 'results': results}})
+
+    # ---- websocket framing (RFC 6455, server side) ----
+
+    def _handshake(self):
+        raw = b''
+        while b'\r\n\r\n' not in raw:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return False
+            raw += chunk
+
+        headers = {}
+        for line in raw.decode('latin-1').split('\r\n')[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not key:
+            return False
+
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('utf-8')).digest()).decode('utf-8')
+        self.request.sendall((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n'
+            'Sec-WebSocket-Protocol: obswebsocket.json\r\n\r\n'
+        ).encode('utf-8'))
+        return True
+
+    def _recv_exact(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('Connection closed')
+            data += chunk
+        return data
+
+    def _receive_text(self):
+        try:
+            while True:
+                first, second = self._recv_exact(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack('!H', self._recv_exact(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', self._recv_exact(8))[0]
+                mask = self._recv_exact(4) if second & 0x80 else b'\x00\x00\x00\x00'
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._recv_exact(length)))
+
+                if opcode == OPCODE_TEXT:
+                    return payload.decode('utf-8')
+                if opcode == OPCODE_PING:
+                    self._send_frame(OPCODE_PONG, payload)
+                elif opcode == OPCODE_CLOSE:
+                    return None
+        except (ConnectionError, OSError):
+            return None
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack('!H', len(payload))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(payload))
+        self.request.sendall(header + payload)
+
+    def _send_json(self, message):
+        self._send_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8'))
+
+    def _send_close(self, code, reason):
+        self._send_frame(OPCODE_CLOSE, struct.pack('!H', code) + reason.encode('utf-8'))
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockOBSServer:
+
+    def __init__(self, host= '127.0.0.1', port= 4455, password= ''):
+        self.password = password
+        self.lock = threading.Lock()
+        self.requests = []  # (requestType, requestData)
+        self.batches = 0
+        self.current_scene = 'Scene'
+        self.scenes = ['Scene', 'Replay', 'Halftime']
+        self.scene_items = {}  # (sceneName, sceneItemId) -> enabled
+
+        self._server = _ThreadingServer((host, port), _Connection)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target= self._server.serve_forever, daemon= True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle_request(self, request_type, request_data):
+        """Record a request and return its RequestResponse fields."""
+        with self.lock:
+            self.requests.append((request_type, request_data))
+            response_data = None
+
+            if request_type == 'GetVersion':
+                response_data = {'obsVersion': '30.0.0-mock', 'rpcVersion': RPC_VERSION}
+            elif request_type == 'GetSceneList':
+                response_data = {
+                    'currentProgramSceneName': self.current_scene,
+                    'scenes': [{'sceneName': name} for name in self.scenes]
+                }
+            elif request_type == 'SetCurrentProgramScene':
+                if request_data.get('sceneName') not in self.scenes:
+                    return self._status(request_type, False, 600, 'No source was found by the name.')
+                self.current_scene = request_data['sceneName']
+            elif request_type == 'SetSceneItemEnabled':
+                key = (request_data.get('sceneName'), request_data.get('sceneItemId'))
+                self.scene_items[key] = bool(request_data.get('sceneItemEnabled'))
+
+        result = self._status(request_type, True, 100)
+        if response_data is not None:
+            result['responseData'] = response_data
+        return result
+
+    @staticmethod
+    def _status(request_type, ok, code, comment= None):
+        status = {'result': ok, 'code': code}
+        if comment:
+            status['comment'] = comment
+        return {'requestType': request_type, 'requestStatus': status}
+
+
+def main():
+    parser = argparse.ArgumentParser(description= 'Mock obs-websocket v5 server')
+    parser.add_argument('--host', default= '127.0.0.1')
+    parser.add_argument('--port', type= int, default= 4455)
+    parser.add_argument('--password', default= '')
+    args = parser.parse_args()
+
+    server = MockOBSServer(args.host, args.port, args.password)
+    print(f"Mock obs-websocket listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nMock server stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Static asset pipeline.
+
+Page scripts live unminified in static/js/. At startup they are minified,
+content-hashed and written to static/dist/ together with a manifest.json
+that maps each source name to its fingerprinted bundle. Templates reference
+bundles through the `asset_url()` Jinja global, so a changed script always
+gets a new URL and bundles can be cached by browsers forever.
+
+Run `python -m services.assets` to rebuild the bundles by hand.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from flask import request, url_for
+
+from config import ASSETS_SOURCE_FOLDER, ASSETS_DIST_FOLDER
+
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = 'manifest.json'
+BUNDLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# source name -> dist file name, resolved by init_assets()
+_manifest = {}
+
+
+def minify_js(source):
+    """Conservative minifier: drops indentation, blank lines and full-line comments.
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly as
+    in the source file.
+    """
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+
+def build_assets(source_folder= ASSETS_SOURCE_FOLDER, dist_folder= ASSETS_DIST_FOLDER):
+    """Minify and fingerprint every script in source_folder. Returns the manifest."""
+    source_dir = Path(source_folder)
+    dist_dir = Path(dist_folder)
+    dist_dir.mkdir(parents= True, exist_ok= True)
+
+    manifest = {}
+    for source_path in sorted(source_dir.glob('*.js')):
+        bundle = minify_js(source_path.read_text(encoding='utf-8'))
+        digest = hashlib.sha256(bundle.encode('utf-8')).hexdigest()[:10]
+        bundle_name = f"{source_path.stem}.{digest}.min.js"
+
+        bundle_path = dist_dir / bundle_name
+        if not bundle_path.exists():
+            bundle_path.write_text(bundle, encoding='utf-8')
+
+        manifest[source_path.name] = bundle_name
+
+    # Remove bundles from previous builds
+    for old_bundle in dist_dir.glob('*.min.js'):
+        if old_bundle.name not in manifest.values():
+            old_bundle.unlink()
+
+    (dist_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
+
+
+def asset_url(name):
+    """URL of the fingerprinted bundle for a script in static/js/."""
+    bundle_name = _manifest.get(name)
+    if bundle_name is None:
+        # Not built (or new since startup): serve the unminified source
+        return url_for('static', filename=f"js/{name}")
+    return url_for('static', filename=f"dist/{bundle_name}")
+
+
+def init_assets(app):
+    """Build the bundles, load the manifest and expose asset_url() to templates."""
+    global _manifest
+
+    try:
+        _manifest = build_assets()
+    except OSError as e:
+        # Read-only install: fall back to whatever manifest was shipped
+        logger.error(f"Error building static bundles: {e}")
+        manifest_path = Path(ASSETS_DIST_FOLDER) / MANIFEST_NAME
+        if manifest_path.exists():
+            _manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.after_request
+    def cache_bundles(response):
+        if request.path.startswith('/static/dist/') and request.path.endswith('.min.js') and response.status_code == 200:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = BUNDLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+
+if __name__ == '__main__':
+    for source_name, bundle_name in build_assets().items():
+        print(f"{source_name} -> {bundle_name}")
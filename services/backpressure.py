@@ -0,0 +1,231 @@
+"""
+Per-client backpressure.
+
+Broadcasts are written into every client's engine.io send queue. A phone on
+weak Wi-Fi that polls slowly (or a websocket that stopped draining) lets its
+queue grow without bound, and every further broadcast adds to it.
+
+A background check looks at each client every BACKPRESSURE_CHECK_INTERVAL:
+- its engine.io queue depth, and
+- whether it answered the last `backpressure-probe` (sent every
+  BACKPRESSURE_PROBE_INTERVAL; only clients that have answered one before
+  are judged on it, so pages without the probe handler are not flagged).
+
+A client with SLOW_CLIENT_QUEUE_DEPTH queued packets, or that missed
+SLOW_CLIENT_MISSED_ACKS probes in a row, is marked slow. Broadcasts then
+skip it and only the latest message per topic is kept in its mailbox (the
+score, the timer, each `update-*`, the last event...), so its backlog stops
+growing. Once its queue has drained and it answers probes again, the
+mailbox is delivered and it rejoins the broadcasts. A client that still
+reaches SLOW_CLIENT_MAX_DEPTH is disconnected; it reconnects and refetches.
+
+Healthy clients keep receiving one broadcast per message; the only cost on
+their path is the skip list.
+"""
+
+import logging
+import threading
+import time
+
+from config import (BACKPRESSURE_CHECK_INTERVAL, BACKPRESSURE_PROBE_INTERVAL,
+    SLOW_CLIENT_QUEUE_DEPTH, SLOW_CLIENT_MISSED_ACKS, SLOW_CLIENT_MAX_DEPTH, CONFLATION_TOPICS)
+from services import wire
+from services.lifecycle import on_connect, on_disconnect
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressureMonitor:
+
+    def __init__(self,
+            interval= BACKPRESSURE_CHECK_INTERVAL,
+            probe_interval= BACKPRESSURE_PROBE_INTERVAL,
+            slow_depth= SLOW_CLIENT_QUEUE_DEPTH,
+            missed_acks= SLOW_CLIENT_MISSED_ACKS,
+            max_depth= SLOW_CLIENT_MAX_DEPTH):
+        self.interval = interval
+        self.probe_interval = probe_interval
+        self.slow_depth = slow_depth
+        self.recover_depth = slow_depth // 4
+        self.missed_acks = missed_acks
+        self.max_depth = max_depth
+
+        self.socketio = None
+        self._lock = threading.Lock()
+        self._clients = {}  # sid -> client state
+        self._mailboxes = {}  # slow sid -> {topic: (event, args, seq)}
+
+        # Read without the lock on every broadcast; replaced, never mutated
+        self.slow = frozenset()
+
+        self._conflated = 0
+        self._delivered = 0
+        self._marked_slow = 0
+        self._disconnected = 0
+
+    def init_app(self, socketio):
+        self.socketio = socketio
+        on_connect(self._on_connect)
+        on_disconnect(self._on_disconnect)
+        if self.interval > 0:
+            socketio.start_background_task(self._run)
+
+    def _on_connect(self, sid):
+        with self._lock:
+            self._clients[sid] = {'acked': False, 'outstanding': None, 'missed': 0, 'last_probe': 0.0, 'depth': 0}
+
+    def _on_disconnect(self, sid):
+        with self._lock:
+            self._clients.pop(sid, None)
+            if self._mailboxes.pop(sid, None) is not None:
+                self.slow = frozenset(self._mailboxes)
+
+    # ===========================
+    # Broadcast path
+    # ===========================
+
+    def conflate(self, event, args, seq= None):
+        """Keep event as the latest message of its topic for every slow client it skipped."""
+        topic = CONFLATION_TOPICS.get(event, event)
+        missed = []
+        with self._lock:
+            for sid in self.slow:
+                mailbox = self._mailboxes.get(sid)
+                if mailbox is None:
+                    missed.append(sid)  # recovered while the broadcast was going out
+                    continue
+                mailbox.pop(topic, None)
+                mailbox[topic] = (event, args, seq)
+                self._conflated += 1
+
+        for sid in missed:
+            self._send(sid, event, args, seq)
+
+    def _send(self, sid, event, args, seq= None):
+        if args and sid in wire.msgpack_sids(self.socketio):
+            encoded = wire.packed(args[0])
+            if encoded is not None:
+                args = (encoded,)
+        if seq is not None and sid in wire.sequenced_sids(self.socketio):
+            self.socketio.emit(event, ((args or (None,))[0], seq), to= sid)
+        else:
+            self.socketio.emit(event, *args, to= sid)
+
+    # ===========================
+    # Detection
+    # ===========================
+
+    def _queue_depth(self, sid):
+        """Packets waiting in the client's engine.io send queue."""
+        try:
+            eio_sid = self.socketio.server.manager.eio_sid_from_sid(sid, '/')
+            return self.socketio.server.eio.sockets[eio_sid].queue.qsize()
+        except (KeyError, AttributeError):
+            return 0
+
+    def _probe(self, sid, seq):
+        def answered(*args):
+            with self._lock:
+                client = self._clients.get(sid)
+                if client is not None and client['outstanding'] == seq:
+                    client['outstanding'] = None
+                    client['missed'] = 0
+                    client['acked'] = True
+
+        self.socketio.emit('backpressure-probe', {'seq': seq}, to= sid, callback= answered)
+
+    def check(self):
+        """One pass over every client. Called by the background task."""
+        now = time.monotonic()
+        depths = {sid: self._queue_depth(sid) for sid in list(self._clients)}
+        probes = []
+        deliveries = []
+        disconnects = []
+
+        with self._lock:
+            for sid, depth in depths.items():
+                client = self._clients.get(sid)
+                if client is None:
+                    continue
+                client['depth'] = depth
+
+                if now - client['last_probe'] >= self.probe_interval:
+                    if client['outstanding'] is not None:
+                        client['missed'] += 1
+                    client['outstanding'] = seq = int(now * 1000)
+                    client['last_probe'] = now
+                    probes.append((sid, seq))
+
+                lagging = client['acked'] and client['missed'] >= self.missed_acks
+                slow = sid in self._mailboxes
+
+                if depth >= self.max_depth:
+                    disconnects.append(sid)
+                elif not slow and (depth >= self.slow_depth or lagging):
+                    self._mailboxes[sid] = {}
+                    self._marked_slow += 1
+                elif slow and depth <= self.recover_depth and not lagging:
+                    deliveries.append(sid)
+
+            self.slow = frozenset(self._mailboxes)
+
+        for sid in deliveries:
+            self._drain(sid)
+
+        for sid in disconnects:
+            logger.warning(f"Disconnecting slow client {sid}: {depths[sid]} packets queued", extra= {'sid': sid, 'depth': depths[sid]})
+            with self._lock:
+                self._disconnected += 1
+            self.socketio.server.disconnect(sid, ignore_queue= True)
+
+        for sid, seq in probes:
+            if sid not in disconnects:
+                self._probe(sid, seq)
+
+    def _drain(self, sid):
+        """Deliver a recovered client's mailbox, then let it rejoin the broadcasts.
+
+        It stays out of the broadcasts until its mailbox is empty, so nothing
+        newer can overtake what it is being sent.
+        """
+        while True:
+            with self._lock:
+                mailbox = self._mailboxes.get(sid)
+                if mailbox is None:
+                    return
+                if not mailbox:
+                    del self._mailboxes[sid]
+                    self.slow = frozenset(self._mailboxes)
+                    return
+                self._mailboxes[sid] = {}
+                self._delivered += len(mailbox)
+
+            for event, args, seq in mailbox.values():
+                self._send(sid, event, args, seq)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.exception(f"Error checking client backpressure: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'slow': [
+                    {'sid': sid, 'depth': self._clients[sid]['depth'], 'pending_topics': len(mailbox)}
+                    for sid, mailbox in self._mailboxes.items() if sid in self._clients
+                ],
+                'marked_slow': self._marked_slow,
+                'conflated': self._conflated,
+                'delivered': self._delivered,
+                'disconnected': self._disconnected,
+                'max_depth': max((client['depth'] for client in self._clients.values()), default= 0),
+            }
+
+
+backpressure = BackpressureMonitor()
@@ -0,0 +1,96 @@
+"""
+Inline state for the /obs overlay.
+
+An OBS browser source reloads the overlay on every scene switch or refresh.
+It used to connect and then fetch teams, players, formations, ads, the
+timer and the score before it could paint. /obs is now rendered with
+snapshot() embedded in the page (and the scoreboard values already in the
+markup), so its first frame is correct.
+
+The snapshot carries a version per section: `match` is the MatchState
+version (timer and score), the others count the matching `update-*`
+broadcasts. `broadcasts` is the broadcast sequence the page was rendered
+at, and once connected the overlay resumes from it (services/broadcast.py),
+so an event or ad sent before its socket was up is still shown. Only when
+that fails does it send its versions with `sync-state`, and it gets back
+the sections that changed in between.
+
+Versions are read before the data, so a section is never newer in the
+versions than in the data sent with them (at worst it is sent again).
+"""
+
+import threading
+
+from services.database import Team, Player, Formation, Advertisement
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+
+
+SECTIONS = ('teams', 'players', 'formations', 'ads', 'match')
+
+# Broadcasts that invalidate each section
+SECTION_EVENTS = {
+    'update-teams': ('teams',),
+    'update-players': ('players',),
+    'update-formations': ('formations',),
+    'update-roster': ('teams', 'players', 'formations'),
+    'update-ads': ('ads',),
+}
+
+
+class StateBootstrap:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {section: 0 for section in SECTIONS if section != 'match'}
+        self.match_state = None
+
+    def init_app(self, socketio, match_state):
+        self.match_state = match_state
+        for event in SECTION_EVENTS:
+            broadcaster.listen(event, self._invalidate)
+
+        @socketio.on('sync-state')
+        def handle_sync_state(versions= None):
+            """Sections changed since the versions the client was rendered with."""
+            return self.changed_since(versions or {})
+
+    def _invalidate(self, event):
+        with self._lock:
+            for section in SECTION_EVENTS[event]:
+                self._versions[section] += 1
+
+    def versions(self):
+        with self._lock:
+            versions = dict(self._versions)
+        versions['match'] = self.match_state.version
+        return versions
+
+    def snapshot(self, sections= SECTIONS):
+        """Versions plus the data of the given sections. Needs an app context."""
+        write_behind.flush()
+        position = broadcaster.position()
+        versions = self.versions()
+
+        state = {'versions': versions, 'broadcasts': position}
+        if 'teams' in sections:
+            state['teams'] = [team.to_dict() for team in Team.query.all()]
+        if 'players' in sections:
+            state['players'] = [player.to_dict() for player in Player.query.all()]
+        if 'formations' in sections:
+            state['formations'] = [formation.to_dict() for formation in Formation.query.all()]
+        if 'ads' in sections:
+            state['ads'] = [ad.to_dict() for ad in Advertisement.query.all()]
+        if 'match' in sections:
+            state['timer'] = self.match_state.timer_snapshot()
+            state['score'] = self.match_state.score_snapshot()
+        return state
+
+    def changed_since(self, versions):
+        write_behind.flush()
+        current = self.versions()
+        stale = [section for section in SECTIONS if versions.get(section) != current[section]]
+        return self.snapshot(stale)
+
+
+state_bootstrap = StateBootstrap()
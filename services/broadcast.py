@@ -0,0 +1,219 @@
+"""
+Broadcast coalescing.
+
+Setup pages fire bursts of edits (typing a team name, dragging a colour
+picker), and each edit used to broadcast an `update-*` invalidation that
+makes every overlay refetch. The coalescer holds these invalidations for a
+short window and sends each topic once per window. Payloads for the same
+topic are merged (dicts) or replaced (anything else), and `update-roster`
+absorbs pending team/player/formation invalidations.
+
+Latency-critical events (goals, timer, ads, game events) skip the window
+and are sent immediately. All broadcasts leave through _emit(), which sends
+payloads to MessagePack clients in their negotiated wire format and hands
+them to services/backpressure.py for clients that fell behind.
+
+Every broadcast also gets the next sequence number and is kept in a ring
+buffer of the last BROADCAST_REPLAY_BUFFER messages. A client that sends
+`resume-broadcasts` receives the sequence number with every broadcast;
+after a reconnect it sends the last one it handled and gets exactly the
+messages it missed replayed, or `resync` if they have left the buffer (or
+the server restarted, see `epoch`) and it has to refetch its state.
+"""
+
+import threading
+import uuid
+from collections import deque
+
+from flask import request
+from flask_socketio import join_room
+
+from config import BROADCAST_COALESCE_WINDOW, COALESCED_EVENTS, BROADCAST_REPLAY_BUFFER
+from services import wire
+from services.backpressure import backpressure
+
+
+# A pending event on the left makes the ones on the right redundant
+SUPERSEDES = {
+    'update-roster': ('update-teams', 'update-players', 'update-formations'),
+}
+
+_NO_PAYLOAD = object()
+
+
+class BroadcastCoalescer:
+
+    def __init__(self, window= BROADCAST_COALESCE_WINDOW, events= COALESCED_EVENTS):
+        self.window = window
+        self.events = set(events)
+
+        self.socketio = None
+        self._lock = threading.Lock()
+        self._pending = {}  # event -> payload, insertion ordered
+        self._flush_scheduled = False
+        self._listeners = {}  # event -> [callback(event)]
+
+        # Held while a broadcast is numbered and emitted, so every client gets them in order
+        self._emit_lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._history = deque(maxlen= BROADCAST_REPLAY_BUFFER)  # (seq, event, args)
+
+        self._requested = 0
+        self._emitted = 0
+        self._replayed = 0
+        self._resyncs = 0
+
+    def init_app(self, socketio):
+        self.socketio = socketio
+
+        @socketio.on('resume-broadcasts')
+        def handle_resume_broadcasts(data= None):
+            data = data or {}
+            return self.resume(request.sid, data.get('last_seq'), data.get('epoch'))
+
+    def listen(self, event, callback):
+        """Call callback(event) as soon as event is broadcast, before any coalescing.
+
+        Lets server-side caches follow the same invalidations as the clients.
+        """
+        self._listeners.setdefault(event, []).append(callback)
+
+    def broadcast(self, event, data= _NO_PAYLOAD):
+        """Broadcast event to every client, coalescing it if it is a coalesced topic."""
+        for callback in self._listeners.get(event, ()):
+            callback(event)
+
+        if event not in self.events or self.window <= 0:
+            self._emit(event, data)
+            with self._lock:
+                self._requested += 1
+                self._emitted += 1
+            return
+
+        with self._lock:
+            self._requested += 1
+
+            previous = self._pending.get(event, _NO_PAYLOAD)
+            if isinstance(previous, dict) and isinstance(data, dict):
+                data = {**previous, **data}
+            self._pending[event] = data
+
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        self.socketio.start_background_task(self._flush_later)
+
+    def send(self, event, data, to):
+        """Send event right away to the given sids only, each in its negotiated wire format."""
+        binary_sids = set(wire.msgpack_sids(self.socketio))
+        encoded = wire.packed(data) if binary_sids else None
+        for sid in to:
+            if encoded is not None and sid in binary_sids:
+                self.socketio.emit(event, encoded, to= sid)
+            else:
+                self.socketio.emit(event, data, to= sid)
+
+        with self._lock:
+            self._requested += 1
+            self._emitted += 1
+
+    def position(self):
+        """Sequence number of the last broadcast, with the epoch it belongs to."""
+        with self._emit_lock:
+            return {'epoch': self.epoch, 'seq': self._sequence}
+
+    def resume(self, sid, last_seq= None, epoch= None):
+        """Number sid's broadcasts from now on and replay what it missed after last_seq."""
+        with self._emit_lock:
+            join_room(wire.SEQUENCED_ROOM, sid= sid)
+            position = {'success': True, 'epoch': self.epoch, 'seq': self._sequence}
+            if last_seq is None:
+                return position
+
+            oldest = self._history[0][0] if self._history else self._sequence + 1
+            try:
+                last_seq = int(last_seq)
+            except (TypeError, ValueError):
+                last_seq = -1
+            if epoch != self.epoch or last_seq > self._sequence or last_seq + 1 < oldest:
+                self._resyncs += 1
+                return {**position, 'resync': True}
+
+            binary = sid in wire.msgpack_sids(self.socketio)
+            missed = [entry for entry in self._history if entry[0] > last_seq]
+            for seq, event, args in missed:
+                encoded = wire.packed(args[0]) if args and binary else None
+                payload = encoded if encoded is not None else (args or (None,))[0]
+                self.socketio.emit(event, (payload, seq), to= sid)
+            self._replayed += len(missed)
+            return {**position, 'replayed': len(missed)}
+
+    def flush(self):
+        """Send everything pending right now."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._flush_scheduled = False
+
+            for event, redundant in SUPERSEDES.items():
+                if event in pending:
+                    for name in redundant:
+                        pending.pop(name, None)
+
+            self._emitted += len(pending)
+
+        for event, data in pending.items():
+            self._emit(event, data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'window_ms': self.window * 1000,
+                'requested': self._requested,
+                'emitted': self._emitted,
+                'saved': self._requested - self._emitted - len(self._pending),
+                'pending': len(self._pending),
+                'sequence': self._sequence,
+                'replay_buffer': len(self._history),
+                'replayed': self._replayed,
+                'resyncs': self._resyncs,
+            }
+
+    def _flush_later(self):
+        self.socketio.sleep(self.window)
+        self.flush()
+
+    def _emit(self, event, data):
+        # Slow clients are skipped and get the latest message per topic once they catch up
+        slow = set(backpressure.slow)
+        args = () if data is _NO_PAYLOAD else (data,)
+
+        with self._emit_lock:
+            self._sequence += 1
+            seq = self._sequence
+            self._history.append((seq, event, args))
+
+            binary = set(wire.msgpack_sids(self.socketio)) if args else set()
+            encoded = wire.packed(data) if binary else None
+            if encoded is None:
+                binary = set()
+            sequenced = set(wire.sequenced_sids(self.socketio))
+
+            self.socketio.emit(event, *args, skip_sid= list(slow | binary | sequenced))
+            if binary - sequenced:
+                self.socketio.emit(event, encoded, to= wire.MSGPACK_ROOM, skip_sid= list(slow | sequenced))
+
+            # Sequenced clients get the number as a second argument (None stands in for no payload)
+            if sequenced - binary:
+                payload = data if args else None
+                self.socketio.emit(event, (payload, seq), to= wire.SEQUENCED_ROOM, skip_sid= list(slow | binary))
+            if sequenced & binary:
+                self.socketio.emit(event, (encoded, seq), to= wire.SEQUENCED_ROOM, skip_sid= list(slow | (sequenced - binary)))
+
+        if slow:
+            backpressure.conflate(event, args, seq)
+
+
+broadcaster = BroadcastCoalescer()
@@ -0,0 +1,202 @@
+"""
+Match-clock cue scheduler.
+
+A cue fires an action when the match clock reaches its `match_time`
+(seconds), optionally shifted by the announced extra time (minutes), e.g.
+"formation at 0:00", "halftime sponsor at 45:00 + extra time", "warn at
+88:00".
+
+Enabled cues are kept on a timeline sorted by match time, with a cursor at
+the next cue ahead of the clock. A single background thread sleeps until the
+next cue is due and is woken only when the timer or the cues change, so
+there is no polling loop. Every timer command re-seats the cursor with a
+binary search, and a change of extra time or cues rebuilds the timeline.
+
+- Cues only fire while the clock runs through them; setting the clock past a
+  cue skips it.
+- A cue fires at most once until set-timer or reset-timer moves the clock
+  back to or before it, or the cue is edited; then it is armed again.
+"""
+
+import bisect
+import logging
+import threading
+
+from services.match_state import elapsed_seconds
+
+
+logger = logging.getLogger(__name__)
+
+
+def _extra_minutes(value):
+    """Announced extra time as whole minutes; anything that is not a number counts as none."""
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring extra time {value!r}")
+        return 0
+
+
+class CueScheduler:
+
+    def __init__(self):
+        self.on_fire = None
+
+        self._cond = threading.Condition()
+        self._cues = {}  # id -> cue dict
+        self._timeline = []  # sorted (fire_at, id)
+        self._cursor = 0
+        self._fired = set()
+        self._timer = {'timer_anchor': None, 'timer_offset': 0, 'timer_running': False, 'extra_time': 0}
+        self._running = False
+
+        self._fired_count = 0
+        self._wakeups = 0
+
+    def init_app(self, socketio, match_state, on_fire):
+        """Follow match_state's timer and call on_fire(cue) on a background task."""
+        self.on_fire = on_fire
+        match_state.subscribe(self._on_match_state_change)
+        self.update_timer(match_state.timer_snapshot())
+
+        self._running = True
+        socketio.start_background_task(self._run)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    # ===========================
+    # Inputs
+    # ===========================
+
+    def load_cues(self, cues):
+        """Replace the scheduled cues (dicts as returned by MatchCue.to_dict())."""
+        with self._cond:
+            previous = self._cues
+            self._cues = {cue['id']: cue for cue in cues if cue.get('enabled', True)}
+            self._fired = {cue_id for cue_id in self._fired if previous.get(cue_id) == self._cues.get(cue_id)}
+            self._rebuild()
+            self._cond.notify()
+
+    def update_timer(self, timer_state, rearm= False, anchored= False):
+        """Follow a new timer state.
+
+        rearm: the clock was moved, so cues from here on may fire again.
+        anchored: the command just re-anchored the timer, so timer_offset is the
+        clock reading at that moment (a cue at 0:00 still fires on kick-off).
+        """
+        timer_state = {**timer_state, 'extra_time': _extra_minutes(timer_state.get('extra_time'))}
+        with self._cond:
+            extra_time_changed = timer_state['extra_time'] != self._timer.get('extra_time')
+            self._timer = {key: timer_state.get(key) for key in self._timer}
+            at = (self._timer['timer_offset'] or 0) if anchored else None
+            if extra_time_changed:
+                self._rebuild(at)
+            else:
+                self._reseat(at)
+            if rearm:
+                self._fired -= {cue_id for _, cue_id in self._timeline[self._cursor:]}
+            self._cond.notify()
+
+    def _on_match_state_change(self, command, timer_state, score_state):
+        if command == 'set-extra-time':
+            self.update_timer(timer_state)
+        elif command in ('start-timer', 'stop-timer'):
+            self.update_timer(timer_state, anchored= True)
+        elif command in ('reset-timer', 'set-timer'):
+            self.update_timer(timer_state, rearm= True, anchored= True)
+
+    # ===========================
+    # State
+    # ===========================
+
+    def match_time(self):
+        """Elapsed match seconds according to the last timer state seen."""
+        with self._cond:
+            return self._elapsed()
+
+    def upcoming(self, limit= 10):
+        with self._cond:
+            return [
+                {**self._cues[cue_id], 'fire_at': fire_at}
+                for fire_at, cue_id in self._timeline[self._cursor:]
+                if cue_id not in self._fired
+            ][:limit]
+
+    def stats(self):
+        with self._cond:
+            next_in = None
+            if self._cursor < len(self._timeline) and self._timer['timer_running']:
+                next_in = round(self._timeline[self._cursor][0] - self._elapsed(), 3)
+            return {
+                'cues': len(self._timeline),
+                'pending': len(self._timeline) - self._cursor,
+                'fired': self._fired_count,
+                'wakeups': self._wakeups,
+                'next_cue_in': next_in,
+            }
+
+    # ===========================
+    # Internals (lock held)
+    # ===========================
+
+    def _elapsed(self):
+        return elapsed_seconds(self._timer)
+
+    def _fire_at(self, cue):
+        fire_at = cue['match_time']
+        if cue.get('add_extra_time'):
+            fire_at += (self._timer.get('extra_time') or 0) * 60
+        return fire_at
+
+    def _rebuild(self, at= None):
+        self._timeline = sorted((self._fire_at(cue), cue_id) for cue_id, cue in self._cues.items())
+        self._reseat(at)
+
+    def _reseat(self, at= None):
+        """Point the cursor at the first cue that is not behind the clock (or behind `at`)."""
+        if at is None:
+            at = self._elapsed()
+        self._cursor = bisect.bisect_left(self._timeline, (at, float('-inf')))
+
+    def _collect_due(self):
+        """Cues that are due now, and the seconds until the next one (None: wait for a change)."""
+        if not self._timer['timer_running']:
+            return [], None
+
+        elapsed = self._elapsed()
+        due = []
+        while self._cursor < len(self._timeline) and self._timeline[self._cursor][0] <= elapsed:
+            cue_id = self._timeline[self._cursor][1]
+            if cue_id not in self._fired:
+                self._fired.add(cue_id)
+                due.append(self._cues[cue_id])
+            self._cursor += 1
+
+        if self._cursor < len(self._timeline):
+            return due, self._timeline[self._cursor][0] - elapsed
+        return due, None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running:
+                        return
+                    due, wait = self._collect_due()
+                    if due:
+                        break
+                    self._cond.wait(wait)
+                    self._wakeups += 1
+                self._fired_count += len(due)
+
+            for cue in due:
+                try:
+                    self.on_fire(cue)
+                except Exception as e:
+                    logger.exception(f"Error firing cue {cue.get('id')}: {e}", extra= {'cue': cue.get('id')})
+
+
+cue_scheduler = CueScheduler()
@@ -3,6 +3,7 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+
 class Team(db.Model):
     __tablename__ = 'teams'
 
@@ -52,13 +53,19 @@ class Formation(db.Model):
 
     goalkeeper = db.Column(db.Integer, db.ForeignKey("players.id"))
     lines = db.Column(db.JSON)
+    # Bumped on every edit; overlay layouts are cached per version
+    version = db.Column(db.Integer, default= 1)
+
+    def bump_version(self):
+        self.version = (self.version or 0) + 1
 
     def to_dict(self):
         return {
             'id': self.id,
             'team_id': self.team_id,
             'goalkeeper': self.goalkeeper,
-            'lines': self.lines
+            'lines': self.lines,
+            'version': self.version
         }
 
 
@@ -90,11 +97,180 @@ class OBSCommand(db.Model):
     name = db.Column(db.String(255))
     color = db.Column(db.String(7), default= '#000000')
     shortcut = db.Column(db.String(255))
+    # obs-websocket v5 requests, e.g. [{"requestType": "SetCurrentProgramScene", "requestData": {"sceneName": "Replay"}}]
+    obs_requests = db.Column(db.JSON)
+    # Shortcut client IDs and "group:<name>" entries; empty means every client
+    targets = db.Column(db.JSON)
+    # Macro steps [{type: shortcut|obs|event|ad, delay_ms, ...}]; when set they replace shortcut/obs_requests
+    steps = db.Column(db.JSON)
 
     def to_dict(self):
         return {
             'id': self.id,
             'name': self.name,
             'color': self.color,
-            'shortcut': self.shortcut
+            'shortcut': self.shortcut,
+            'obs_requests': self.obs_requests,
+            'targets': self.targets or [],
+            'steps': self.steps
+        }
+
+
+
+class MatchCue(db.Model):
+    __tablename__ = 'match_cues'
+
+    id = db.Column(db.Integer, primary_key= True)
+    name = db.Column(db.String(255))
+    match_time = db.Column(db.Integer, nullable= False, default= 0)  # seconds of match time
+    add_extra_time = db.Column(db.Boolean, default= False)  # shift by the announced extra time
+    action = db.Column(db.String(20), nullable= False, default= 'alert')
+    payload = db.Column(db.JSON)
+    enabled = db.Column(db.Boolean, default= True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'match_time': self.match_time,
+            'add_extra_time': bool(self.add_extra_time),
+            'action': self.action,
+            'payload': self.payload or {},
+            'enabled': self.enabled is not False
+        }
+
+
+# ===========================
+# Season archive
+# ===========================
+
+class ArchivedMatch(db.Model):
+    __tablename__ = 'archived_matches'
+    __table_args__ = (
+        db.Index('ix_archived_matches_teams', 'team1_name', 'team2_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key= True)
+    played_at = db.Column(db.DateTime, nullable= False, index= True)
+
+    team1_name = db.Column(db.String(255))
+    team2_name = db.Column(db.String(255))
+    team1_score = db.Column(db.Integer, default= 0)
+    team2_score = db.Column(db.Integer, default= 0)
+
+    duration = db.Column(db.Integer)  # match seconds on the clock when archived
+    stats = db.Column(db.JSON)  # team aggregates and counters
+
+    lineups = db.relationship('ArchivedLineup', backref= 'match', cascade= 'all, delete-orphan')
+    events = db.relationship('ArchivedEvent', backref= 'match', cascade= 'all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'played_at': self.played_at.isoformat(),
+            'team1_name': self.team1_name,
+            'team2_name': self.team2_name,
+            'team1_score': self.team1_score,
+            'team2_score': self.team2_score,
+            'duration': self.duration,
+            'stats': self.stats
+        }
+
+
+class ArchivedLineup(db.Model):
+    __tablename__ = 'archived_lineups'
+    __table_args__ = (
+        db.Index('ix_archived_lineups_player', 'player_name', 'team_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key= True)
+    match_id = db.Column(db.Integer, db.ForeignKey('archived_matches.id'), nullable= False, index= True)
+
+    team = db.Column(db.String(10))  # team1 / team2
+    team_name = db.Column(db.String(255))
+    number = db.Column(db.Integer)
+    player_name = db.Column(db.String(255))
+    starter = db.Column(db.Boolean, default= False)
+
+    def to_dict(self):
+        return {
+            'team': self.team,
+            'team_name': self.team_name,
+            'number': self.number,
+            'player_name': self.player_name,
+            'starter': self.starter
+        }
+
+
+class ArchivedEvent(db.Model):
+    __tablename__ = 'archived_events'
+    __table_args__ = (
+        # top scorers / most carded: filter on kind, group by player
+        db.Index('ix_archived_events_kind_player', 'kind', 'player_name', 'team_name'),
+        # career numbers: filter on player, group by kind
+        db.Index('ix_archived_events_player_kind', 'player_name', 'team_name', 'kind'),
+    )
+
+    id = db.Column(db.Integer, primary_key= True)
+    match_id = db.Column(db.Integer, db.ForeignKey('archived_matches.id'), nullable= False, index= True)
+
+    kind = db.Column(db.String(20))  # goal, yellow_card, red_card, sub_in, sub_out
+    team = db.Column(db.String(10))
+    team_name = db.Column(db.String(255))
+    number = db.Column(db.Integer)
+    player_name = db.Column(db.String(255))
+    match_time = db.Column(db.Float)
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'team': self.team,
+            'team_name': self.team_name,
+            'number': self.number,
+            'player_name': self.player_name,
+            'match_time': self.match_time
         }
+
+def upgrade_schema():
+    """Add columns introduced after a table was first created.
+
+    db.create_all() only creates missing tables, so databases from older
+    versions are brought up to date with ALTER TABLE ... ADD COLUMN.
+    """
+    inspector = db.inspect(db.engine)
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect= db.engine.dialect)
+            db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+    db.session.commit()
+
+
+def seed_defaults():
+    """Create Team 1 and 2 and their formations if missing, in one transaction.
+
+    Two reads and no writes when everything already exists.
+    """
+    team_ids = (1, 2)
+    teams = {team_id for (team_id,) in db.session.query(Team.id).filter(Team.id.in_(team_ids))}
+    formations = {team_id for (team_id,) in db.session.query(Formation.team_id).filter(Formation.team_id.in_(team_ids))}
+
+    missing_teams = [Team(id= team_id) for team_id in team_ids if team_id not in teams]
+    missing_formations = [
+        Formation(team_id= team_id, goalkeeper= None, lines= [])
+        for team_id in team_ids if team_id not in formations
+    ]
+    if not missing_teams and not missing_formations:
+        return
+
+    db.session.add_all(missing_teams)
+    db.session.flush()
+    db.session.add_all(missing_formations)
+    db.session.commit()
@@ -0,0 +1,63 @@
+"""
+Pitch layout for the formation graphic.
+
+`Formation.lines` holds shirt numbers per line (defence to attack) and
+`goalkeeper` one number. compute_layout() turns them, with the team's
+players, into what the overlay draws: the goalkeeper slot, the vertical
+position of every non-empty line with its players' numbers and names, and
+the starting / substitute lists. Overlays render it as is, so every source
+shows the same graphic without parsing the formation themselves.
+
+Layouts are cached by services/roster_cache.py per formation version and
+roster load; `key` identifies one, so overlays can skip re-rendering a
+layout they already show.
+"""
+
+
+# Vertical position of each line on the pitch, by number of non-empty lines
+LINE_POSITIONS = {
+    1: ['55%'],
+    2: ['38%', '68%'],
+    3: ['30%', '52%', '74%'],
+    4: ['25%', '42%', '59%', '76%'],
+}
+
+
+def _slot(number, names):
+    return {'number': number, 'name': names.get(str(number), f"Player {number}")}
+
+
+def compute_layout(formation, players, key= None):
+    """Layout for formation (Formation.to_dict()) and the team's players (Player.to_dict() list)."""
+    formation = formation or {}
+    names = {str(player['number']): player['name'] for player in players if player['number'] is not None}
+
+    goalkeeper = formation.get('goalkeeper')
+    # (line number, numbers) for the non-empty lines
+    lines = [(index + 1, line) for index, line in enumerate(formation.get('lines') or []) if line]
+    positions = LINE_POSITIONS.get(len(lines), [])
+
+    starting = {str(goalkeeper)} if goalkeeper else set()
+    for _, line in lines:
+        starting.update(str(number) for number in line)
+
+    roster = sorted(
+        ({'number': player['number'], 'name': player['name']} for player in players),
+        key= lambda player: (player['number'] is None, player['number'] or 0)
+    )
+
+    return {
+        'key': key,
+        'version': formation.get('version'),
+        'goalkeeper': _slot(goalkeeper, names) if goalkeeper else None,
+        'lines': [
+            {
+                'line': line_number,
+                'top': positions[index] if index < len(positions) else None,
+                'players': [_slot(number, names) for number in line],
+            }
+            for index, (line_number, line) in enumerate(lines)
+        ],
+        'starters': [player for player in roster if str(player['number']) in starting],
+        'subs': [player for player in roster if str(player['number']) not in starting],
+    }
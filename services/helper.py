@@ -1,8 +1,14 @@
 import socket
+import time
 
-from config import ALLOWED_MEDIA_EXTENSIONS
+from config import ALLOWED_MEDIA_EXTENSIONS, LOCAL_IP_CACHE_TTL
 
-def get_local_ip():
+
+# Cached result of the last local IP lookup: (ip, resolved_at)
+_local_ip_cache = (None, 0.0)
+
+
+def _resolve_local_ip():
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
@@ -13,5 +19,19 @@ def get_local_ip():
         return "127.0.0.1"
 
 
+def get_local_ip(refresh= False):
+    """Return the LAN IP of this machine, re-resolved at most every LOCAL_IP_CACHE_TTL seconds."""
+    global _local_ip_cache
+
+    ip, resolved_at = _local_ip_cache
+    now = time.monotonic()
+
+    if refresh or ip is None or now - resolved_at > LOCAL_IP_CACHE_TTL:
+        ip = _resolve_local_ip()
+        _local_ip_cache = (ip, now)
+
+    return ip
+
+
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_MEDIA_EXTENSIONS
\ No newline at end of file
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_MEDIA_EXTENSIONS
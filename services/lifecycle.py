@@ -0,0 +1,51 @@
+"""
+Connection lifecycle hooks.
+
+Flask-SocketIO keeps a single handler per event, so a second
+`@socketio.on('disconnect')` silently replaces the first. Modules that need
+to react to clients connecting or leaving register a hook here instead, and
+register_lifecycle_socketio() installs the one connect/disconnect handler
+that calls them all.
+"""
+
+import logging
+
+from flask import request
+
+
+logger = logging.getLogger(__name__)
+
+
+_connect_hooks = []
+_disconnect_hooks = []
+
+
+def on_connect(hook):
+    """Call hook(sid) when a client connects. Usable as a decorator."""
+    _connect_hooks.append(hook)
+    return hook
+
+
+def on_disconnect(hook):
+    """Call hook(sid) when a client disconnects. Usable as a decorator."""
+    _disconnect_hooks.append(hook)
+    return hook
+
+
+def _run(hooks, sid):
+    for hook in hooks:
+        try:
+            hook(sid)
+        except Exception as e:
+            logger.exception(f"Error in {hook.__name__} lifecycle hook: {e}", extra= {'sid': sid})
+
+
+def register_lifecycle_socketio(socketio):
+
+    @socketio.on('connect')
+    def handle_connect(auth= None):
+        _run(_connect_hooks, request.sid)
+
+    @socketio.on('disconnect')
+    def handle_disconnect(*args):
+        _run(_disconnect_hooks, request.sid)
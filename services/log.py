@@ -0,0 +1,167 @@
+"""
+Server logging.
+
+configure_logging() installs one queue handler on the root logger. Records
+are put on a queue by the thread that logs them and written by a listener
+thread, so a slow console or disk never holds up a Socket.IO handler or
+the broadcast path (the same setup as the shortcut client).
+
+Records are written as JSON lines (LOG_FORMAT=text for plain lines) with
+the Socket.IO event and sid, or the HTTP path, of the request that logged
+them, plus any `extra=` fields:
+
+    {"ts": "...", "level": "WARNING", "logger": "services.rate_limit", "msg": "Rate limiting trigger-goal", "event": "trigger-goal", "sid": "..."}
+
+Levels are set per category (the top-level logger name: `blueprints`,
+`services`, `engineio`, `socketio`, `werkzeug`...) in LOG_LEVELS, and
+LOG_LEVELS="services=DEBUG,engineio=INFO" overrides them without editing
+config.py. Per-packet Socket.IO / engine.io logs are off unless
+LOG_PACKET_SAMPLE is set; then only that fraction of them is kept
+(warnings and errors always are).
+"""
+
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+
+from flask import has_request_context, request
+
+from config import LOG_FORMAT, LOG_FILE, LOG_LEVEL, LOG_LEVELS, LOG_PACKET_SAMPLE
+
+
+PACKET_LOGGERS = ('engineio.server', 'socketio.server')
+
+# LogRecord attributes that are not `extra=` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec= 'milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default= str)
+
+
+class _ContextFilter(logging.Filter):
+    """Adds the Socket.IO event and sid, or the HTTP path, of the current request."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        sid = getattr(request, 'sid', None)
+        if sid is not None:
+            event = getattr(request, 'event', None)
+            if getattr(record, 'event', None) is None and isinstance(event, dict):
+                record.event = event.get('message')
+            if getattr(record, 'sid', None) is None:
+                record.sid = sid
+        elif getattr(record, 'path', None) is None:
+            record.path = request.path
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Keeps the record's fields for the JSON formatter; only the message and traceback are rendered here."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _SampleFilter(logging.Filter):
+    """Keeps one in `every` INFO/DEBUG records; warnings and errors always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate))
+        self._count = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if next(self._count) % self.every:
+            return False
+        record.sample_every = self.every
+        return True
+
+
+def category_levels():
+    """LOG_LEVELS with the LOG_LEVELS environment overrides applied."""
+    levels = dict(LOG_LEVELS)
+    for item in os.getenv('LOG_LEVELS', '').split(','):
+        category, _, level = item.partition('=')
+        if category.strip() and level.strip():
+            levels[category.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Route every logger through the background writer. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE, encoding= 'utf-8'))
+
+    formatter = JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    for category, level in category_levels().items():
+        logging.getLogger(category).setLevel(level)
+
+    for name in PACKET_LOGGERS:
+        packet_logger = logging.getLogger(name)
+        if LOG_PACKET_SAMPLE > 0:
+            packet_logger.setLevel(logging.INFO)
+            if LOG_PACKET_SAMPLE < 1:
+                packet_logger.addFilter(_SampleFilter(LOG_PACKET_SAMPLE))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level= True)
+    _listener.start()
+
+
+def packet_loggers():
+    """(socketio logger, engineio logger) to hand to SocketIO()."""
+    return logging.getLogger('socketio.server'), logging.getLogger('engineio.server')
+
+
+def stop_logging():
+    """Write out what is still queued. Called at shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,244 @@
+"""
+Serialized match-state engine.
+
+Timer and score mutations from every socket handler go through a single
+MatchState instance. Commands run one at a time under a lock, bump a version
+counter (plus `score_version` or `timer_version` for the part they changed),
+and can carry:
+
+- `idempotency_key`: a client-chosen id. Re-sending the same key returns the
+  original result instead of applying the command twice.
+- `expected_version`: compare-and-set against the version of the part the
+  command changes. A goal is rejected when the score has changed since the
+  client last saw it (e.g. a double tap from a laggy phone carries the same
+  score version twice); timer commands from other controllers do not
+  affect it.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import MATCH_STATE_DEDUPE_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+
+# Commands that change the score; the others change the timer
+SCORE_COMMANDS = ('goal', 'cancel-goal')
+
+
+def elapsed_seconds(timer_state, now= None):
+    """Match seconds shown by a timer state at monotonic time now."""
+    offset = timer_state.get('timer_offset') or 0
+    if timer_state.get('timer_running') and timer_state.get('timer_anchor') is not None:
+        return offset + ((time.monotonic() if now is None else now) - timer_state['timer_anchor'])
+    return offset
+
+
+class CommandResult:
+
+    def __init__(self, success, version, duplicate= False, error= None, part_versions= None):
+        self.success = success
+        self.version = version
+        self.duplicate = duplicate
+        self.error = error
+        self.part_versions = part_versions or {}
+
+    def to_dict(self):
+        result = {'success': self.success, 'version': self.version, **self.part_versions}
+        if self.duplicate:
+            result['duplicate'] = True
+        if self.error:
+            result['error'] = self.error
+        return result
+
+
+class MatchState:
+
+    def __init__(self, timer_state, score_state, dedupe_size= MATCH_STATE_DEDUPE_SIZE):
+        self.timer_state = timer_state
+        self.score_state = score_state
+        self.version = 0
+        self.score_version = 0
+        self.timer_version = 0
+
+        self._lock = threading.RLock()
+        self._dedupe_size = dedupe_size
+        self._results = OrderedDict()  # idempotency key -> CommandResult
+        self._listeners = []
+
+        self._commands = {
+            'start-timer': self._start_timer,
+            'stop-timer': self._stop_timer,
+            'reset-timer': self._reset_timer,
+            'set-timer': self._set_timer,
+            'set-extra-time': self._set_extra_time,
+            'goal': self._goal,
+            'cancel-goal': self._cancel_goal,
+        }
+
+    # ===========================
+    # Snapshots
+    # ===========================
+
+    def timer_snapshot(self):
+        """Timer state plus the server clock reading it refers to.
+
+        All timer times come from time.monotonic(), so wall-clock adjustments
+        on the server never make the match clock jump.
+        """
+        with self._lock:
+            return {**self.timer_state, 'server_time': time.monotonic(), 'version': self.version, 'timer_version': self.timer_version}
+
+    def match_time(self):
+        """Elapsed match seconds right now."""
+        with self._lock:
+            return elapsed_seconds(self.timer_state)
+
+    def score_snapshot(self):
+        with self._lock:
+            return {**self.score_state, 'version': self.version, 'score_version': self.score_version}
+
+    def subscribe(self, listener):
+        """Call listener(command, timer_state, score_state) after every command that changed state.
+
+        It runs with the lock held, so it must be quick and must not call back into MatchState.
+        """
+        self._listeners.append(listener)
+
+    # ===========================
+    # Command execution
+    # ===========================
+
+    def execute(self, command, data= None, idempotency_key= None, expected_version= None, on_commit= None):
+        """Apply a command atomically.
+
+        on_commit(result) runs while the lock is still held, so broadcasts
+        leave the server in version order.
+        """
+        with self._lock:
+            if idempotency_key is not None and idempotency_key in self._results:
+                previous = self._results[idempotency_key]
+                return CommandResult(previous.success, previous.version, duplicate= True, error= previous.error, part_versions= previous.part_versions)
+
+            handler = self._commands.get(command)
+            if handler is None:
+                return CommandResult(False, self.version, error= f"Unknown command: {command}")
+
+            part = 'score_version' if command in SCORE_COMMANDS else 'timer_version'
+
+            try:
+                if expected_version is not None:
+                    try:
+                        expected_version = int(expected_version)
+                    except (TypeError, ValueError):
+                        raise ValueError(f"Invalid expected_version: {expected_version!r}")
+                    if expected_version != getattr(self, part):
+                        return CommandResult(False, self.version, error= 'Version conflict', part_versions= self._part_versions())
+                changed = handler(data or {})
+            except (TypeError, ValueError) as e:
+                return CommandResult(False, self.version, error= str(e), part_versions= self._part_versions())
+
+            if changed:
+                self.version += 1
+                setattr(self, part, getattr(self, part) + 1)
+            result = CommandResult(True, self.version, part_versions= self._part_versions())
+
+            if idempotency_key is not None:
+                self._results[idempotency_key] = result
+                if len(self._results) > self._dedupe_size:
+                    self._results.popitem(last= False)
+
+            if changed:
+                # The command is applied already; a failing listener must not keep it from being broadcast
+                for listener in self._listeners:
+                    try:
+                        listener(command, dict(self.timer_state), dict(self.score_state))
+                    except Exception as e:
+                        logger.exception(f"Error in match state listener after {command}: {e}")
+
+            if changed and on_commit:
+                on_commit(result)
+
+            return result
+
+    # ===========================
+    # Commands (called with the lock held, return whether state changed)
+    # ===========================
+
+    def _start_timer(self, data):
+        if self.timer_state['timer_running']:
+            return False
+
+        self.timer_state['timer_running'] = True
+        self.timer_state['timer_anchor'] = time.monotonic()
+        return True
+
+    def _stop_timer(self, data):
+        if not self.timer_state['timer_running']:
+            return False
+
+        now = time.monotonic()
+        elapsed = (now - self.timer_state['timer_anchor']) + self.timer_state['timer_offset']
+
+        self.timer_state['timer_running'] = False
+        self.timer_state['timer_anchor'] = now
+        self.timer_state['timer_offset'] = elapsed
+        return True
+
+    def _reset_timer(self, data):
+        self.timer_state['timer_running'] = False
+        self.timer_state['timer_anchor'] = time.monotonic()
+        self.timer_state['timer_offset'] = 0
+        return True
+
+    def _set_timer(self, data):
+        desired_seconds = int(data.get('set'))
+
+        self.timer_state['timer_running'] = False
+        self.timer_state['timer_anchor'] = time.monotonic()
+        self.timer_state['timer_offset'] = desired_seconds
+        return True
+
+    def _set_extra_time(self, data):
+        extra_time = int(data.get('extra-time'))
+        if extra_time < 0:
+            raise ValueError('extra-time must not be negative')
+
+        self.timer_state['extra_time'] = extra_time
+        return True
+
+    def _goal(self, data):
+        key = self._score_key(data)
+        self.score_state[key] += 1
+        return True
+
+    def _part_versions(self):
+        return {'score_version': self.score_version, 'timer_version': self.timer_version}
+
+    def _cancel_goal(self, data):
+        key = self._score_key(data)
+        if self.score_state[key] <= 0:
+            return False
+        self.score_state[key] -= 1
+        return True
+
+    @staticmethod
+    def _score_key(data):
+        team = data.get('team')
+        if team not in ('team1', 'team2'):
+            raise ValueError(f"Unknown team: {team}")
+        return f"{team}_score"
+
+
+def command_options(data):
+    """Extract the idempotency/compare-and-set options a client sent with a command."""
+    if not isinstance(data, dict):
+        return {}
+    return {
+        'idempotency_key': data.get('idempotency_key'),
+        'expected_version': data.get('expected_version'),
+    }
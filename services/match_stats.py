@@ -0,0 +1,254 @@
+"""
+Incremental match statistics.
+
+Every stats-relevant input (score changes from trigger-goal / cancel-goal,
+goal / card / substitution events from trigger-event, and operator counters
+such as corners or shots) is appended to an in-memory event log and applied
+to the running aggregates in O(1). /stats and the stats lower-thirds read the
+aggregates directly and never rescan the log.
+
+Team goals follow the scoreboard. Player goals come from goal events, and
+each one is tied to a scoreboard goal (GoalAttributions): a cancel-goal
+withdraws the scorer of the goal it cancels, and only if that goal had one.
+
+recompute() replays the whole log into fresh aggregates with the same apply
+function and compares them with the live ones, as a consistency check.
+"""
+
+import threading
+import time
+
+
+TEAMS = ('team1', 'team2')
+CARD_TYPES = ('yellow', 'red')
+
+
+class GoalAttributions:
+    """Scorers of one team's scoreboard goals, so a cancelled goal withdraws its own scorer.
+
+    Every +1 on the scoreboard adds a goal without a scorer. A goal event
+    credits the oldest goal that has none yet, or, when it was sent before
+    the score change, waits for the next one. A -1 removes the newest goal
+    and returns its scorer (None if it had none).
+    """
+
+    def __init__(self):
+        self.goals = []  # scorer per scoreboard goal (None: not credited), newest last
+        self.waiting = []  # scorers sent before their goal was on the scoreboard
+
+    def score(self):
+        self.goals.append(self.waiting.pop(0) if self.waiting else None)
+
+    def credit(self, scorer):
+        for index, current in enumerate(self.goals):
+            if current is None:
+                self.goals[index] = scorer
+                return
+        self.waiting.append(scorer)
+
+    def cancel(self):
+        return self.goals.pop() if self.goals else None
+
+    def __eq__(self, other):
+        return isinstance(other, GoalAttributions) and (self.goals, self.waiting) == (other.goals, other.waiting)
+
+
+def _empty_aggregates():
+    return {
+        'teams': {team: {
+            'goals': 0,
+            'yellow_cards': 0,
+            'red_cards': 0,
+            'substitutions': 0,
+            'counters': {},
+        } for team in TEAMS},
+        'players': {},  # player_id -> per-player counters
+        'scorers': {team: GoalAttributions() for team in TEAMS},
+    }
+
+
+def _player(aggregates, player_id, team):
+    players = aggregates['players']
+    if player_id not in players:
+        players[player_id] = {
+            'player_id': player_id,
+            'team': team,
+            'goals': 0,
+            'yellow_cards': 0,
+            'red_cards': 0,
+            'subbed_in': 0,
+            'subbed_out': 0,
+        }
+    return players[player_id]
+
+
+def apply_entry(aggregates, entry):
+    """Apply one log entry to aggregates in O(1)."""
+    kind = entry['kind']
+    data = entry['data']
+    team = aggregates['teams'][data['team']]
+
+    if kind == 'score':
+        team['goals'] += data['delta']
+        scorers = aggregates['scorers'][data['team']]
+        for _ in range(abs(data['delta'])):
+            if data['delta'] > 0:
+                scorers.score()
+            else:
+                scorer = scorers.cancel()
+                if scorer is not None:
+                    aggregates['players'][scorer]['goals'] -= 1
+
+    elif kind == 'goal':
+        _player(aggregates, data['player_id'], data['team'])['goals'] += 1
+        aggregates['scorers'][data['team']].credit(data['player_id'])
+
+    elif kind == 'card':
+        field = f"{data['card_type']}_cards"
+        team[field] += 1
+        _player(aggregates, data['player_id'], data['team'])[field] += 1
+
+    elif kind == 'substitution':
+        team['substitutions'] += 1
+        _player(aggregates, data['player_id_out'], data['team'])['subbed_out'] += 1
+        _player(aggregates, data['player_id_in'], data['team'])['subbed_in'] += 1
+
+    elif kind == 'counter':
+        counters = team['counters']
+        counters[data['counter']] = counters.get(data['counter'], 0) + data['delta']
+
+
+def _player_id(data, key):
+    try:
+        return int(data[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {key}: {data[key]!r}")
+
+
+def parse_event(data):
+    """Translate a trigger-event payload into (kind, data), or None if it does not count.
+
+    Raises ValueError for player ids that are not numbers.
+    """
+    event_type = data.get('type')
+    team = data.get('team')
+    if team not in TEAMS:
+        return None
+
+    if event_type == 'goal' and data.get('player_id') is not None:
+        return 'goal', {'team': team, 'player_id': _player_id(data, 'player_id')}
+
+    if event_type == 'card' and data.get('player_id') is not None and data.get('card_type') in CARD_TYPES:
+        return 'card', {'team': team, 'player_id': _player_id(data, 'player_id'), 'card_type': data['card_type']}
+
+    if event_type == 'substitution' and data.get('player_id_out') is not None and data.get('player_id_in') is not None:
+        return 'substitution', {
+            'team': team,
+            'player_id_out': _player_id(data, 'player_id_out'),
+            'player_id_in': _player_id(data, 'player_id_in'),
+        }
+
+    return None
+
+
+class MatchStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._log = []
+        self._aggregates = _empty_aggregates()
+        self.version = 0
+
+    # ===========================
+    # Inputs
+    # ===========================
+
+    def record_score(self, team, delta, match_time= None):
+        if team not in TEAMS:
+            raise ValueError(f"Unknown team: {team}")
+        return self._record('score', {'team': team, 'delta': delta}, match_time)
+
+    def record_event(self, data, match_time= None):
+        """Record a trigger-event payload. Returns the log entry, or None for events that do not count."""
+        parsed = parse_event(data or {})
+        if parsed is None:
+            return None
+        return self._record(*parsed, match_time)
+
+    def record_counter(self, team, counter, delta= 1, match_time= None):
+        if team not in TEAMS:
+            raise ValueError(f"Unknown team: {team}")
+        if not isinstance(counter, str) or not counter:
+            raise ValueError('counter must be a name such as "corners"')
+        return self._record('counter', {'team': team, 'counter': counter, 'delta': int(delta)}, match_time)
+
+    def reset(self):
+        """Clear the log and aggregates for a new match."""
+        with self._lock:
+            self._log = []
+            self._aggregates = _empty_aggregates()
+            self.version += 1
+
+    def _record(self, kind, data, match_time):
+        entry = {
+            'seq': None,
+            'kind': kind,
+            'data': data,
+            'match_time': match_time,
+            'recorded_at': time.time(),
+        }
+        with self._lock:
+            entry['seq'] = len(self._log)
+            self._log.append(entry)
+            apply_entry(self._aggregates, entry)
+            self.version += 1
+        return entry
+
+    # ===========================
+    # Reads
+    # ===========================
+
+    def snapshot(self):
+        """Current aggregates (O(players), independent of the number of events)."""
+        with self._lock:
+            return {
+                'version': self.version,
+                'events': len(self._log),
+                'teams': {team: {**values, 'counters': dict(values['counters'])}
+                          for team, values in self._aggregates['teams'].items()},
+                'players': [dict(player) for player in self._aggregates['players'].values()],
+            }
+
+    def team(self, team):
+        with self._lock:
+            values = self._aggregates['teams'][team]
+            return {**values, 'counters': dict(values['counters'])}
+
+    def player(self, player_id):
+        with self._lock:
+            player = self._aggregates['players'].get(player_id)
+            return dict(player) if player else None
+
+    def log(self):
+        with self._lock:
+            return list(self._log)
+
+    def recompute(self):
+        """Rebuild the aggregates from the log and check them against the live ones."""
+        started = time.perf_counter()
+        with self._lock:
+            log = list(self._log)
+            live = self._aggregates
+            rebuilt = _empty_aggregates()
+            for entry in log:
+                apply_entry(rebuilt, entry)
+            consistent = rebuilt == live
+
+        return {
+            'consistent': consistent,
+            'events': len(log),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+match_stats = MatchStats()
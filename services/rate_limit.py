@@ -0,0 +1,170 @@
+"""
+Per-client rate limiting of Socket.IO commands.
+
+Every command handler goes to the match state, the database and usually a
+broadcast to every client, so one stuck button or a misbehaving tab
+hammering `trigger-goal` slows the overlays of everyone else.
+
+Each (client, event) pair gets a token bucket: `rate` tokens per second up
+to `burst`. A call takes one token; without a token the handler is not run
+and the caller only gets `{'success': False, 'error': 'Rate limited',
+'retry_after': s}` through its acknowledgement (nothing is sent when it
+did not ask for one). Limits are per event in RATE_LIMITS, RATE_LIMIT_DEFAULT
+for the others; None means unlimited.
+
+Edits in RATE_LIMIT_DEFERRED (`modify-team` from a colour picker being
+dragged, `modify-player` per keystroke...) are last-write-wins, so dropping
+the end of a burst would leave an old value behind. A rejected call there
+is kept instead (only the latest per client and event) and run as soon as
+a token frees up; its acknowledgement says `'deferred': True`.
+
+The limiter wraps the handlers the register_*_socketio() functions
+installed, so install it after them. Set RATE_LIMIT=0 to turn it off (the
+replay benchmark does, since it sends recorded traffic faster than live).
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from config import RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_DEFERRED
+from services.lifecycle import on_disconnect
+
+
+logger = logging.getLogger(__name__)
+
+
+# Handled by services/lifecycle.py, never limited
+LIFECYCLE_EVENTS = ('connect', 'disconnect')
+
+
+class RateLimiter:
+
+    def __init__(self, limits= RATE_LIMITS, default= RATE_LIMIT_DEFAULT, deferred= RATE_LIMIT_DEFERRED):
+        self.limits = dict(limits)
+        self.default = default
+        self.deferred = frozenset(deferred)
+
+        self.socketio = None
+
+        self._lock = threading.Lock()
+        self._buckets = {}  # sid -> {event: [tokens, last refill, rejecting]}
+
+        self._allowed = 0
+        self._rejected = {}  # event -> count
+        self._latest = {}  # (sid, event) -> args of the deferred call
+        self._deferred_runs = 0
+
+    def init_app(self, socketio, enabled= True):
+        if not enabled:
+            return
+        self.socketio = socketio
+        on_disconnect(self._forget)
+
+        for namespace, handlers in socketio.server.handlers.items():
+            for event, handler in handlers.items():
+                if event not in LIFECYCLE_EVENTS and self.limit(event) is not None:
+                    handlers[event] = self._limited(event, handler)
+
+    def limit(self, event):
+        """(rate, burst) for event, or None when it is not limited."""
+        return self.limits.get(event, self.default)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._buckets.pop(sid, None)
+            for key in [key for key in self._latest if key[0] == sid]:
+                del self._latest[key]
+
+    def _limited(self, event, handler):
+        rate, burst = self.limit(event)
+
+        @wraps(handler)
+        def wrapper(sid, *args):
+            retry_after = self.take(sid, event, rate, burst)
+            if retry_after is None:
+                if event in self.deferred:
+                    self._supersede(sid, event)
+                return handler(sid, *args)
+            if event in self.deferred:
+                self._defer(sid, event, args, handler, rate, burst, retry_after)
+                return {'success': False, 'error': 'Rate limited', 'retry_after': round(retry_after, 2), 'deferred': True}
+            return {'success': False, 'error': 'Rate limited', 'retry_after': round(retry_after, 2)}
+
+        return wrapper
+
+    def _defer(self, sid, event, args, handler, rate, burst, retry_after):
+        """Keep args as the call to run once a token frees up, replacing an older one."""
+        with self._lock:
+            scheduled = (sid, event) in self._latest
+            self._latest[(sid, event)] = args
+        if not scheduled:
+            self.socketio.start_background_task(self._run_deferred, sid, event, handler, rate, burst, retry_after)
+
+    def _supersede(self, sid, event):
+        """A newer call got through, so a deferred older one must not run after it."""
+        with self._lock:
+            self._latest.pop((sid, event), None)
+
+    def _run_deferred(self, sid, event, handler, rate, burst, delay):
+        while delay is not None:
+            self.socketio.sleep(delay)
+            with self._lock:
+                if (sid, event) not in self._latest:
+                    return  # disconnected, or superseded by a newer call
+            delay = self.take(sid, event, rate, burst, deferred= True)
+
+        with self._lock:
+            args = self._latest.pop((sid, event), None)
+            if args is not None:
+                self._deferred_runs += 1
+        if args is None:
+            return
+
+        try:
+            handler(sid, *args)
+        except Exception as e:
+            logger.exception(f"Error running deferred {event}: {e}", extra= {'event': event, 'sid': sid})
+
+    def take(self, sid, event, rate, burst, deferred= False):
+        """Take a token. Returns None if allowed, else the seconds until the next token."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(sid, {}).get(event)
+            if bucket is None:
+                bucket = self._buckets[sid][event] = [float(burst), now, False]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                bucket[2] = False
+                self._allowed += 1
+                return None
+
+            if not deferred:
+                self._rejected[event] = self._rejected.get(event, 0) + 1
+            first = not bucket[2]
+            bucket[2] = True
+            retry_after = (1 - bucket[0]) / rate
+
+        if first:
+            logger.warning(f"Rate limiting {event} from {sid}", extra= {'event': event, 'sid': sid})
+        return retry_after
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': self._allowed,
+                'rejected': sum(self._rejected.values()),
+                'rejected_by_event': dict(self._rejected),
+                'deferred_runs': self._deferred_runs,
+                'limited_clients': sum(
+                    1 for buckets in self._buckets.values() if any(bucket[2] for bucket in buckets.values())
+                ),
+            }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,184 @@
+"""
+Match traffic recorder.
+
+When RECORD_TRAFFIC points at a file, every inbound Socket.IO event and HTTP
+request is appended to it as one JSON line with its start time (seconds
+since recording began), the client it came from and how long the server took
+to handle it. A `.gz` path is written gzip-compressed.
+
+The first line holds a snapshot of the database when recording started and
+the last one (written by stop() at shutdown) the final match state, so
+benchmarks/replay_match.py can rebuild the starting point, drive a fresh
+server with the same traffic and check that it ends in the same state.
+
+Socket.IO events are recorded by wrapping the handlers already registered
+on the server, so install it after every register_*_socketio() call (and
+before the rate limiter, so rejected calls are not recorded).
+Connections come from the lifecycle hooks. Static files are not recorded.
+
+Line shapes:
+    {"start": iso, "version": APP_VERSION, "snapshot": {...}}
+    {"t": 0.51, "c": 1, "e": "connect"}
+    {"t": 3.20, "c": 1, "e": "trigger-goal", "a": [{...}], "ms": 0.42}
+    {"t": 4.00, "m": "POST", "p": "/teams/1/roster", "b": {...}, "ms": 3.1}
+    {"t": 5400.0, "end": {...state...}}
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import g, request
+
+from config import APP_VERSION
+from services.lifecycle import on_connect, on_disconnect
+
+
+logger = logging.getLogger(__name__)
+
+
+LIFECYCLE_EVENTS = ('connect', 'disconnect')
+
+
+def state_digest(match_state):
+    """The state a replay has to reproduce: score, timer, statistics and database."""
+    from blueprints.backup import serialize_database
+    from services.match_stats import match_stats
+
+    timer = match_state.timer_snapshot()
+    score = match_state.score_snapshot()
+    database = serialize_database()
+    for key in ('version', 'exported_at'):
+        database.pop(key, None)
+
+    return {
+        'score': {'team1_score': score['team1_score'], 'team2_score': score['team2_score']},
+        'timer': {
+            'timer_running': timer['timer_running'],
+            'extra_time': timer['extra_time'],
+            'elapsed': round(match_state.match_time(), 3),
+        },
+        'stats': match_stats.snapshot()['teams'],
+        'database': database,
+    }
+
+
+class TrafficRecorder:
+
+    def __init__(self):
+        self.path = None
+        self.match_state = None
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._started = None
+        self._clients = {}  # sid -> client number
+        self.records = 0
+
+    def init_app(self, app, socketio, match_state, path):
+        """Start recording to path (no-op when path is empty)."""
+        if not path:
+            return
+
+        self.path = path
+        self.match_state = match_state
+        self._file = gzip.open(path, 'wt', encoding= 'utf-8') if path.endswith('.gz') else open(path, 'w', encoding= 'utf-8')
+        self._started = time.monotonic()
+
+        with app.app_context():
+            self._write({'start': datetime.now().isoformat(), 'version': APP_VERSION, 'snapshot': state_digest(match_state)['database']})
+
+        self._wrap_socketio(socketio)
+        on_connect(self._on_connect)
+        on_disconnect(self._on_disconnect)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        logger.info(f"Recording match traffic to {path}")
+
+    def stop(self, app):
+        """Write the final state and close the recording."""
+        if self._file is None:
+            return
+        with app.app_context():
+            end = state_digest(self.match_state)
+        self._write({'t': self._now(), 'end': end})
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    # ===========================
+    # Capture
+    # ===========================
+
+    def _now(self):
+        return round(time.monotonic() - self._started, 4)
+
+    def _write(self, record):
+        line = json.dumps(record, separators= (',', ':'), default= str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.records += 1
+
+    def _on_connect(self, sid):
+        with self._lock:
+            self._clients[sid] = len(self._clients) + 1
+            client = self._clients[sid]
+        self._write({'t': self._now(), 'c': client, 'e': 'connect'})
+
+    def _on_disconnect(self, sid):
+        self._write({'t': self._now(), 'c': self._clients.get(sid), 'e': 'disconnect'})
+
+    def _wrap_socketio(self, socketio):
+        for namespace, handlers in socketio.server.handlers.items():
+            for event, handler in handlers.items():
+                if event not in LIFECYCLE_EVENTS:
+                    handlers[event] = self._recording(event, handler)
+
+    def _recording(self, event, handler):
+
+        @wraps(handler)
+        def wrapper(sid, *args):
+            t = self._now()
+            started = time.perf_counter()
+            try:
+                return handler(sid, *args)
+            finally:
+                self._write({
+                    't': t,
+                    'c': self._clients.get(sid),
+                    'e': event,
+                    'a': list(args),
+                    'ms': round((time.perf_counter() - started) * 1000, 3),
+                })
+
+        return wrapper
+
+    def _before_request(self):
+        g.recorder_t = self._now()
+        g.recorder_started = time.perf_counter()
+
+    def _after_request(self, response):
+        if request.path.startswith('/static/'):
+            return response
+
+        record = {
+            't': g.recorder_t,
+            'm': request.method,
+            'p': request.full_path.rstrip('?'),
+            'ms': round((time.perf_counter() - g.recorder_started) * 1000, 3),
+        }
+        if request.is_json:
+            record['b'] = request.get_json(silent= True)
+        elif request.method != 'GET' and request.content_length:
+            record['upload'] = True  # file uploads are not recorded and are skipped on replay
+        self._write(record)
+        return response
+
+
+recorder = TrafficRecorder()
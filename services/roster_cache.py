@@ -0,0 +1,138 @@
+"""
+In-memory roster for enriching overlay events.
+
+`display-event` payloads used to carry only player IDs and a team key, and
+every overlay looked them up in its own players cache, showing "?" on air
+when a roster refetch was still in flight. The server now resolves them at
+emit time: enrich() adds player names and numbers, the team display name
+and colours, and for formations the whole lineup and its precomputed pitch
+layout, so overlays can render the payload as is.
+
+The roster is read from the database once and kept until one of the roster
+invalidations (`update-teams`, `update-players`, `update-formations`,
+`update-roster`) is broadcast; the next enrich() reloads it. Pending
+write-behind edits are flushed first, so a name typed just before a goal
+is already on the graphic.
+"""
+
+import threading
+
+from services.database import Team, Player, Formation
+from services.broadcast import broadcaster
+from services.write_behind import write_behind
+from services.formation_layout import compute_layout
+
+
+ROSTER_EVENTS = ('update-teams', 'update-players', 'update-formations', 'update-roster')
+
+TEAM_IDS = {'team1': 1, 'team2': 2}
+
+# Keys of the resolved player fields per event id field
+PLAYER_FIELDS = {
+    'player_id': 'player',
+    'player_id_out': 'player_out',
+    'player_id_in': 'player_in',
+}
+
+
+class RosterCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._teams = {}  # team id -> Team.to_dict()
+        self._players = {}  # player id -> Player.to_dict()
+        self._formations = {}  # team id -> Formation.to_dict()
+        self._layouts = {}  # layout key -> layout
+        self._version = 0  # bumped on every invalidation
+        self._loaded_version = None
+
+        self.loads = 0
+
+    def init_app(self):
+        for event in ROSTER_EVENTS:
+            broadcaster.listen(event, self.invalidate)
+
+    def invalidate(self, event= None):
+        with self._lock:
+            self._version += 1
+
+    def _ensure_loaded(self):
+        """Reload from the database if an invalidation came in. Needs an app context."""
+        write_behind.flush()
+
+        with self._lock:
+            version = self._version
+            if self._loaded_version == version:
+                return
+
+        teams = {team.id: team.to_dict() for team in Team.query.all()}
+        players = {player.id: player.to_dict() for player in Player.query.all()}
+        formations = {formation.team_id: formation.to_dict() for formation in Formation.query.all()}
+
+        with self._lock:
+            self._teams, self._players, self._formations = teams, players, formations
+            self._layouts = {}
+            self._loaded_version = version
+            self.loads += 1
+
+    # ===========================
+    # Enrichment
+    # ===========================
+
+    def enrich(self, event):
+        """Return a copy of a display-event payload with names, numbers and colours filled in."""
+        if not isinstance(event, dict):
+            return event
+        self._ensure_loaded()
+
+        with self._lock:
+            enriched = dict(event)
+            team_id = TEAM_IDS.get(event.get('team'))
+            team = self._teams.get(team_id, {})
+
+            if team_id is not None:
+                enriched.setdefault('team_name', team.get('name'))
+                enriched.setdefault('team_bg', team.get('bg_color'))
+                enriched.setdefault('team_text', team.get('text_color'))
+
+            for id_field, prefix in PLAYER_FIELDS.items():
+                if event.get(id_field) is None:
+                    continue
+                try:
+                    player = self._players.get(int(event[id_field]))
+                except (TypeError, ValueError):
+                    player = None
+                enriched[f'{prefix}_number'] = player['number'] if player else None
+                enriched[f'{prefix}_name'] = player['name'] if player else None
+
+            if event.get('type') == 'formation' and team_id is not None:
+                formation = self._formations.get(team_id) or {}
+                enriched['manager'] = team.get('manager')
+                enriched['formation'] = {
+                    'goalkeeper': formation.get('goalkeeper'),
+                    'lines': formation.get('lines') or [],
+                }
+                enriched['roster'] = [
+                    {'number': player['number'], 'name': player['name']}
+                    for player in self._players.values() if player['team_id'] == team_id
+                ]
+                enriched['layout'] = self._layout(team_id, formation)
+
+            return enriched
+
+    def _layout(self, team_id, formation):
+        """Layout for a team, computed once per formation version and roster load. Lock held."""
+        key = f"{team_id}:{formation.get('version')}:{self._loaded_version}"
+        if key not in self._layouts:
+            players = [player for player in self._players.values() if player['team_id'] == team_id]
+            self._layouts[key] = compute_layout(formation, players, key)
+        return self._layouts[key]
+
+    def layout(self, team_id):
+        """Current layout for team_id (1 or 2). Needs an app context."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._layout(team_id, self._formations.get(team_id) or {})
+
+
+roster_cache = RosterCache()
@@ -0,0 +1,204 @@
+"""
+Season archive.
+
+When a match ends, archive_match() copies what only lives in the current
+tables or in memory (both teams, their lineups, the final score and the
+player events from the match statistics log) into the archived_* tables.
+Rows store team and player names rather than ids, because the Team/Player
+rows are reused and edited for the next match.
+
+The queries group on indexed columns only:
+- top scorers / most carded: archived_events (kind, player_name, team_name)
+- player careers: archived_events (player_name, team_name, kind) and
+  archived_lineups (player_name, team_name)
+- head-to-head: archived_matches (team1_name, team2_name), both orientations
+so they stay in the millisecond range across seasons of matches.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, or_, and_
+
+from services.database import db, Team, Player, ArchivedMatch, ArchivedLineup, ArchivedEvent
+from services.match_stats import match_stats, GoalAttributions, TEAMS
+from services.write_behind import write_behind
+
+
+EVENT_KINDS = ('goal', 'yellow_card', 'red_card', 'sub_in', 'sub_out')
+
+
+def _starters(formation):
+    if formation is None:
+        return set()
+    numbers = {formation.goalkeeper} if formation.goalkeeper is not None else set()
+    for line in formation.lines or []:
+        numbers.update(line)
+    return numbers
+
+
+def _archived_events(log, players, team_names):
+    """Turn the match statistics log into ArchivedEvent rows."""
+    events = []
+    goals = {team: GoalAttributions() for team in TEAMS}  # goal rows per scoreboard goal
+
+    def event(kind, team, player_id, match_time):
+        player = players.get(player_id)
+        return ArchivedEvent(
+            kind= kind,
+            team= team,
+            team_name= team_names[team],
+            number= player.number if player else None,
+            player_name= player.name if player else None,
+            match_time= match_time
+        )
+
+    for entry in log:
+        data = entry['data']
+        team = data['team']
+
+        if entry['kind'] == 'score':
+            # cancel-goal withdraws the goal row of the goal it cancels, as in match_stats
+            for _ in range(abs(data['delta'])):
+                if data['delta'] > 0:
+                    goals[team].score()
+                else:
+                    row = goals[team].cancel()
+                    if row is not None:
+                        events.remove(row)
+
+        elif entry['kind'] == 'goal':
+            row = event('goal', team, data['player_id'], entry['match_time'])
+            goals[team].credit(row)
+            events.append(row)
+
+        elif entry['kind'] == 'card':
+            events.append(event(f"{data['card_type']}_card", team, data['player_id'], entry['match_time']))
+
+        elif entry['kind'] == 'substitution':
+            events.append(event('sub_out', team, data['player_id_out'], entry['match_time']))
+            events.append(event('sub_in', team, data['player_id_in'], entry['match_time']))
+
+    return events
+
+
+def archive_match(match_state, played_at= None):
+    """Archive the current match in one transaction and return it."""
+    # Names and numbers edited in the last write-behind interval must be archived too
+    write_behind.flush()
+
+    teams = {f'team{team.id}': team for team in Team.query.filter(Team.id.in_((1, 2))).all()}
+    team_names = {key: (teams[key].name if key in teams else None) for key in TEAMS}
+    players = {player.id: player for player in Player.query.all()}
+    score = match_state.score_snapshot()
+    snapshot = match_stats.snapshot()
+
+    match = ArchivedMatch(
+        played_at= played_at or datetime.now(),
+        team1_name= team_names['team1'],
+        team2_name= team_names['team2'],
+        team1_score= score['team1_score'],
+        team2_score= score['team2_score'],
+        duration= int(match_state.match_time()),
+        stats= snapshot['teams']
+    )
+
+    for key, team in teams.items():
+        starters = _starters(team.formation)
+        for player in team.players:
+            match.lineups.append(ArchivedLineup(
+                team= key,
+                team_name= team.name,
+                number= player.number,
+                player_name= player.name,
+                starter= player.number in starters
+            ))
+
+    match.events.extend(_archived_events(match_stats.log(), players, team_names))
+
+    db.session.add(match)
+    db.session.commit()
+    return match
+
+
+# ===========================
+# Queries
+# ===========================
+
+def list_matches(limit= 50, offset= 0, team_name= None):
+    query = ArchivedMatch.query
+    if team_name:
+        query = query.filter(or_(ArchivedMatch.team1_name == team_name, ArchivedMatch.team2_name == team_name))
+    matches = query.order_by(ArchivedMatch.played_at.desc()).limit(limit).offset(offset).all()
+    return [match.to_dict() for match in matches]
+
+
+def match_detail(match_id):
+    match = db.session.get(ArchivedMatch, match_id)
+    if match is None:
+        return None
+    return {
+        **match.to_dict(),
+        'lineups': [lineup.to_dict() for lineup in match.lineups],
+        'events': [event.to_dict() for event in sorted(match.events, key= lambda e: (e.match_time or 0, e.id))],
+    }
+
+
+def leaders(kind= 'goal', limit= 10, team_name= None):
+    """Players with the most events of one kind (top scorers for 'goal')."""
+    if kind not in EVENT_KINDS:
+        raise ValueError(f"Unknown event kind: {kind}")
+
+    total = func.count().label('total')
+    query = db.session.query(ArchivedEvent.player_name, ArchivedEvent.team_name, total) \
+        .filter(ArchivedEvent.kind == kind, ArchivedEvent.player_name.isnot(None))
+    if team_name:
+        query = query.filter(ArchivedEvent.team_name == team_name)
+    rows = query.group_by(ArchivedEvent.player_name, ArchivedEvent.team_name) \
+        .order_by(total.desc(), ArchivedEvent.player_name) \
+        .limit(limit).all()
+
+    return [{'player_name': name, 'team_name': team, 'total': count} for name, team, count in rows]
+
+
+def head_to_head(team_a, team_b, limit= 10):
+    """Results between two teams, whichever side each one was listed on."""
+    matches = ArchivedMatch.query.filter(or_(
+        and_(ArchivedMatch.team1_name == team_a, ArchivedMatch.team2_name == team_b),
+        and_(ArchivedMatch.team1_name == team_b, ArchivedMatch.team2_name == team_a),
+    )).order_by(ArchivedMatch.played_at.desc()).all()
+
+    summary = {'played': len(matches), 'wins': {team_a: 0, team_b: 0}, 'draws': 0, 'goals': {team_a: 0, team_b: 0}}
+    for match in matches:
+        goals = {match.team1_name: match.team1_score or 0, match.team2_name: match.team2_score or 0}
+        summary['goals'][team_a] += goals[team_a]
+        summary['goals'][team_b] += goals[team_b]
+        if goals[team_a] == goals[team_b]:
+            summary['draws'] += 1
+        else:
+            summary['wins'][team_a if goals[team_a] > goals[team_b] else team_b] += 1
+
+    summary['recent'] = [match.to_dict() for match in matches[:limit]]
+    return summary
+
+
+def player_career(player_name, team_name= None):
+    """Squad listings, starts, appearances (starts + times subbed in) and event totals for one player."""
+    lineups = db.session.query(func.count(), func.sum(db.case((ArchivedLineup.starter, 1), else_= 0))) \
+        .filter(ArchivedLineup.player_name == player_name)
+    events = db.session.query(ArchivedEvent.kind, func.count()) \
+        .filter(ArchivedEvent.player_name == player_name)
+    if team_name:
+        lineups = lineups.filter(ArchivedLineup.team_name == team_name)
+        events = events.filter(ArchivedEvent.team_name == team_name)
+
+    squad, starts = lineups.one()
+    totals = dict(events.group_by(ArchivedEvent.kind).all())
+
+    return {
+        'player_name': player_name,
+        'team_name': team_name,
+        'squad': squad,
+        'starts': starts or 0,
+        'appearances': (starts or 0) + totals.get('sub_in', 0),
+        **{kind: totals.get(kind, 0) for kind in EVENT_KINDS},
+    }
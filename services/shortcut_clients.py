@@ -0,0 +1,211 @@
+"""
+Shortcut-client registry.
+
+Shortcut clients (obs_interface_layer.py) register with an ID, the groups
+they belong to and the executor backends they have. An OBS command is sent
+only to the clients it targets: `targets` is a list of client IDs and
+`group:<name>` entries, and an empty list means every registered client.
+
+Every dispatch gets an execution_id. The clients acknowledge it with
+`obs-command-executed` once the command ran (or was dropped). When all the
+targeted clients have answered, or SHORTCUT_ACK_TIMEOUT has passed, the
+client that triggered the command receives one `obs-command-execution`
+with the outcome and latency of every machine.
+"""
+
+import threading
+import time
+import uuid
+
+from config import SHORTCUT_ACK_TIMEOUT
+from services.broadcast import broadcaster
+
+
+GROUP_PREFIX = 'group:'
+
+# Statuses a client acknowledges for a command that ran; `coalesced` means it
+# was merged into the same command already waiting in that client's queue
+SUCCESS_STATUSES = ('executed', 'coalesced')
+
+
+class ShortcutClientRegistry:
+
+    def __init__(self, ack_timeout= SHORTCUT_ACK_TIMEOUT):
+        self.ack_timeout = ack_timeout
+
+        self.socketio = None
+        self._lock = threading.Lock()
+        self._clients = {}  # sid -> client info
+        self._sids = {}  # client_id -> sid
+        self._executions = {}  # execution_id -> pending execution
+
+    def init_app(self, socketio):
+        self.socketio = socketio
+
+    # ---- registration ----
+
+    def register(self, sid, client_id, groups= (), capabilities= ()):
+        with self._lock:
+            previous_sid = self._sids.get(client_id)
+            if previous_sid and previous_sid != sid:
+                self._clients.pop(previous_sid, None)
+
+            self._sids[client_id] = sid
+            self._clients[sid] = {
+                'client_id': client_id,
+                'groups': sorted(set(groups)),
+                'capabilities': list(capabilities),
+                'connected_at': time.time(),
+                'executed': 0,
+                'failed': 0,
+                'last_latency_ms': None,
+                'avg_latency_ms': None,
+            }
+            return dict(self._clients[sid])
+
+    def unregister(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            if client is None:
+                return
+            if self._sids.get(client['client_id']) == sid:
+                del self._sids[client['client_id']]
+
+            finished = []
+            for execution in self._executions.values():
+                if client['client_id'] in execution['waiting']:
+                    self._record(execution, client['client_id'], {'status': 'disconnected'})
+                    if not execution['waiting']:
+                        finished.append(execution)
+
+        for execution in finished:
+            self._finish(execution['execution_id'])
+
+    def clients(self):
+        with self._lock:
+            return [dict(client) for client in self._clients.values()]
+
+    def has_clients(self):
+        with self._lock:
+            return bool(self._clients)
+
+    # ---- dispatch ----
+
+    def resolve(self, targets):
+        """Map targets to {client_id: sid}, plus the named client IDs that are not connected."""
+        with self._lock:
+            if not targets:
+                return {client['client_id']: sid for sid, client in self._clients.items()}, []
+
+            resolved = {}
+            offline = []
+            for target in targets:
+                if target.startswith(GROUP_PREFIX):
+                    group = target[len(GROUP_PREFIX):]
+                    for sid, client in self._clients.items():
+                        if group in client['groups']:
+                            resolved[client['client_id']] = sid
+                elif target in self._sids:
+                    resolved[target] = self._sids[target]
+                else:
+                    offline.append(target)
+            return resolved, offline
+
+    def dispatch(self, command, sender_sid, targets= None, duration= 0.0):
+        """Send command to its targets. Returns the execution_id, or None if nobody was targeted.
+
+        duration (seconds) extends the ack timeout for macros that take a while to run.
+        """
+        resolved, offline = self.resolve(targets or [])
+        if not resolved:
+            return None
+
+        execution_id = uuid.uuid4().hex
+        execution = {
+            'execution_id': execution_id,
+            'command_id': command.get('id'),
+            'sender': sender_sid,
+            'dispatched_at': time.monotonic(),
+            'waiting': set(resolved),
+            'results': {client_id: {'status': 'offline'} for client_id in offline},
+        }
+        with self._lock:
+            self._executions[execution_id] = execution
+
+        broadcaster.send('execute-obs-command', {**command, 'execution_id': execution_id}, to= list(resolved.values()))
+        self.socketio.start_background_task(self._expire_later, execution_id, self.ack_timeout + duration)
+        return execution_id
+
+    def acknowledge(self, sid, data):
+        """Record a client's execution result."""
+        with self._lock:
+            client = self._clients.get(sid)
+            execution = self._executions.get(data.get('execution_id'))
+            if client is None or execution is None or client['client_id'] not in execution['waiting']:
+                return
+
+            self._record(execution, client['client_id'], data)
+            done = not execution['waiting']
+
+        if done:
+            self._finish(execution['execution_id'])
+
+    def _record(self, execution, client_id, data):
+        """Store one client's result. Caller holds the lock."""
+        latency_ms = (time.monotonic() - execution['dispatched_at']) * 1000
+        result = {
+            'status': data.get('status', 'failed'),
+            'latency_ms': round(latency_ms, 2),
+        }
+        for field in ('backend', 'error', 'wait_ms', 'exec_ms'):
+            if data.get(field) is not None:
+                result[field] = round(data[field], 2) if isinstance(data[field], float) else data[field]
+
+        execution['waiting'].discard(client_id)
+        execution['results'][client_id] = result
+
+        client = self._clients.get(self._sids.get(client_id))
+        # A coalesced trigger rides on a run that is acknowledged (and timed) itself
+        if client is None or result['status'] in ('disconnected', 'coalesced'):
+            return
+        if result['status'] == 'executed':
+            client['executed'] += 1
+        else:
+            client['failed'] += 1
+        client['last_latency_ms'] = result['latency_ms']
+        count = client['executed'] + client['failed']
+        previous = client['avg_latency_ms'] or 0.0
+        client['avg_latency_ms'] = round(previous + (result['latency_ms'] - previous) / count, 2)
+
+    def _expire_later(self, execution_id, timeout):
+        self.socketio.sleep(timeout)
+        with self._lock:
+            execution = self._executions.get(execution_id)
+            if execution is None:
+                return
+            for client_id in execution['waiting']:
+                execution['results'][client_id] = {'status': 'timeout'}
+            execution['waiting'].clear()
+        self._finish(execution_id)
+
+    def _finish(self, execution_id):
+        with self._lock:
+            execution = self._executions.pop(execution_id, None)
+        if execution is None:
+            return
+
+        # Nobody to tell when the command was fired by the server itself (e.g. a cue)
+        if execution['sender'] is None:
+            return
+
+        results = execution['results']
+        self.socketio.emit('obs-command-execution', {
+            'success': bool(results) and all(r['status'] in SUCCESS_STATUSES for r in results.values()),
+            'acknowledged': True,
+            'execution_id': execution_id,
+            'command_id': execution['command_id'],
+            'results': results,
+        }, to= execution['sender'])
+
+
+shortcut_clients = ShortcutClientRegistry()
@@ -0,0 +1,88 @@
+"""
+Per-client wire format for broadcast payloads.
+
+Every client starts on plain JSON. A client that can decode MessagePack
+sends `set-wire-format` with `{'format': 'msgpack'}` after connecting and is
+moved into MSGPACK_ROOM; from then on broadcast payloads reach it as a single
+MessagePack-encoded binary attachment instead of JSON text. Pages that never
+ask keep receiving JSON, so old or cached pages keep working.
+
+Only payloads that gain from it are packed. Score and timer updates, or a
+substitution event, are a few dozen bytes, and the attachment placeholder
+makes them larger than the JSON text, so anything that packs to less than
+WIRE_MSGPACK_MIN_SIZE bytes is sent as JSON to everyone; the decoders
+accept both.
+
+msgpack is optional: when it is not installed the negotiation is refused
+and everyone stays on JSON.
+
+Clients in SEQUENCED_ROOM (joined with `resume-broadcasts`, see
+services/broadcast.py) receive the broadcast sequence number as an extra
+last argument; the others keep the plain one-argument messages.
+"""
+
+from flask_socketio import join_room, leave_room
+
+from config import WIRE_MSGPACK_MIN_SIZE
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+WIRE_FORMATS = ('json', 'msgpack')
+MSGPACK_ROOM = 'wire:msgpack'
+SEQUENCED_ROOM = 'wire:sequenced'
+
+
+def msgpack_available():
+    return msgpack is not None
+
+
+def pack(data):
+    return msgpack.packb(data, use_bin_type= True)
+
+
+def packed(data):
+    """data as MessagePack, or None when it is too small to gain from it and goes out as JSON."""
+    encoded = pack(data)
+    return encoded if len(encoded) >= WIRE_MSGPACK_MIN_SIZE else None
+
+
+def _room_sids(socketio, room, namespace):
+    try:
+        return [sid for sid, _ in socketio.server.manager.get_participants(namespace, room)]
+    except KeyError:
+        return []
+
+
+def msgpack_sids(socketio, namespace= '/'):
+    """Sids of the clients that negotiated MessagePack."""
+    return _room_sids(socketio, MSGPACK_ROOM, namespace)
+
+
+def sequenced_sids(socketio, namespace= '/'):
+    """Sids of the clients that receive broadcast sequence numbers."""
+    return _room_sids(socketio, SEQUENCED_ROOM, namespace)
+
+
+def register_wire_socketio(socketio):
+    """Register the wire-format negotiation event."""
+
+    @socketio.on('set-wire-format')
+    def handle_set_wire_format(data):
+        wire_format = (data or {}).get('format', 'json')
+
+        if wire_format not in WIRE_FORMATS:
+            return {'success': False, 'format': 'json', 'error': f"Unknown wire format: {wire_format}"}
+
+        if wire_format == 'msgpack' and not msgpack_available():
+            return {'success': False, 'format': 'json', 'error': 'msgpack is not installed on the server'}
+
+        if wire_format == 'msgpack':
+            join_room(MSGPACK_ROOM)
+        else:
+            leave_room(MSGPACK_ROOM)
+
+        return {'success': True, 'format': wire_format}
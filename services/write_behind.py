@@ -0,0 +1,158 @@
+"""
+Write-behind queue for keystroke-level setup edits.
+
+`modify-player`, `modify-ad` and `modify-obs-command` used to commit (an
+fsync) and refresh (a SELECT) on the socket thread for every change. They now
+only look the row up by primary key, so an edit of a deleted row is answered
+'not found' instead of acknowledged and dropped, then hand their field
+updates to the queue and acknowledge. That read is one indexed SELECT and no
+write. Updates to the same row are merged in memory and group-committed in
+one transaction every WRITE_BEHIND_INTERVAL seconds, or as soon as
+WRITE_BEHIND_MAX_BATCH rows are pending. The matching `update-*`
+invalidation is broadcast after the commit, so clients that refetch always
+read the new values.
+
+Anything that reads these rows straight from the database for a decision
+(triggering a command, exporting, uploading an image) calls flush() first.
+Pending edits are also flushed at interpreter exit.
+"""
+
+import atexit
+import logging
+import threading
+
+from config import WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_BATCH
+from services.database import db
+from services.broadcast import broadcaster
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+
+    def __init__(self, interval= WRITE_BEHIND_INTERVAL, max_batch= WRITE_BEHIND_MAX_BATCH):
+        self.interval = interval
+        self.max_batch = max_batch
+
+        self.app = None
+        self.socketio = None
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # (model, id) -> {field: value}
+        self._topics = set()
+        self._flush_scheduled = False
+
+        self._submitted = 0
+        self._committed_rows = 0
+        self._commits = 0
+        self._failed_rows = 0
+
+    def init_app(self, app, socketio):
+        self.app = app
+        self.socketio = socketio
+        atexit.register(self.flush)
+
+    def submit(self, model, object_id, fields, topic= None):
+        """Queue field updates for one row. topic is broadcast once they are committed."""
+        with self._lock:
+            self._pending.setdefault((model, object_id), {}).update(fields)
+            if topic:
+                self._topics.add(topic)
+            self._submitted += 1
+
+            if self.interval <= 0:
+                schedule = False
+                flush_now = True
+            else:
+                flush_now = len(self._pending) >= self.max_batch
+                schedule = not self._flush_scheduled and not flush_now
+                if schedule:
+                    self._flush_scheduled = True
+
+        if flush_now:
+            self.flush()
+        elif schedule:
+            self.socketio.start_background_task(self._flush_later)
+
+    def discard(self, model, object_id):
+        """Drop pending updates for a row that is about to be deleted."""
+        with self._lock:
+            self._pending.pop((model, object_id), None)
+
+    def flush(self):
+        """Commit every pending update in a single transaction.
+
+        If the batch fails, its rows are committed one at a time so a single
+        bad value only loses that row's edit (logged). The topics are
+        broadcast either way, so clients refetch what was actually stored.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                topics = self._topics
+                self._pending = {}
+                self._topics = set()
+                self._flush_scheduled = False
+
+            if not pending:
+                return
+
+            with self.app.app_context():
+                try:
+                    for (model, object_id), fields in pending.items():
+                        self._apply(model, object_id, fields)
+                    db.session.commit()
+                    committed = len(pending)
+
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"Batched commit of {len(pending)} edits failed, committing them one by one: {e}")
+                    committed = self._commit_each(pending)
+
+                with self._lock:
+                    self._commits += 1
+                    self._committed_rows += committed
+
+        for topic in topics:
+            broadcaster.broadcast(topic)
+
+    def _apply(self, model, object_id, fields):
+        row = db.session.get(model, object_id)
+        if row is None:
+            return  # deleted after the edit was acknowledged
+        for field, value in fields.items():
+            setattr(row, field, value)
+
+    def _commit_each(self, pending):
+        committed = 0
+        for (model, object_id), fields in pending.items():
+            try:
+                self._apply(model, object_id, fields)
+                db.session.commit()
+                committed += 1
+            except Exception as e:
+                db.session.rollback()
+                logger.exception(f"Dropping edit of {model.__name__} {object_id}: {e}", extra= {'fields': list(fields)})
+                with self._lock:
+                    self._failed_rows += 1
+        return committed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_ms': self.interval * 1000,
+                'submitted': self._submitted,
+                'committed_rows': self._committed_rows,
+                'commits': self._commits,
+                'failed_rows': self._failed_rows,
+                'pending': len(self._pending),
+            }
+
+    def _flush_later(self):
+        self.socketio.sleep(self.interval)
+        self.flush()
+
+
+write_behind = WriteBehindQueue()
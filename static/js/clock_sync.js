@@ -0,0 +1,79 @@
+// ─── Clock sync ──────────────────────────────────────────────────
+// NTP-style estimate of (server clock - local clock) over the Socket.IO
+// connection. A burst of samples is taken on every connect and one more
+// sample periodically; the offset is the median of the lowest-delay
+// samples in a sliding window, which filters out jittery round trips.
+const ClockSync = (() => {
+    const BURST_SAMPLES = 8;
+    const BURST_SPACING_MS = 100;
+    const RESYNC_INTERVAL_MS = 30000;
+    const SAMPLE_TIMEOUT_MS = 2000;
+    const WINDOW_SIZE = 16;
+
+    let socket = null;
+    let samples = [];
+    let offset = 0;
+    let resyncInterval = null;
+
+    function localNow() {
+        return Date.now() / 1000;
+    }
+
+    function takeSample() {
+        return new Promise((resolve) => {
+            const t0 = localNow();
+            socket.timeout(SAMPLE_TIMEOUT_MS).emit("clock-sync", { t0 }, (err, res) => {
+                if (err || !res) return resolve(null);
+                const t3 = localNow();
+                resolve({
+                    delay: (t3 - t0) - (res.t2 - res.t1),
+                    offset: ((res.t1 - t0) + (res.t2 - t3)) / 2,
+                });
+            });
+        });
+    }
+
+    function addSample(sample) {
+        if (!sample) return;
+        samples.push(sample);
+        if (samples.length > WINDOW_SIZE) samples.shift();
+
+        const best = [...samples]
+            .sort((a, b) => a.delay - b.delay)
+            .slice(0, Math.max(1, Math.ceil(samples.length / 4)))
+            .map((s) => s.offset)
+            .sort((a, b) => a - b);
+        offset = best[Math.floor(best.length / 2)];
+    }
+
+    async function burst() {
+        samples = [];
+        for (let i = 0; i < BURST_SAMPLES && socket.connected; i++) {
+            addSample(await takeSample());
+            await new Promise((r) => setTimeout(r, BURST_SPACING_MS));
+        }
+    }
+
+    function start(sock) {
+        socket = sock;
+        socket.on("connect", burst);
+        if (socket.connected) burst();
+
+        if (!resyncInterval) {
+            resyncInterval = setInterval(async () => {
+                if (socket.connected) addSample(await takeSample());
+            }, RESYNC_INTERVAL_MS);
+        }
+    }
+
+    return {
+        start,
+        // Current time on the server's clock, in seconds
+        now: () => localNow() + offset,
+        offset: () => offset,
+        // Rough offset from a server timestamp, used until the first sample
+        seed: (serverTime) => {
+            if (!samples.length) offset = serverTime - localNow();
+        },
+    };
+})();
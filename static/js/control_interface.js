@@ -0,0 +1,618 @@
+const colorPalette = {
+    'Black': '#000000', 'White': '#ffffff', 'Red': '#ef4444', 
+    'Orange': '#f97316', 'Yellow': '#facc15', 'Green': '#22c55e', 
+    'Cyan': '#06b6d4', 'Blue': '#3b82f6', 'Purple': '#a855f7'
+};
+
+const socket = io();
+ClockSync.start(socket);
+
+// Timer state
+let timerAnchor = 0;
+let timerOffset = 0;
+let timerRunning = false;
+let extraTime = 0;
+let localTimerInterval = null;
+
+// Score state
+let scoreState = { team1_score: 0, team2_score: 0 };
+
+// Score version last seen from the server, sent with score changes so a
+// double tap on a laggy connection is rejected instead of scoring twice
+// (timer commands have their own version and never conflict with a goal)
+let scoreVersion = 0;
+
+// UI state
+let launcherAdverts = [];
+let selectedTeam = 'team1';
+
+// Player lookup - maps player number to player ID for each team
+let playerLookup = {
+    'team1': {},
+    'team2': {}
+};
+let allPlayers = [];
+
+let obsCommands = [];
+
+// --- Utility Functions ---
+
+function formatTime(s) {
+    const m = Math.floor(s / 60);
+    const sec = s % 60;
+    return `${String(m).padStart(2, '0')}:${String(sec).padStart(2, '0')}`;
+}
+
+function calculateCurrentTime() {
+    if (!timerRunning) return Math.floor(timerOffset);
+    return Math.floor(timerOffset + ClockSync.now() - timerAnchor);
+}
+
+function updateTimerDisplay() {
+    document.getElementById('timer').innerText = formatTime(calculateCurrentTime());
+}
+
+function startLocalTimer() {
+    if (localTimerInterval) clearInterval(localTimerInterval);
+    localTimerInterval = setInterval(updateTimerDisplay, 100);
+}
+
+function updateConnectionStatus(connected) {
+    const dot = document.getElementById('status-dot');
+    const text = document.getElementById('conn-text');
+    dot.classList.toggle('connected', connected);
+    dot.classList.toggle('disconnected', !connected);
+    text.innerText = connected ? 'Connected' : 'Disconnected';
+}
+
+function updateScoreDisplay() {
+    document.getElementById('t1-score-val').innerText = scoreState.team1_score;
+    document.getElementById('t2-score-val').innerText = scoreState.team2_score;
+}
+
+function updateTeamDisplay(teams) {
+    const team1 = teams.find(t => t.id === 1);
+    const team2 = teams.find(t => t.id === 2);
+
+    if (team1) {
+        document.getElementById('t1-display-name').innerText = team1.name || 'TEAM 1';
+        document.getElementById('t1-display-dot').style.backgroundColor = team1.bg_color || '#3b82f6';
+        document.getElementById('team1-btn-name').innerText = team1.name || 'Team 1';
+        document.getElementById('team1-formation-btn-name').innerText = team1.name || 'Team 1';
+    }
+    if (team2) {
+        document.getElementById('t2-display-name').innerText = team2.name || 'TEAM 2';
+        document.getElementById('t2-display-dot').style.backgroundColor = team2.bg_color || '#f43f5e';
+        document.getElementById('team2-btn-name').innerText = team2.name || 'Team 2';
+        document.getElementById('team2-formation-btn-name').innerText = team2.name || 'Team 2';
+    }
+}
+
+function selectTeam(team) {
+    selectedTeam = team;
+    document.getElementById('team1-btn').classList.toggle('active', team === 'team1');
+    document.getElementById('team2-btn').classList.toggle('active', team === 'team2');
+}
+
+function buildPlayerLookup() {
+    playerLookup = { 'team1': {}, 'team2': {} };
+    allPlayers.forEach(player => {
+        const teamKey = player.team_id === 1 ? 'team1' : 'team2';
+        playerLookup[teamKey][player.number] = player.id;
+    });
+}
+
+function getPlayerIdByNumber(teamKey, playerNumber) {
+    const id = playerLookup[teamKey][playerNumber];
+    if (id === undefined) {
+        alert(`Player #${playerNumber} not found in roster`);
+        return null;
+    }
+    return id;
+}
+
+// --- Socket.IO Connection Events ---
+
+socket.on('connect', () => {
+    updateConnectionStatus(true);
+    sync();
+});
+
+socket.on('disconnect', () => {
+    updateConnectionStatus(false);
+});
+
+// Answered so the server can tell a slow connection from a healthy one
+socket.on('backpressure-probe', (_, ack) => ack && ack());
+
+// --- Socket.IO State Update Listeners ---
+
+socket.on('update-timer-start', applyTimerState);
+socket.on('update-timer-stop', applyTimerState);
+socket.on('update-timer', applyTimerState);
+socket.on('show-extra-time', applyTimerState);
+
+socket.on('add-to-score', applyScoreState);
+socket.on('decrease-to-score', applyScoreState);
+
+socket.on('update-teams', () => fetchTeams());
+socket.on('update-players', () => fetchPlayers());
+socket.on('update-roster', () => fetchTeams());
+socket.on('update-ads', () => fetchLauncherAdverts());
+socket.on('update-obs-commands', () => fetchOBSCommands());
+socket.on('obs-command-execution', showOBSCommandResult);
+socket.on('cue-fired', showCueBanner);
+
+// --- HTTP Sync Functions ---
+
+// Broadcasts and acks can arrive out of order, so they only move the
+// version forward. A snapshot or a rejection carries the server's current
+// version and replaces it outright (it starts again at 0 after a restart).
+function trackVersion(data, current = false) {
+    if (!data || typeof data.score_version !== 'number') return;
+    if (current || data.score_version > scoreVersion) scoreVersion = data.score_version;
+}
+
+function applyScoreState(data) {
+    trackVersion(data);
+    scoreState = data;
+    updateScoreDisplay();
+}
+
+function applyTimerState(data) {
+    timerAnchor = data.timer_anchor || 0;
+    timerOffset = data.timer_offset || 0;
+    timerRunning = data.timer_running || false;
+    extraTime = data.extra_time || 0;
+    updateTimerDisplay();
+}
+
+function syncTimer() {
+    if (!socket.connected) return Promise.resolve();
+    return new Promise((resolve) => {
+        socket.emit('get-timer', (data) => {
+            applyTimerState(data);
+            resolve();
+        });
+    });
+}
+
+async function syncScore() {
+    try {
+        const res = await fetch('/game_state');
+        const data = await res.json();
+        trackVersion(data, true);
+        applyScoreState(data);
+    } catch (e) {
+        console.error('Score sync failed:', e);
+    }
+}
+
+async function fetchTeams() {
+    try {
+        const res = await fetch('/teams');
+        const data = await res.json();
+        updateTeamDisplay(data.teams || []);
+    } catch (e) {
+        console.error('Teams fetch failed:', e);
+    }
+    // Also fetch players to build lookup
+    await fetchPlayers();
+}
+
+async function fetchPlayers() {
+    try {
+        const res = await fetch('/players');
+        const data = await res.json();
+        allPlayers = data.players || [];
+        buildPlayerLookup();
+    } catch (e) {
+        console.error('Players fetch failed:', e);
+    }
+}
+
+async function fetchLauncherAdverts() {
+    try {
+        const res = await fetch('/ads');
+        const data = await res.json();
+        console.log('All ads from server:', data.ads);
+        console.log('Ad types:', data.ads.map(ad => ({ id: ad.id, name: ad.name, type: ad.type, typeOf: typeof ad.type })));
+        launcherAdverts = (data.ads || []).filter(
+            ad => ad.type && ad.type.toLowerCase() === 'launcher'
+        );
+        console.log('Filtered launcher ads:', launcherAdverts);
+        renderLauncherButtons();
+    } catch (e) {
+        console.error('Ads fetch failed:', e);
+    }
+}
+
+async function fetchOBSCommands() {
+    try {
+        const res = await fetch('/obs-commands');
+        const data = await res.json();
+        obsCommands = data.obs_commands || [];
+        renderOBSCommandBar();
+    } catch (e) {
+        console.error('OBS commands fetch failed:', e);
+    }
+}
+
+async function sync() {
+    await Promise.all([
+        syncTimer(),
+        syncScore(),
+        fetchTeams(),
+        fetchPlayers(),
+        fetchLauncherAdverts(),
+        fetchOBSCommands(),
+    ]);
+}
+
+// --- Action Functions ---
+
+function update(key, value) {
+    const minutes = parseInt(value, 10);
+    if (isNaN(minutes) || minutes < 0) {
+        alert('Please enter a valid number of minutes');
+        return;
+    }
+    const seconds = minutes * 60;
+
+    if (key === 'set_time') {
+        sendCommand('set-timer', { 'set': seconds });
+    } else if (key === 'extra_time') {
+        sendCommand('set-extra-time', { 'extra-time': minutes });
+    }
+}
+
+function newCommandKey() {
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+}
+
+// Emit a match-state command with an idempotency key, so socket.io
+// re-sends after a reconnect are never applied twice
+function sendCommand(event, payload = {}) {
+    socket.emit(event, { ...payload, idempotency_key: newCommandKey() }, (result) => {
+        trackVersion(result, Boolean(result && result.error === 'Version conflict'));
+        if (result && !result.success) {
+            console.warn(`${event} rejected:`, result.error);
+            showCommandRejected(event, payload, result);
+        }
+    });
+}
+
+// A rejected command must not go unnoticed: show why, and for score changes
+// offer to send it again against the score as it is now
+function showCommandRejected(event, payload, result) {
+    let banner = document.getElementById('command-rejected-banner');
+    if (!banner) {
+        banner = document.createElement('div');
+        banner.id = 'command-rejected-banner';
+        banner.className = 'fixed bottom-4 left-1/2 -translate-x-1/2 z-50 px-4 py-2 rounded-xl bg-red-600 text-white font-bold shadow-lg flex items-center gap-3';
+        document.body.appendChild(banner);
+    }
+
+    const labels = { 'trigger-goal': 'Goal', 'cancel-goal': 'Goal cancel' };
+    const label = labels[event] || event;
+    const reason = result.error === 'Version conflict' ? 'the score changed in the meantime' : (result.error || 'rejected');
+    banner.textContent = `${label} not applied: ${reason}`;
+
+    if (event in labels && result.error !== 'Rate limited') {
+        const retry = document.createElement('button');
+        retry.className = 'px-3 py-1 rounded-lg bg-white text-red-700';
+        retry.textContent = 'Retry';
+        retry.addEventListener('click', () => {
+            banner.style.display = 'none';
+            sendCommand(event, { ...payload, expected_version: scoreVersion });
+        });
+        banner.appendChild(retry);
+    }
+
+    banner.style.display = 'flex';
+    clearTimeout(banner._hideTimer);
+    banner._hideTimer = setTimeout(() => (banner.style.display = 'none'), 8000);
+}
+
+function changeScore(teamKey, delta) {
+    const team = teamKey.replace('_score', '');
+    const event = delta > 0 ? 'trigger-goal' : 'cancel-goal';
+    sendCommand(event, { team, expected_version: scoreVersion });
+}
+
+function timerAction(action) {
+    if (action === 'start') sendCommand('start-timer');
+    else if (action === 'stop') sendCommand('stop-timer');
+    else if (action === 'reset') sendCommand('reset-timer');
+}
+
+function submitCard(cardType) {
+    const playerNumber = document.getElementById('card-player').value;
+    if (!playerNumber) {
+        alert('Please enter player number');
+        return;
+    }
+    const playerId = getPlayerIdByNumber(selectedTeam, parseInt(playerNumber, 10));
+    if (playerId === null) return;
+
+    socket.emit('trigger-event', {
+        type: 'card',
+        team: selectedTeam,
+        player_id: playerId,
+        card_type: cardType
+    });
+    document.getElementById('card-player').value = '';
+}
+
+function submitSubstitution() {
+    const playerOutNumber = document.getElementById('substitution_player_out').value;
+    const playerInNumber = document.getElementById('substitution_player_in').value;
+    if (!playerOutNumber || !playerInNumber) {
+        alert('Please fill in both player numbers');
+        return;
+    }
+
+    const playerOutId = getPlayerIdByNumber(selectedTeam, parseInt(playerOutNumber, 10));
+    const playerInId = getPlayerIdByNumber(selectedTeam, parseInt(playerInNumber, 10));
+    if (playerOutId === null || playerInId === null) return;
+
+    socket.emit('trigger-event', {
+        type: 'substitution',
+        team: selectedTeam,
+        player_id_out: playerOutId,
+        player_id_in: playerInId
+    });
+    document.getElementById('substitution_player_out').value = '';
+    document.getElementById('substitution_player_in').value = '';
+}
+
+function submitGoal() {
+    const playerNumber = document.getElementById('goal-player').value;
+    if (!playerNumber) {
+        alert('Please enter scorer number');
+        return;
+    }
+    const playerId = getPlayerIdByNumber(selectedTeam, parseInt(playerNumber, 10));
+    if (playerId === null) return;
+
+    socket.emit('trigger-event', {
+        type: 'goal',
+        team: selectedTeam,
+        player_id: playerId
+    });
+    document.getElementById('goal-player').value = '';
+}
+
+function submitFormation(team) {
+    socket.emit('trigger-event', { 'type': 'formation', 'team': team });
+}
+
+function escapeHtml(str) {
+    if (!str) return "";
+    return str
+        .replace(/&/g, "&amp;")
+        .replace(/</g, "&lt;")
+        .replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;")
+        .replace(/'/g, "&#039;");
+}
+
+function renderLauncherButtons() {
+    const container =
+        document.getElementById("launcher-buttons-container");
+    if (launcherAdverts.length === 0) {
+        container.innerHTML =
+            '<p class="text-slate-500 text-xs col-span-full text-center py-4">No launcher advertisements configured</p>';
+        return;
+    }
+    container.innerHTML = launcherAdverts
+        .map(
+            (ad) => `
+        <button 
+            onclick="triggerAdvert(${ad.id})" 
+            class="bg-gradient-to-br from-amber-600 to-amber-700 hover:from-amber-500 hover:to-amber-600 text-white py-3 px-4 rounded-xl text-xs sm:text-sm font-bold uppercase transition-all active:scale-95 shadow-lg shadow-amber-900/30 border border-amber-500/20 truncate"
+            title="${escapeHtml(ad.sponsor ? ad.sponsor + ' - ' : '')}${escapeHtml(ad.name)}"
+        >
+            ${escapeHtml(ad.name) || "Unnamed Ad"}
+        </button>
+    `
+        )
+        .join("");
+}
+
+function renderOBSCommandBar() {
+    const container = document.getElementById('obs-command-bar-buttons');
+    if (obsCommands.length === 0) {
+        container.innerHTML =
+            '<p class="text-slate-500 text-sm col-span-2 sm:col-span-4">No OBS commands configured</p>';
+        return;
+    }
+    container.innerHTML = obsCommands
+        .map((cmd) => {
+            const bgColor = cmd.color || '#000000';
+            // Pick white or black text based on luminance
+            const r = parseInt(bgColor.slice(1, 3), 16);
+            const g = parseInt(bgColor.slice(3, 5), 16);
+            const b = parseInt(bgColor.slice(5, 7), 16);
+            const lum = (0.299 * r + 0.587 * g + 0.114 * b) / 255;
+            const textColor = lum > 0.5 ? '#000000' : '#ffffff';
+            return `
+                <button
+                    onclick="triggerOBSCommand(${cmd.id})"
+                    style="background-color: ${bgColor}; color: ${textColor};"
+                    class="px-6 sm:px-8 py-4 sm:py-6 rounded-xl text-base sm:text-lg font-black uppercase transition-all active:scale-95 hover:opacity-80 shadow-lg border border-white/20 flex flex-col items-center justify-center gap-1"
+                    title="${escapeHtml(cmd.shortcut || '')}"
+                >
+                    <span>${escapeHtml(cmd.name) || 'Unnamed'}</span>
+                    <span id="obs-command-status-${cmd.id}" class="text-[10px] sm:text-xs opacity-75 font-mono">${escapeHtml(cmd.shortcut || 'N/A')}</span>
+                </button>`;
+        })
+        .join('');
+}
+
+function triggerOBSCommand(commandId) {
+    socket.emit('trigger-obs-command', { id: commandId });
+}
+
+// Shows each machine's result (or the error) under the command button for a few seconds
+function showOBSCommandResult(data) {
+    const status = document.getElementById(`obs-command-status-${data.command_id}`);
+    if (!status) return;
+
+    const results = Object.entries(data.results || {});
+    let text;
+    if (results.length) {
+        text = results
+            .map(([client, r]) => r.status === 'executed'
+                ? `${client} ✓ ${Math.round(r.latency_ms)}ms`
+                : r.status === 'coalesced' ? `${client} ✓ queued` : `${client} ✗ ${r.status}`)
+            .join(' · ');
+    } else {
+        text = data.success ? 'Sent' : (data.error || 'Failed');
+    }
+
+    const cmd = obsCommands.find((c) => c.id === data.command_id);
+    status.textContent = text;
+    status.title = results.map(([client, r]) => `${client}: ${r.error || r.status}`).join('\n');
+    clearTimeout(status._resetTimer);
+    status._resetTimer = setTimeout(() => {
+        status.textContent = (cmd && cmd.shortcut) || 'N/A';
+        status.title = '';
+    }, 4000);
+}
+
+// Match-clock cues: brief banner so the operator sees what just fired
+function showCueBanner(cue) {
+    let banner = document.getElementById('cue-banner');
+    if (!banner) {
+        banner = document.createElement('div');
+        banner.id = 'cue-banner';
+        banner.className = 'fixed top-4 left-1/2 -translate-x-1/2 z-50 px-4 py-2 rounded-xl bg-amber-500 text-slate-900 font-bold shadow-lg';
+        document.body.appendChild(banner);
+    }
+    const minute = Math.floor((cue.match_time || 0) / 60);
+    banner.textContent = `${minute}' ${cue.message || cue.name || 'Cue'}`;
+    banner.style.display = 'block';
+    clearTimeout(banner._hideTimer);
+    banner._hideTimer = setTimeout(() => (banner.style.display = 'none'), 6000);
+}
+
+function triggerAdvert(advertId) {
+    socket.emit('trigger-ad', { id: advertId });
+}
+
+// --- Import/Export Functionality ---
+
+document.getElementById('export-btn').addEventListener('click', exportDatabase);
+document.getElementById('import-btn').addEventListener('click', () => {
+    const input = document.createElement('input');
+    input.type = 'file';
+    input.accept = '.zip';
+    input.onchange = (e) => importDatabase(e.target.files[0]);
+    input.click();
+});
+
+async function exportDatabase() {
+    const btn = document.getElementById('export-btn');
+    const originalText = btn.innerHTML;
+
+    try {
+        btn.innerHTML = '⏳ Exporting...';
+        btn.disabled = true;
+
+        const response = await fetch('/export');
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.error || 'Export failed');
+        }
+
+        // Get filename from Content-Disposition header or use default
+        const contentDisposition = response.headers.get('content-disposition');
+        let filename = `football_backup_${new Date().toISOString().split('T')[0]}.zip`;
+        if (contentDisposition) {
+            const match = contentDisposition.match(/filename[^;=\n]*=(?:(['"]).*?\1|[^;\n]*)/);
+            if (match) {
+                filename = match[0].split('=')[1].replace(/['"]/g, '');
+            }
+        }
+
+        // Download the ZIP file
+        const blob = await response.blob();
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = filename;
+        document.body.appendChild(a);
+        a.click();
+        window.URL.revokeObjectURL(url);
+        document.body.removeChild(a);
+
+        btn.innerHTML = '✅ Exported!';
+        setTimeout(() => {
+            btn.innerHTML = originalText;
+            btn.disabled = false;
+        }, 2000);
+
+    } catch (error) {
+        console.error('Export error:', error);
+        alert(`Export failed: ${error.message}`);
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+    }
+}
+
+async function importDatabase(file) {
+    if (!file) return;
+
+    if (!file.name.endsWith('.zip')) {
+        alert('Please select a valid .zip backup file');
+        return;
+    }
+
+    const btn = document.getElementById('import-btn');
+    const originalText = btn.innerHTML;
+
+    try {
+        btn.innerHTML = '⏳ Importing...';
+        btn.disabled = true;
+
+        const formData = new FormData();
+        formData.append('file', file);
+
+        const response = await fetch('/import', {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.error || 'Import failed');
+        }
+
+        btn.innerHTML = '✅ Imported!';
+        alert('Database imported successfully! Refreshing...');
+
+        // Refresh all data
+        await sync();
+
+        setTimeout(() => {
+            btn.innerHTML = originalText;
+            btn.disabled = false;
+        }, 2000);
+
+    } catch (error) {
+        console.error('Import error:', error);
+        alert(`Import failed: ${error.message}`);
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+    }
+}
+
+// --- Initialize ---
+
+startLocalTimer();
+setInterval(sync, 5000);
+sync();
+selectTeam('team1');
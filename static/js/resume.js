@@ -0,0 +1,58 @@
+// ─── Broadcast resume ────────────────────────────────────────────
+// After connecting, the page asks the server to number its broadcasts
+// (`resume-broadcasts`) and presents the last number it handled. The
+// server replays exactly the broadcasts it missed, or answers `resync`
+// when they are no longer buffered and the page has to refetch its state.
+// Handlers registered through Resume.on() see every broadcast once, in
+// order, across reconnects.
+const Resume = (() => {
+    let socket = null;
+    let position = null; // { epoch, seq } of the last broadcast handled
+    let resuming = false;
+    let resumedSeq = -1; // highest number received while resuming
+
+    function start(sock, initialPosition, onResync) {
+        socket = sock;
+        position = initialPosition || null;
+
+        socket.on("connect", () => {
+            resuming = true;
+            resumedSeq = -1;
+            socket.emit(
+                "resume-broadcasts",
+                { last_seq: position ? position.seq : null, epoch: position ? position.epoch : null },
+                (res) => {
+                    resuming = false;
+                    if (!res || !res.success) {
+                        onResync();
+                        return;
+                    }
+                    if (res.resync || !position) onResync();
+                    position = { epoch: res.epoch, seq: Math.max(res.seq, resumedSeq) };
+                }
+            );
+        });
+    }
+
+    // Whether a message should be handled. Unnumbered broadcasts that arrive
+    // while resuming are replayed with their number, so they are skipped;
+    // numbered ones arriving then are the replay itself and cannot repeat.
+    function accept(seq) {
+        if (seq === undefined || seq === null) return !(resuming && position);
+        if (resuming) {
+            resumedSeq = Math.max(resumedSeq, seq);
+            return true;
+        }
+        if (position && seq <= position.seq) return false;
+        if (position) position.seq = seq;
+        return true;
+    }
+
+    function on(event, handler) {
+        socket.on(event, (data, seq) => {
+            if (accept(seq)) handler(Wire.decode(data));
+        });
+    }
+
+    return { start, on };
+})();
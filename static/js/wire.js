@@ -0,0 +1,31 @@
+// ─── Wire format ─────────────────────────────────────────────────
+// Opts this page into MessagePack broadcasts when the decoder
+// (static/js/msgpack.js) loaded; otherwise (or if the server refuses)
+// payloads stay JSON. Small payloads (score, timer) always arrive as
+// JSON, so handlers registered through Wire.on() accept either format.
+const Wire = (() => {
+    const available = typeof MessagePack !== "undefined";
+
+    function negotiate(socket) {
+        if (!available) return;
+        socket.on("connect", () => {
+            socket.emit("set-wire-format", { format: "msgpack" }, (res) => {
+                if (!res || !res.success) {
+                    console.warn("MessagePack refused, using JSON:", res && res.error);
+                }
+            });
+        });
+    }
+
+    function decode(data) {
+        if (data instanceof ArrayBuffer) return MessagePack.decode(new Uint8Array(data));
+        if (ArrayBuffer.isView(data)) return MessagePack.decode(data);
+        return data;
+    }
+
+    function on(socket, event, handler) {
+        socket.on(event, (data) => handler(decode(data)));
+    }
+
+    return { negotiate, decode, on };
+})();